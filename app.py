@@ -1,48 +1,192 @@
 import streamlit as st
 import pandas as pd
 import os
+import hashlib
+import json
 import pytz
-from datetime import datetime
-from groq import Groq
+import uuid
+from datetime import datetime, timedelta
+from ia import ConfigIA, ResultadoIA, completar, transmitir
+from provedores_ia import montar_cadeia
+from fila_ia import FilaIA, LimitadorTaxa
+from cache_ia import CacheIA
+from busca import IndiceBusca, reindexar
+from semelhantes import AgrupadorIdeias, assunto_do_grupo, reagrupar
+from modelos import minuta_completa, montar_minuta, secoes_fixas
+from secoes import NOMES_SECOES, SECOES_LOCAIS, dividir, estimar_tokens, juntar, ler_resposta, prompt_parcial, secoes_afetadas
+from versoes import comparar_html, remontar_versao, remontar_versoes
+from armazenamento import FUSO, abrir_repositorios, formatar_momento, formatar_momentos, novo_id, novos_ids
+from camaras import CAMARA_PADRAO, carregar_camara
+from exportacao import EXPORTAVEIS, apagar, arquivo_completo, exportar, formatos_disponiveis
+from metricas import Metricas, RepositorioMedido
+from gravacao import gravar_historico, gravar_ideia, regravar_ideias
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(page_title="Legislativo Digital", page_icon="🏛️", layout="wide")
 
+# --- MÉTRICAS DE DESEMPENHO ---
+# Ligue com METRICAS = true nos secrets (ou METRICAS=1 no ambiente). Gravam em metricas/
+@st.cache_resource
+def obter_metricas():
+    try:
+        ativo = bool(st.secrets["METRICAS"])
+    except:
+        ativo = os.environ.get("METRICAS", "") in ("1", "true")
+    return Metricas(ativo)
+
+metricas = obter_metricas()
+if "id_sessao" not in st.session_state: st.session_state["id_sessao"] = uuid.uuid4().hex[:8]
+metricas.iniciar_execucao(st.session_state["id_sessao"])
+metricas.etapa("configuracao")
+
 # --- CONFIGURAÇÃO DA IA ---
 try:
     api_key = st.secrets["GROQ_API_KEY"]
 except:
     api_key = ""
 
+# Tempo limite e repetições das chamadas à IA (opcionais nos secrets)
+try:
+    config_ia = ConfigIA(
+        timeout_leitura=float(st.secrets.get("IA_TIMEOUT", 120)),
+        tentativas=int(st.secrets.get("IA_TENTATIVAS", 4)),
+    )
+except:
+    config_ia = ConfigIA()
+
+# Provedores da IA em ordem de preferência (ver provedores_ia.py). Padrão: Groq 70B e, se ele
+# estiver saturado, o 8B. Ex. nos secrets: IA_PROVEDORES = ["local:qwen2.5-14b", "groq:llama-3.3-70b-versatile"]
+try:
+    especificacoes_ia = st.secrets["IA_PROVEDORES"]
+except:
+    especificacoes_ia = os.environ.get("IA_PROVEDORES") or None
+try:
+    url_local_ia = st.secrets.get("IA_URL_LOCAL", "http://localhost:8000/v1")
+    chave_local_ia = st.secrets.get("IA_CHAVE_LOCAL", "")
+    latencia_falso_ia = float(st.secrets.get("IA_FALSO_LATENCIA", 0))
+except:
+    url_local_ia, chave_local_ia, latencia_falso_ia = "http://localhost:8000/v1", "", 0.0
+cadeia_ia = montar_cadeia(especificacoes_ia, api_key, config_ia, url_local_ia, chave_local_ia, latencia_falso_ia)
+
+# Respostas da IA já geradas para o mesmo pedido (memória + pasta cache_ia/)
+@st.cache_resource
+def obter_cache_ia():
+    try:
+        ttl_horas = float(st.secrets.get("CACHE_IA_TTL_HORAS", 168))
+        max_mb = float(st.secrets.get("CACHE_IA_MAX_MB", 50))
+    except:
+        ttl_horas, max_mb = 168, 50
+    return CacheIA(ttl_segundos=ttl_horas * 3600, max_bytes_disco=max_mb * 1024 * 1024)
+
+cache_ia = obter_cache_ia()
+
+# Mostra o texto da IA enquanto é escrito (desligue com STREAMING_IA = false nos secrets)
+try:
+    streaming_ia = bool(st.secrets["STREAMING_IA"])
+except:
+    streaming_ia = True
+
+# Fila única de gerações do processo + cota da Groq compartilhada por todas as sessões
+@st.cache_resource
+def obter_fila_ia():
+    try:
+        trabalhadores = int(st.secrets.get("IA_TRABALHADORES", 3))
+        rpm = int(st.secrets.get("IA_RPM", 30))
+        tpm = int(st.secrets.get("IA_TPM", 30000))
+    except:
+        trabalhadores, rpm, tpm = 3, 30, 30000
+    return FilaIA(trabalhadores), LimitadorTaxa(rpm, tpm)
+
+fila_ia, limitador_ia = obter_fila_ia()
+
+# Fila separada para as elaborações em lote, para um lote grande não segurar
+# os pedidos individuais; a cota da Groq (limitador_ia) é a mesma
+@st.cache_resource
+def obter_fila_lote():
+    try:
+        trabalhadores = int(st.secrets.get("IA_TRABALHADORES_LOTE", 2))
+    except:
+        trabalhadores = 2
+    return FilaIA(trabalhadores)
+
+fila_lote = obter_fila_lote()
+
+# --- CÂMARA ---
+# Cada câmara tem seu arquivo em camaras/ e seus dados numa pasta própria (ver camaras.py).
+# A câmara vem do endereço (?camara=id); sem ele vale CAMARA_PADRAO dos secrets (padrão: espumoso)
+try:
+    id_camara_padrao = st.secrets["CAMARA_PADRAO"]
+except:
+    id_camara_padrao = os.environ.get("CAMARA_PADRAO", CAMARA_PADRAO)
+try:
+    camara = carregar_camara(st.query_params.get("camara", id_camara_padrao))
+except KeyError:
+    st.error("Câmara não encontrada. Confira o endereço.")
+    metricas.finalizar_execucao()
+    st.stop()
+
+# A sessão pertence a uma câmara: trocar de câmara na mesma aba desfaz os logins e o resto do estado
+if st.session_state.get("camara") != camara.id:
+    for chave in list(st.session_state.keys()):
+        if chave != "id_sessao": del st.session_state[chave]
+    st.session_state["camara"] = camara.id
+
 # --- LISTAS DE ACESSO ---
-LISTA_VEREADORES = [
-    "Vereadora Dayana Soares de Camargo (PDT)",
-    "Vereador Denner Fernando Duarte Senhor (PL)",
-    "Vereador Eduardo Signor (UNIÃO BRASIL)",
-    "Vereadora Fabiana Dolci Otoni (PROGRESSISTAS)",
-    "Vereador Leonardo Comin (PROGRESSISTAS)",
-    "Vereador Leandro Keller Colleraus (PDT)",
-    "Vereadora Marina Camera Machado (PL)",
-    "Vereador Paulo Flores de Moraes (PDT)",
-    "Vereador Tomas Fiuza (PROGRESSISTAS)"
-]
-
-LISTA_JURIDICO = [
-    "Assessoria Jurídica"
-]
+LISTA_VEREADORES = list(camara.vereadores)
+
+LISTA_JURIDICO = list(camara.juridico)
 
 LISTA_LOGIN = LISTA_VEREADORES + LISTA_JURIDICO
 
+TIPOS_DOCUMENTO = ["Pedido de Providência", "Pedido de Informação", "Indicação", "Projeto de Lei", "Moção"]
+
 # --- ARQUIVOS DE DADOS ---
-arquivo_ideias = "banco_de_ideias.csv"
-arquivo_mural = "mural_posts.csv"
-arquivo_historico = "historico_proposicoes.csv"
-arquivo_logs = "log_acessos.csv"
+# Todos dentro da pasta da câmara (camara.pasta):
+# "csv" (padrão): banco_de_ideias.csv, mural_posts.csv, historico_proposicoes.csv e log_acessos.csv
+# "sqlite": gabinete.db (importe os CSVs antes com: python armazenamento.py migrar --pasta <pasta da câmara>)
+try:
+    backend_armazenamento = st.secrets["ARMAZENAMENTO"]
+except:
+    backend_armazenamento = os.environ.get("ARMAZENAMENTO", "csv")
+
+# Repositórios, índice e grupos são abertos na primeira visita a cada câmara, um conjunto por pasta
+@st.cache_resource
+def obter_repositorios(backend, pasta):
+    os.makedirs(pasta, exist_ok=True)
+    repos = abrir_repositorios(backend, pasta)
+    if metricas.ativo:
+        repos = {nome: RepositorioMedido(repo, nome, metricas) for nome, repo in repos.items()}
+    return repos
+
+repos = obter_repositorios(backend_armazenamento, camara.pasta)
+repo_ideias = repos["ideias"]
+repo_mural = repos["mural"]
+repo_historico = repos["historico"]
+repo_logs = repos["logs"]
+
+# Índice de busca textual (busca.db da câmara); montado a partir dos dados na primeira vez
+@st.cache_resource
+def obter_indice_busca(pasta):
+    indice = IndiceBusca(os.path.join(pasta, "busca.db"))
+    # as chaves das ideias dependem do esquema dos dados: índice de outro esquema é refeito
+    if indice.vazio() or not indice.atualizado(): reindexar(indice, repos)
+    return indice
+
+indice_busca = obter_indice_busca(camara.pasta)
+
+# Grupos de ideias parecidas (semelhantes.db da câmara); montados na primeira vez
+@st.cache_resource
+def obter_agrupador(pasta):
+    agrupador = AgrupadorIdeias(os.path.join(pasta, "semelhantes.db"))
+    if agrupador.vazio() or not agrupador.atualizado(): reagrupar(agrupador, repo_ideias)
+    return agrupador
+
+agrupador_ideias = obter_agrupador(camara.pasta)
 
 # --- FUNÇÕES ÚTEIS ---
 def obter_data_hora_atual():
-    fuso_br = pytz.timezone('America/Sao_Paulo')
-    return datetime.now(fuso_br).strftime("%d/%m/%Y %H:%M")
+    # Guardado como instante (epoch); o texto "dd/mm/aaaa HH:MM" só aparece na tela (formatar_momento)
+    return datetime.now(pytz.timezone(FUSO))
 
 def obter_avatar_simples(nome):
     if nome.startswith("Vereadora"):
@@ -50,69 +194,173 @@ def obter_avatar_simples(nome):
     else:
         return "👨"
 
-def salvar_historico(autor, tipo, assunto, texto_minuta, versao_id, revisao_num):
-    if not os.path.exists(arquivo_historico):
-        df = pd.DataFrame(columns=["ID_PROPOSICAO", "VEREADOR", "TIPO_DOC", "ASSUNTO", "VERSAO_NUM", "DATA_HORA", "MINUTA_TEXTO"])
-    else:
-        df = pd.read_csv(arquivo_historico)
-    
-    nova_linha = pd.DataFrame([{
-        "ID_PROPOSICAO": versao_id, 
-        "VEREADOR": autor, 
-        "TIPO_DOC": tipo, 
-        "ASSUNTO": assunto, 
-        "VERSAO_NUM": revisao_num,
-        "DATA_HORA": datetime.now().strftime("%d/%m/%Y %H:%M:%S"), 
-        "MINUTA_TEXTO": texto_minuta
-    }])
-    df = pd.concat([df, nova_linha], ignore_index=True)
-    df.to_csv(arquivo_historico, index=False)
+def linhas_historico(prop_id):
+    return repo_historico.buscar({"ID_PROPOSICAO": prop_id}).to_dict("records")
+
+def salvar_historico(autor, tipo, assunto, texto_minuta, versao_id, revisao_num, modelo=""):
+    gravar_historico(repo_historico, indice_busca, autor, tipo, assunto, texto_minuta, versao_id, revisao_num,
+                     obter_data_hora_atual(), modelo)
 
 def salvar_ideia(dados):
     """Salva uma nova ideia no Banco de Ideias."""
-    if not os.path.exists(arquivo_ideias):
-        # Adicionei "Contribuição" na lista de colunas
-        df = pd.DataFrame(columns=["Data", "Nome", "Contato", "Idade", "Ideia", "Contribuição", "Localização", "Áreas", "Vereador Destino", "Concordou Termos"])
-    else:
-        df = pd.read_csv(arquivo_ideias)
-    
-    nova_linha = pd.DataFrame([dados])
-    df = pd.concat([df, nova_linha], ignore_index=True)
-    df.to_csv(arquivo_ideias, index=False)
+    gravar_ideia(repo_ideias, indice_busca, agrupador_ideias, dados)
 
 def salvar_post_mural(dados):
-    if not os.path.exists(arquivo_mural):
-        df = pd.DataFrame(columns=["Data", "Vereador", "Titulo", "Mensagem"])
-    else:
-        df = pd.read_csv(arquivo_mural)
-    nova_linha = pd.DataFrame([dados])
-    df = pd.concat([df, nova_linha], ignore_index=True)
-    df.to_csv(arquivo_mural, index=False)
+    repo_mural.inserir(dados)
 
-# --- FUNÇÕES IA ---
-def gerar_revisao_ia(texto_base, pedido_revisao, autor, tipo_doc):
-    if not api_key: return "⚠️ ERRO: Chave API não encontrada!"
-    client = Groq(api_key=api_key)
-    prompt = f"""
-    Você é um Procurador Jurídico Sênior do Poder Legislativo de Espumoso/RS. REVISE a minuta abaixo.
-    Vereador: {autor} | Tipo: {tipo_doc} | Pedido: {pedido_revisao}
-    ---
-    TEXTO ATUAL:
-    {texto_base}
-    ---
-    Gere a NOVA VERSÃO mantendo a estrutura formal. Correção gramatical impecável.
-    Adicione DUAS LINHAS EM BRANCO entre seções para leitura.
-    PROIBIDO USAR HTML.
+# --- LEITURAS EM CACHE ---
+# A versão do arquivo/banco entra na chave do cache: qualquer gravação (desta
+# sessão, de outra ou de outro processo) muda a versão e a próxima leitura vai
+# ao disco; sem gravação, os reruns reaproveitam o que já foi lido. As funções
+# de gravação continuam lendo direto dos repositórios. A câmara também entra na
+# chave (versões e IDs se repetem de uma câmara para outra); os limites de
+# entradas valem para o processo todo, não por câmara.
+@st.cache_data(max_entries=100, show_spinner=False)
+def _versoes_em_cache(id_camara, prop_id, versao):
+    return remontar_versoes(linhas_historico(prop_id))
+
+def versoes_proposicao(prop_id):
+    """{número: texto} de todas as versões da proposição."""
+    return _versoes_em_cache(camara.id, prop_id, repo_historico.versao())
+
+@st.cache_data(max_entries=100, show_spinner=False)
+def _modelos_em_cache(id_camara, prop_id, versao):
+    return {int(l["VERSAO_NUM"]): str(l.get("MODELO") or "") for l in linhas_historico(prop_id)}
+
+def modelos_proposicao(prop_id):
+    """{número: modelo da IA que escreveu a versão} ("" nas versões antigas)."""
+    return _modelos_em_cache(camara.id, prop_id, repo_historico.versao())
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _ideias_em_cache(id_camara, versao):
+    return repo_ideias.carregar()
+
+def carregar_ideias():
+    return _ideias_em_cache(camara.id, repo_ideias.versao())
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def _grupos_em_cache(id_camara, vereador, versao):
+    return agrupador_ideias.grupos(vereador=vereador)
+
+def grupos_de_ideias(vereador=None):
+    return _grupos_em_cache(camara.id, vereador, agrupador_ideias.versao())
+
+# --- EDITORES DE TABELA (SALVAMENTO LINHA A LINHA) ---
+# Datas chegam como datetime com fuso; no editor aparecem no formato de sempre
+COLUNA_DATA = st.column_config.DatetimeColumn("Data", format="DD/MM/YYYY HH:mm", timezone=FUSO)
+
+def tabela_do_editor(nome, repo, filtros=None):
+    """Linhas mostradas no editor `nome`, congeladas na sessão até salvar ou recarregar.
+
+    Assim as posições das alterações do st.data_editor continuam apontando
+    para as linhas que o usuário viu, mesmo que outra sessão grave no meio tempo.
     """
-    try:
-        chat = client.chat.completions.create(messages=[{"role": "user", "content": prompt}], model="llama-3.3-70b-versatile", temperature=0.3)
-        return chat.choices[0].message.content
-    except Exception as e: return f"Erro IA: {e}"
+    chave = f"base_{nome}"
+    if chave not in st.session_state:
+        st.session_state[chave] = repo.carregar_para_edicao(filtros)
+        st.session_state[f"geracao_{nome}"] = st.session_state.get(f"geracao_{nome}", 0) + 1
+    return st.session_state[chave], f"{nome}_{st.session_state[f'geracao_{nome}']}"
 
-def gerar_documento_ia(autor, tipo_doc, assunto):
-    if not api_key: return "⚠️ ERRO: Chave API não encontrada!"
-    client = Groq(api_key=api_key)
-    
+def recarregar_editor(nome):
+    st.session_state.pop(f"base_{nome}", None)
+
+def salvar_editor(nome, repo, chave_widget, padrao_novas=None, ao_salvar=None):
+    """Aplica só as linhas editadas, incluídas e apagadas. Retorna as linhas em conflito.
+
+    `ao_salvar(alteracoes, incluidas)` roda depois de uma gravação sem conflitos.
+    """
+    base = st.session_state[f"base_{nome}"]
+    estado = st.session_state.get(chave_widget, {})
+    alteracoes = []
+    for pos, mudancas in estado.get("edited_rows", {}).items():
+        original = base.iloc[int(pos)].to_dict()
+        alteracoes.append((original, {**original, **mudancas}))
+    for pos in estado.get("deleted_rows", []):
+        alteracoes.append((base.iloc[int(pos)].to_dict(), None))
+    incluidas = [{**(padrao_novas or {}), **linha} for linha in estado.get("added_rows", []) if any(v not in (None, "") for v in linha.values())]
+    conflitos = repo.aplicar_alteracoes(alteracoes, incluidas)
+    if not conflitos:
+        recarregar_editor(nome)
+        if ao_salvar: ao_salvar(alteracoes, incluidas)
+    return conflitos
+
+def reindexar_ideias_editadas(alteracoes, incluidas):
+    regravar_ideias(indice_busca, agrupador_ideias, alteracoes, incluidas)
+
+def avisar_conflitos(conflitos):
+    st.error(f"⚠️ {len(conflitos)} linha(s) foram alteradas ou apagadas por outra pessoa depois que você abriu a tabela. Nada foi salvo. Clique em 🔄 Recarregar para ver a versão atual e refazer suas alterações.")
+    st.dataframe(pd.DataFrame(conflitos).drop(columns="_id", errors="ignore"), use_container_width=True)
+
+# --- EXPORTAÇÕES SOB DEMANDA ---
+NOMES_TABELAS = {"ideias": "Banco de Ideias", "mural": "Mural", "historico": "Histórico de Proposições", "logs": "Logs de Acesso"}
+
+def exportacao_sob_demanda(chave, rotulo, gerar):
+    """Botão que monta o arquivo (ver exportacao.py) só quando clicado; depois aparece o download."""
+    if st.button(rotulo, key=f"{chave}_gerar", use_container_width=True):
+        apagar(st.session_state.pop(chave, None))
+        try:
+            with st.spinner("Gerando arquivo..."):
+                st.session_state[chave] = gerar()
+        except ValueError as e:
+            st.error(str(e))
+    pronto = st.session_state.get(chave)
+    if pronto and os.path.exists(pronto["caminho"]):
+        with open(pronto["caminho"], "rb") as f:
+            st.download_button(f"📥 Baixar {pronto['nome']} ({pronto['linhas']} linhas)", data=f, file_name=pronto["nome"],
+                               mime=pronto["mime"], key=f"{chave}_baixar", use_container_width=True)
+
+# --- MURAL: PAGINAÇÃO DO FEED ---
+POSTS_POR_PAGINA = 10
+
+def pagina_mural(chave, vereador=None):
+    """Página atual do feed (mais recentes primeiro). A sessão guarda a pilha de cursores."""
+    cursores = st.session_state.setdefault(chave, [None])
+    return repo_mural.pagina(vereador, cursores[-1], POSTS_POR_PAGINA)
+
+def navegar_mural(chave, proximo):
+    cursores = st.session_state[chave]
+    c1, c2 = st.columns(2)
+    with c1:
+        if len(cursores) > 1 and st.button("⬅️ Mais recentes", key=f"{chave}_voltar", use_container_width=True):
+            cursores.pop(); st.rerun()
+    with c2:
+        if proximo is not None and st.button("Anteriores ➡️", key=f"{chave}_avancar", use_container_width=True):
+            cursores.append(proximo); st.rerun()
+
+# --- FUNÇÕES IA ---
+def gerar_revisao_ia(texto_base, pedido_revisao, autor, tipo_doc, streaming=False, forcar=False):
+    # Pedido que fala só de algumas seções: a IA recebe e devolve só elas (ver secoes.py)
+    partes = dividir(texto_base, camara.plenario)
+    alvo = secoes_afetadas(pedido_revisao) if partes else None
+    if alvo:
+        completo = estimar_tokens(prompt_revisao_completa(texto_base, pedido_revisao, autor, tipo_doc)) + estimar_tokens(texto_base)
+        # data e assinatura saem de novo do modelo local (com a data de hoje), sem passar pela IA
+        fixas = secoes_fixas(autor, tipo_doc, camara)
+        locais = {nome: fixas[nome] for nome in alvo if nome in SECOES_LOCAIS}
+        alvo = [nome for nome in alvo if nome not in SECOES_LOCAIS]
+        if not alvo:
+            metricas.registrar_economia(list(locais), completo)
+            return ResultadoIA(texto=juntar(partes, locais), secoes=tuple(locais), tokens_economizados=completo)
+        prompt = prompt_parcial(partes, alvo, pedido_revisao, autor, tipo_doc, camara)
+        resultado = completar(cadeia_ia, prompt, 0.3, config_ia, cache_ia, forcar, limitador_ia, metricas)
+        if not resultado.ok: return resultado
+        novas = ler_resposta(resultado.texto, alvo)
+        if novas:
+            economia = max(0, completo - estimar_tokens(prompt) - estimar_tokens(resultado.texto))
+            metricas.registrar_economia(alvo + list(locais), economia)
+            resultado.texto = juntar(partes, {**novas, **locais})
+            resultado.secoes = tuple(alvo) + tuple(locais)
+            resultado.tokens_economizados = economia
+            return resultado
+        # resposta fora do formato combinado: refaz com a reescrita completa
+    prompt = prompt_revisao_completa(texto_base, pedido_revisao, autor, tipo_doc)
+    if streaming: return transmitir(cadeia_ia, prompt, 0.3, config_ia, cache_ia, forcar, limitador_ia, metricas)
+    return completar(cadeia_ia, prompt, 0.3, config_ia, cache_ia, forcar, limitador_ia, metricas)
+
+def prompt_revisao_completa(texto_base, pedido_revisao, autor, tipo_doc):
+    return camara.prompt("revisao", autor=autor, tipo_doc=tipo_doc, pedido=pedido_revisao, texto=texto_base)
+
+def gerar_documento_ia(autor, tipo_doc, assunto, streaming=False, forcar=False):
     regras = ""
     if tipo_doc == "Projeto de Lei":
         regras = """
@@ -127,59 +375,522 @@ def gerar_documento_ia(autor, tipo_doc, assunto):
     else:
         regras = """
         ESTRUTURA DE TEXTO CORRIDO (Para Indicações/Pedidos):
-        1. Inicie com: 'O Vereador que este subscreve, no uso de suas atribuições legais e regimentais...'
+        1. Comece direto pelo conteúdo do pedido (ex.: 'Solicita ao Poder Executivo...'), sem identificar o vereador.
         2. Texto corrido, sem artigos.
         3. Seja direto na solicitação.
         """
 
 
-    prompt = f"""
-    Atue como um Procurador Jurídico Sênior da Câmara Municipal de Espumoso/RS.
-    Redija minuta de {tipo_doc} com alto rigor técnico e seja formal.
-    AUTOR: {autor}. 
-    ASSUNTO: {assunto}.
-    
-    ESTRUTURA OBRIGATÓRIA:
-    1. CABEÇALHO: "EXCELENTÍSSIMO SENHOR PRESIDENTE..."
-    2. PREÂMBULO: "{autor}, integrante da Bancada [Extrair Partido], no uso de suas atribuições legais e regimentais, submete à apreciação do Plenário o seguinte {tipo_doc.upper()}:"
-    3. EMENTA: (Caixa alta, resumo. Revise a ortografia).
-    4. TEXTO (AQUI ENTRAM OS ARTIGOS OU O PEDIDO): {regras}
-    5. JUSTIFICATIVA (SOMENTE DEPOIS DO TEXTO DA LEI): 
-    Título 'JUSTIFICATIVA' (em negrito). Escreva um texto dissertativo-argumentativo formal defendendo a proposta. Foque na relevância social, jurídica e no interesse público
-    6. FECHAMENTO: "Plenário Agostinho Somavilla, [Data]." Assinatura.
-    
-    IMPORTANTE: Adicione DUAS LINHAS EM BRANCO entre seções para facilitar leitura no celular.
-    PROIBIDO: Não gere NENHUMA tag HTML, CSS ou formatação de código. Apenas texto puro.
+    # Cabeçalho, preâmbulo e fechamento vêm prontos de modelos.py; a IA escreve só as três seções do prompt
+    prompt = camara.prompt("documento", tipo_doc=tipo_doc, autor=autor, assunto=assunto, regras=regras)
+    fixas = secoes_fixas(autor, tipo_doc, camara)
+    if streaming: return transmitir(cadeia_ia, prompt, 0.2, config_ia, cache_ia, forcar, limitador_ia, metricas).transformar(lambda pedacos: montar_minuta(pedacos, fixas))
+    resultado = completar(cadeia_ia, prompt, 0.2, config_ia, cache_ia, forcar, limitador_ia, metricas)
+    if resultado.ok: resultado.texto = minuta_completa(resultado.texto, fixas)
+    return resultado
+
+def chave_envio(*pedido):
+    """Chave de idempotência: o mesmo pedido repetido na sessão (duplo clique, reenvio) tem a mesma chave."""
+    bruto = json.dumps([camara.id, st.session_state["id_sessao"], *pedido], ensure_ascii=False, default=str)
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+def enviar_geracao(acao, funcao, *args, forcar=False, **contexto):
+    """Coloca a geração na fila da IA; a sessão guarda só o ID da tarefa.
+
+    Um pedido repetido reaproveita a tarefa que ainda está rodando ou que já
+    terminou bem (com "forçar nova", só a que está rodando).
     """
-    try:
-        chat = client.chat.completions.create(messages=[{"role": "user", "content": prompt}], model="llama-3.3-70b-versatile", temperature=0.2)
-        return chat.choices[0].message.content
-    except Exception as e: return f"Erro IA: {e}"
+    id_tarefa = fila_ia.enviar(lambda: funcao(*args, streaming=streaming_ia, forcar=forcar),
+                               chave=chave_envio(acao, *args), reaproveitar_concluida=not forcar)
+    st.session_state['tarefa_ia'] = {"id": id_tarefa, "acao": acao, **contexto}
+
+# Dados da proposição que cada geração da sessão já guardou, para um pedido repetido voltar a ela sem gravar de novo
+CAMPOS_PROPOSICAO = ['prop_id', 'prop_ver', 'tipo_atual', 'assunto_atual']
+
+def concluir_geracao(contexto, texto, modelo=""):
+    """Guarda no histórico uma geração que terminou sem erro."""
+    concluidas = st.session_state.setdefault('geracoes_concluidas', {})
+    if contexto["id"] in concluidas:
+        st.session_state.update(concluidas[contexto["id"]])
+        st.session_state['minuta_pronta'] = versoes_proposicao(st.session_state['prop_id']).get(st.session_state['prop_ver'], texto)
+        return
+    if contexto["acao"] == "documento":
+        prop_id = novo_id(camara.pasta)
+        st.session_state['prop_id'] = prop_id
+        st.session_state['prop_ver'] = 1
+        st.session_state['tipo_atual'] = contexto["tipo"]
+        st.session_state['assunto_atual'] = contexto["assunto"]
+    else:
+        st.session_state['prop_ver'] += 1
+    st.session_state['minuta_pronta'] = texto
+    salvar_historico(contexto["autor"], st.session_state['tipo_atual'], st.session_state['assunto_atual'], texto, st.session_state['prop_id'], st.session_state['prop_ver'], modelo)
+    concluidas[contexto["id"]] = {campo: st.session_state[campo] for campo in CAMPOS_PROPOSICAO}
+
+@st.fragment(run_every=1)
+def acompanhar_geracao():
+    """Consulta a tarefa da sessão a cada segundo, sem rodar a página inteira."""
+    contexto = st.session_state.get('tarefa_ia')
+    if not contexto: return
+    tarefa = fila_ia.consultar(contexto["id"])
+    if tarefa is None:
+        del st.session_state['tarefa_ia']
+        st.session_state['erro_ia'] = ("A geração foi perdida (o servidor reiniciou).", "")
+        st.rerun()
+    if not tarefa.terminou:
+        posicao = fila_ia.posicao(tarefa.id)
+        if posicao: st.info(f"⏳ Aguardando na fila da IA (posição {posicao})...")
+        else: st.info("✍️ Redigindo...")
+        if tarefa.parcial:
+            st.subheader("Minuta Gerada:")
+            st.markdown(tarefa.parcial)
+        return
+    del st.session_state['tarefa_ia']
+    if tarefa.resultado.ok:
+        concluir_geracao(contexto, tarefa.resultado.texto, tarefa.resultado.modelo)
+        if tarefa.resultado.secoes:
+            nomes = ", ".join(NOMES_SECOES[n] for n in tarefa.resultado.secoes)
+            st.session_state['aviso_revisao'] = f"✂️ Revisão parcial ({nomes}): cerca de {tarefa.resultado.tokens_economizados} tokens a menos que a reescrita completa."
+    else:
+        st.session_state['erro_ia'] = (tarefa.resultado.erro, tarefa.parcial)
+    st.rerun()
+
+def exibir_erro_geracao():
+    if 'erro_ia' not in st.session_state: return
+    erro, parcial = st.session_state.pop('erro_ia')
+    st.error(f"{erro} — o texto não foi salvo no histórico. Tente novamente.")
+    if parcial:
+        with st.expander("Ver texto parcial recebido"):
+            st.text(parcial)
+
+# --- ELABORAÇÃO EM LOTE (ASSESSORIA JURÍDICA) ---
+COLUNAS_LOTE = ["autor", "tipo_doc", "assunto"]
+
+def validar_item_lote(item):
+    if item["autor"] not in LISTA_VEREADORES: return f"Autor desconhecido: {item['autor']}"
+    if item["tipo_doc"] not in TIPOS_DOCUMENTO: return f"Tipo inválido: {item['tipo_doc']}"
+    if not item["assunto"].strip(): return "Assunto vazio"
+    return ""
+
+def assunto_da_ideia(registro):
+    partes = [str(registro.get("Ideia") or "").strip()]
+    if registro.get("Contribuição"): partes.append(f"Contribuição para a comunidade: {registro['Contribuição']}")
+    if registro.get("Localização"): partes.append(f"Localização: {registro['Localização']}")
+    return "\n".join(partes)
+
+def elaborar_item_lote(item, prop_id):
+    """Roda num trabalhador da fila: gera a minuta e já grava no histórico."""
+    resultado = gerar_documento_ia(item["autor"], item["tipo_doc"], item["assunto"])
+    if resultado.ok:
+        salvar_historico(item["autor"], item["tipo_doc"], item["assunto"], resultado.texto, prop_id, 1, resultado.modelo)
+    return resultado
+
+def enviar_lote(itens):
+    """Cada item vira uma tarefa na fila do lote, com o próprio ID de proposição.
+
+    O mesmo lote enviado de novo na sessão volta a ser acompanhado, sem gerar outra vez.
+    """
+    enviados = st.session_state.setdefault('lotes_enviados', {})
+    chave = chave_envio("lote", itens)
+    if chave not in enviados:
+        lote = []
+        for item, prop_id in zip(itens, novos_ids(len(itens), camara.pasta)):
+            id_tarefa = fila_lote.enviar(lambda item=item, prop_id=prop_id: elaborar_item_lote(item, prop_id))
+            lote.append({**item, "prop_id": prop_id, "id_tarefa": id_tarefa})
+        enviados[chave] = lote
+    st.session_state['lote_ia'] = enviados[chave]
+
+def situacao_item_lote(item):
+    """(terminou, situação, erro) de um item do lote."""
+    tarefa = fila_lote.consultar(item["id_tarefa"])
+    if tarefa is None: return True, "❌ Falhou", "Tarefa perdida (o servidor reiniciou)."
+    if not tarefa.terminou:
+        return False, ("⏳ Na fila" if fila_lote.posicao(tarefa.id) else "✍️ Redigindo"), ""
+    if tarefa.resultado.ok: return True, "✅ Salva", ""
+    return True, "❌ Falhou", tarefa.resultado.erro
+
+@st.fragment(run_every=2)
+def acompanhar_lote():
+    lote = st.session_state.get('lote_ia')
+    if not lote: return
+    linhas, falhas, prontos = [], [], 0
+    for item in lote:
+        terminou, situacao, erro = situacao_item_lote(item)
+        prontos += terminou
+        if erro: falhas.append(item)
+        linhas.append({"ID": item["prop_id"], "Autor": item["autor"], "Tipo": item["tipo_doc"],
+                       "Assunto": item["assunto"][:80], "Situação": situacao, "Erro": erro})
+    st.progress(prontos / len(lote), text=f"{prontos} de {len(lote)} concluídas · {len(falhas)} com falha")
+    st.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True)
+    if prontos < len(lote): return
+    c1, c2 = st.columns(2)
+    with c1:
+        if falhas and st.button(f"🔁 Tentar de novo as {len(falhas)} que falharam", use_container_width=True):
+            for item in falhas:
+                item["id_tarefa"] = fila_lote.enviar(lambda item=item: elaborar_item_lote(item, item["prop_id"]))
+            st.rerun()
+    with c2:
+        if st.button("🧹 Limpar lote", use_container_width=True):
+            del st.session_state['lote_ia']; st.rerun(scope="app")
+
+@st.fragment
+def tela_elaborar_lote():
+    st.header("📦 Elaboração em Lote")
+    st.caption("Gera várias minutas de uma vez. Cada uma é salva no histórico com o seu próprio ID; as falhas podem ser repetidas no final.")
+    em_andamento = 'lote_ia' in st.session_state
+    origem = st.radio("Origem dos pedidos:", ["Banco de Ideias", "Arquivo CSV"], horizontal=True)
+    itens = []
+    if origem == "Banco de Ideias":
+        if repo_ideias.existe():
+            tipo_lote = st.selectbox("Tipo dos documentos:", TIPOS_DOCUMENTO, key="tipo_lote")
+            colunas = ["Data", "Ideia", "Contribuição", "Localização", "Vereador Destino"]
+            ideias = carregar_ideias().reindex(columns=colunas).fillna("")
+            ideias.insert(0, "Selecionar", False)
+            selecao = st.data_editor(ideias, disabled=colunas, hide_index=True, use_container_width=True, key="selecao_lote")
+            st.caption("O autor de cada minuta é o vereador para quem a ideia foi enviada.")
+            itens = [{"autor": r["Vereador Destino"], "tipo_doc": tipo_lote, "assunto": assunto_da_ideia(r)}
+                     for r in selecao[selecao["Selecionar"]].to_dict("records")]
+        else:
+            st.info("Nenhuma ideia registrada ainda.")
+    else:
+        arquivo = st.file_uploader("CSV com as colunas autor, tipo_doc, assunto:", type="csv")
+        if arquivo is not None:
+            df_lote = pd.read_csv(arquivo, dtype=str).fillna("")
+            faltando = [c for c in COLUNAS_LOTE if c not in df_lote.columns]
+            if faltando:
+                st.error(f"Colunas ausentes no arquivo: {', '.join(faltando)}")
+            else:
+                itens = df_lote[COLUNAS_LOTE].to_dict("records")
+    invalidos = [(n, erro) for n, erro in enumerate((validar_item_lote(i) for i in itens), start=1) if erro]
+    if invalidos:
+        st.warning("Linhas ignoradas:\n" + "\n".join(f"- Linha {n}: {erro}" for n, erro in invalidos))
+        itens = [i for i in itens if not validar_item_lote(i)]
+    if st.button(f"📝 Elaborar {len(itens)} documento(s)", disabled=em_andamento or not itens, type="primary"):
+        enviar_lote(itens); st.rerun()
+
+# --- ÁREA DO VEREADOR: FRAGMENTOS ---
+# Cada parte da área restrita é um st.fragment: clicar num widget roda de novo
+# só aquela parte, não a página inteira (barra lateral, outras abas). Ações que
+# mudam outra parte (ex.: abrir uma proposição pela busca) pedem st.rerun() da
+# página; as demais ficam no próprio fragmento. Fragmentos não são aninhados:
+# acompanhar_geracao() e acompanhar_lote() são chamados fora deles.
+@st.fragment
+def area_elaboracao(autor_sessao):
+    st.header("Elaboração de Documentos")
+
+    if autor_sessao in LISTA_JURIDICO:
+        st.info("Modo Jurídico: Selecione o autor.")
+        autor_selecionado = st.selectbox("Autor:", LISTA_VEREADORES, key="autor_proposicao")
+    else:
+        autor_selecionado = st.selectbox("Autor:", [autor_sessao], disabled=True, key="autor_proposicao")
+
+    grupos_ideias = grupos_de_ideias(None if autor_sessao in LISTA_JURIDICO else autor_sessao)
+    if grupos_ideias:
+        with st.expander(f"💡 Pedidos repetidos no Banco de Ideias ({len(grupos_ideias)})"):
+            st.caption("Ideias parecidas enviadas por vários cidadãos. Use um grupo como base de uma única proposição.")
+            for grupo in grupos_ideias:
+                exemplo = grupo["ideias"][0]
+                st.markdown(f"**{grupo['total']}×** {exemplo.get('Ideia', '')}")
+                if exemplo.get("Localização"): st.caption(f"📍 {exemplo['Localização']}")
+                st.button("Usar como proposição", key=f"grupo_{grupo['grupo']}",
+                          on_click=lambda g=grupo: st.session_state.update(assunto_proposicao=assunto_do_grupo(g)))
+
+    tipo_doc = st.selectbox("Tipo:", TIPOS_DOCUMENTO)
+    if tipo_doc == "Projeto de Lei": st.warning("⚠️ Cuidado com Vício de Iniciativa: O Assistente tentará elaborar evitando vícios, porém, a responsabilidade pela análise, correção, adequação formal e constitucionalidade final é integralmente do Vereador(a) autor e de sua assessoria.")
+    texto_input = st.text_area("Escreva aqui qual a sua ideia ou qual o problema e como imagina a solução, quanto mais detalhes, melhor:", height=150, key="assunto_proposicao")
+    forcar_nova = st.checkbox("🔄 Gerar novamente do zero (ignorar minuta já gerada para o mesmo pedido)")
+
+    gerando = 'tarefa_ia' in st.session_state
+    if st.button("📝 Elaborar", disabled=gerando):
+        if texto_input:
+            enviar_geracao("documento", gerar_documento_ia, autor_selecionado, tipo_doc, texto_input, forcar=forcar_nova, autor=autor_selecionado, tipo=tipo_doc, assunto=texto_input)
+            st.rerun()
+
+@st.fragment
+def area_minuta(autor_sessao):
+    st.error("🚨 AVISO LEGAL: Este texto é uma sugestão preliminar gerada por Inteligência Artificial (IA) e pode conter erros. Não possui validade jurídica. A responsabilidade pela análise, correção, adequação formal e constitucionalidade final é integralmente do Vereador(a) autor e de sua assessoria.")
+    st.subheader("Minuta Gerada:")
+
+    st.text_area("Texto Final:", value=st.session_state['minuta_pronta'], height=800)
+    st.info("💡 Selecione todo o texto acima e copie manualmente.")
+
+    if camara.protocolo.get("url"):
+        st.link_button(f"🌐 Ir para {camara.protocolo.get('nome', 'o protocolo')}", camara.protocolo["url"], type="primary", use_container_width=True)
+
+    # --- ÁREA DE REVISÃO E HISTÓRICO ---
+
+    st.markdown("---")
+    st.subheader("🔄 Revisão e Histórico")
+    if 'aviso_revisao' in st.session_state: st.caption(st.session_state.pop('aviso_revisao'))
+    autor_selecionado = st.session_state.get("autor_proposicao", autor_sessao)
+    gerando = 'tarefa_ia' in st.session_state
+    with st.form("revisao"):
+        msg_rev = st.text_input("O que melhorar? Peça uma revisão ou melhoria. Ex: 'Aumente a justificativa', 'Mude a ementa', 'Melhore a linguagem' ")
+        forcar_rev = st.checkbox("🔄 Gerar novamente do zero")
+        if st.form_submit_button("🔁 Revisar/Refazer", disabled=gerando):
+            enviar_geracao("revisao", gerar_revisao_ia, st.session_state['minuta_pronta'], msg_rev, autor_selecionado, st.session_state['tipo_atual'], forcar=forcar_rev, autor=autor_selecionado)
+            st.rerun()
+
+@st.fragment
+def historico_proposicao():
+    with st.expander("Histórico"):
+        if repo_historico.existe():
+            versoes = versoes_proposicao(st.session_state['prop_id'])
+            modelos = modelos_proposicao(st.session_state['prop_id'])
+            for num in sorted(versoes, reverse=True):
+                rotulo = f"Carregar V{num}" + (f" · {modelos[num]}" if modelos.get(num) else "")
+                if st.button(rotulo, key=f"hist_{num}"):
+                    st.session_state['minuta_pronta'] = versoes[num]
+                    st.rerun()
+
+            if len(versoes) > 1:
+                st.markdown("**Comparar versões**")
+                numeros = sorted(versoes)
+                ca, cb = st.columns(2)
+                with ca: va = st.selectbox("De:", numeros, index=len(numeros) - 2, format_func=lambda n: f"V{n}", key="comp_a")
+                with cb: vb = st.selectbox("Para:", numeros, index=len(numeros) - 1, format_func=lambda n: f"V{n}", key="comp_b")
+                st.markdown(comparar_html(versoes[va], versoes[vb], f"V{va}", f"V{vb}"), unsafe_allow_html=True)
+
+@st.fragment
+def gerenciar_mural(autor_sessao):
+    st.header("📢 Gerenciar Mural")
+    with st.form("post"):
+        if autor_sessao in LISTA_JURIDICO:
+            autor_post = st.selectbox("Autor:", LISTA_VEREADORES)
+        else:
+            autor_post = st.selectbox("Autor:", [autor_sessao], disabled=True)
+
+        titulo = st.text_input("Título")
+        msg = st.text_area("Mensagem")
+        if st.form_submit_button("Publicar no Mural"):
+            salvar_post_mural({"Data": obter_data_hora_atual(), "Vereador": autor_post, "Titulo": titulo, "Mensagem": msg})
+            st.success("Publicado!"); st.rerun(scope="fragment")
+
+    st.divider()
+    st.subheader("🗑️ Editar/Excluir")
+
+    if repo_mural.existe():
+        # Filtro: Se for Jurídico vê tudo, se não, vê só o seu
+        filtro_mural = None if autor_sessao in LISTA_JURIDICO else {"Vereador": autor_sessao}
+        df_filter, chave_editor = tabela_do_editor("editor_mural", repo_mural, filtro_mural)
+
+        st.data_editor(df_filter, num_rows="dynamic", key=chave_editor, use_container_width=True, column_config={"_id": None, "Data": COLUNA_DATA})
+
+        c1, c2 = st.columns(2)
+        with c1:
+            if st.button("💾 Salvar Alterações Mural"):
+                # Só as linhas alteradas são gravadas; os posts dos outros não são tocados
+                conflitos = salvar_editor("editor_mural", repo_mural, chave_editor, filtro_mural)
+                if conflitos:
+                    avisar_conflitos(conflitos)
+                else:
+                    st.success("Salvo com sucesso!")
+                    st.rerun(scope="fragment")
+        with c2:
+            if st.button("🔄 Recarregar", key="recarregar_mural"):
+                recarregar_editor("editor_mural"); st.rerun(scope="fragment")
+    else:
+        st.info("Mural vazio.")
+
+@st.fragment
+def buscar_documentos(autor_sessao):
+    st.header("🔎 Buscar Proposições e Ideias")
+    if 'aviso_busca' in st.session_state: st.success(st.session_state.pop('aviso_busca'))
+    consulta = st.text_input("Palavras para buscar (ex.: iluminação, quebra-molas, Rua X):")
+    onde = st.radio("Onde buscar:", ["Tudo", "Proposições", "Banco de Ideias"], horizontal=True)
+    if consulta:
+        tipo_busca = {"Proposições": "proposicao", "Banco de Ideias": "ideia"}.get(onde)
+        # Vereadores veem só as próprias proposições e as ideias enviadas a eles (filtro no índice, antes do limite)
+        vereador = None if autor_sessao in LISTA_JURIDICO else autor_sessao
+        resultados = indice_busca.buscar(consulta, tipo_busca, limite=20, vereador=vereador)
+        if not resultados: st.info("Nada encontrado.")
+        for r in resultados:
+            d = r["dados"]
+            with st.container(border=True):
+                if r["tipo"] == "proposicao":
+                    st.markdown(f"**📄 {d['TIPO_DOC']}** — {d['VEREADOR']}")
+                    st.caption(f"🗓️ {formatar_momento(d['DATA_HORA'])} · Versão {d['VERSAO_NUM']}")
+                    st.write(d["ASSUNTO"])
+                    if st.button("Abrir para revisar", key=f"abrir_{r['chave']}"):
+                        linhas = linhas_historico(d["ID_PROPOSICAO"])
+                        st.session_state['minuta_pronta'] = remontar_versao(linhas, d["VERSAO_NUM"])
+                        st.session_state['prop_id'] = d["ID_PROPOSICAO"]
+                        st.session_state['prop_ver'] = d["VERSAO_NUM"]
+                        st.session_state['tipo_atual'] = d["TIPO_DOC"]
+                        st.session_state['assunto_atual'] = d["ASSUNTO"]
+                        st.session_state['aviso_busca'] = "Proposição aberta na aba ⚖️ Elaborar Proposições."
+                        st.rerun()
+                else:
+                    st.markdown(f"**💡 Ideia** — para {d.get('Vereador Destino', '')}")
+                    st.caption(f"🗓️ {formatar_momento(d.get('Data'))} · 📍 {d.get('Localização', '')}")
+                    st.write(d.get("Ideia", ""))
+                    if d.get("Contribuição"): st.caption(d["Contribuição"])
+
+# --- ÁREA ADMINISTRATIVA: FRAGMENTOS ---
+@st.fragment
+def admin_ideias():
+    st.subheader("Ideias Recebidas")
+    st.caption("📝 Para apagar uma linha: Selecione-a e aperte DELETE no teclado. Depois clique em SALVAR.")
+
+    if repo_ideias.existe():
+        df, chave_editor = tabela_do_editor("editor_ideias_admin", repo_ideias)
+
+        # Tabela Editável
+        st.data_editor(
+            df, 
+            num_rows="dynamic", 
+            key=chave_editor, 
+            use_container_width=True,
+            column_config={"_id": None, "Data": COLUNA_DATA}
+        )
+
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            if st.button("💾 Salvar Alterações na Tabela", use_container_width=True):
+                conflitos = salvar_editor("editor_ideias_admin", repo_ideias, chave_editor, ao_salvar=reindexar_ideias_editadas)
+                if conflitos:
+                    avisar_conflitos(conflitos)
+                else:
+                    st.success("Tabela atualizada com sucesso!")
+                    st.rerun(scope="fragment")
+        with c2:
+            if st.button("🔄 Recarregar", key="recarregar_ideias", use_container_width=True):
+                recarregar_editor("editor_ideias_admin"); st.rerun(scope="fragment")
+        with c3:
+            exportacao_sob_demanda("exportacao_ideias", "📥 Baixar CSV", lambda: exportar(repo_ideias, "ideias", "CSV"))
+    else:
+        st.info("Nenhuma ideia registrada ainda.")
+
+@st.fragment
+def admin_ideias_repetidas():
+    st.subheader("Ideias Repetidas")
+    st.caption("Sugestões parecidas (mesmo problema, mesmo local) agrupadas automaticamente.")
+    grupos_ideias = grupos_de_ideias()
+    if grupos_ideias:
+        st.metric("Grupos com mais de uma ideia", len(grupos_ideias))
+        for grupo in grupos_ideias:
+            exemplo = grupo["ideias"][0]
+            with st.expander(f"{grupo['total']}× — {str(exemplo.get('Ideia', ''))[:80]}"):
+                df_grupo = pd.DataFrame(grupo["ideias"]).reindex(columns=["Data", "Nome", "Ideia", "Localização", "Vereador Destino"])
+                df_grupo["Data"] = df_grupo["Data"].map(formatar_momento)
+                st.dataframe(df_grupo, use_container_width=True, hide_index=True)
+    else:
+        st.info("Nenhuma ideia repetida até agora.")
+
+@st.fragment
+def admin_logs():
+    st.subheader("Histórico de Acessos (Vereadores)")
+    st.caption("Registro de quem acessou a área restrita e quando.")
+
+    if repo_logs.existe():
+        # Resumo vem das contagens já prontas, sem ler o histórico bruto
+        resumo = repo_logs.resumo()
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Total de acessos", int(resumo["Total"].sum()))
+        m2.metric("Usuários diferentes", resumo["Usuario"].nunique())
+        m3.metric("Dias com acesso", resumo["Dia"].nunique())
+
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("**Acessos por usuário**")
+            st.dataframe(resumo.groupby("Usuario")["Total"].sum().sort_values(ascending=False), use_container_width=True)
+        with c2:
+            st.markdown("**Acessos por dia**")
+            st.bar_chart(resumo.groupby("Dia")["Total"].sum())
+
+        st.markdown("---")
+        hoje = datetime.now(pytz.timezone('America/Sao_Paulo')).date()
+        periodo = st.date_input("Período:", value=(hoje - timedelta(days=30), hoje), format="DD/MM/YYYY")
+        if len(periodo) == 2:
+            # Só as partições (meses) do período são lidas
+            df_logs = repo_logs.buscar_periodo(periodo[0], periodo[1])
+            st.dataframe(formatar_momentos(df_logs, "%d/%m/%Y %H:%M:%S"), use_container_width=True)
+
+            exportacao_sob_demanda("exportacao_logs", "📥 Baixar Log de Acessos",
+                                   lambda: exportar(repo_logs, "logs", "CSV", periodo[0], periodo[1]))
+    else:
+        st.info("Nenhum acesso registrado ainda.")
+
+@st.fragment
+def admin_exportar():
+    st.subheader("Exportar Dados")
+    st.caption("Os arquivos são montados só quando você pede, lendo as tabelas em partes.")
+    tabela = st.selectbox("Tabela:", list(EXPORTAVEIS), format_func=NOMES_TABELAS.get, key="tabela_exportacao")
+    inicio = fim = None
+    if st.checkbox("Filtrar por período", key="filtrar_periodo_exportacao"):
+        hoje = datetime.now(pytz.timezone('America/Sao_Paulo')).date()
+        periodo = st.date_input("Período:", value=(hoje - timedelta(days=30), hoje), format="DD/MM/YYYY", key="periodo_exportacao")
+        if len(periodo) == 2: inicio, fim = periodo
+    vereador = st.selectbox("Vereador:", ["Todos"] + (LISTA_LOGIN if tabela == "logs" else LISTA_VEREADORES), key="vereador_exportacao")
+    formatos = formatos_disponiveis()
+    formato = st.radio("Formato:", formatos, horizontal=True, key="formato_exportacao")
+    if len(formatos) < 4: st.caption("Parquet e Excel aparecem quando os pacotes pyarrow e xlsxwriter (ou openpyxl) estão instalados.")
+    exportacao_sob_demanda("exportacao_tabela", "⚙️ Gerar arquivo",
+                           lambda: exportar(repos[tabela], tabela, formato, inicio, fim, None if vereador == "Todos" else vereador))
+
+    st.markdown("---")
+    st.markdown("**Arquivo completo**")
+    st.caption("As quatro tabelas em CSV, num único .zip (no histórico, cada revisão vai com o texto completo da minuta).")
+    exportacao_sob_demanda("exportacao_completa", "🗄️ Gerar arquivo completo (.zip)", lambda: arquivo_completo(repos))
+
+@st.fragment
+def admin_desempenho():
+    st.subheader("Desempenho do Sistema")
+    if not metricas.ativo:
+        st.info("Métricas desligadas. Ligue com METRICAS = true nos secrets e reinicie o app.")
+    else:
+        sessao = metricas.percentis_sessao(st.session_state["id_sessao"])
+        processo = metricas.percentis("execucao").get(("execucao", "total"), {"contagem": 0, "p50": 0, "p95": 0})
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Reruns (processo)", processo["contagem"])
+        m2.metric("p50 / p95 (processo)", f"{processo['p50']:.0f} / {processo['p95']:.0f} ms")
+        m3.metric("p50 / p95 (esta sessão)", f"{sessao['p50']:.0f} / {sessao['p95']:.0f} ms")
+        tokens = metricas.tokens()
+        m4.metric("Tokens da IA (prompt / resposta)", f"{tokens['prompt']} / {tokens['resposta']}")
+
+        st.markdown("**Reruns mais lentos (recentes)**")
+        lentas = metricas.mais_lentas()
+        if lentas:
+            st.dataframe(pd.DataFrame([{
+                "Quando": datetime.fromtimestamp(e["quando"], pytz.timezone('America/Sao_Paulo')).strftime("%d/%m %H:%M:%S"),
+                "Sessão": e["sessao"], "Total (ms)": e["total_ms"], "Armazenamento (ms)": e["armazenamento_ms"],
+                "Etapas": ", ".join(f"{n} {ms:.0f}" for n, ms in sorted(e["etapas"].items(), key=lambda i: -i[1])),
+            } for e in lentas]), use_container_width=True, hide_index=True)
+
+        st.markdown("**Percentis por etapa, armazenamento e IA (ms)**")
+        st.dataframe(pd.DataFrame([{"Tipo": tipo, "Nome": nome, **valores} for (tipo, nome), valores in sorted(metricas.percentis().items())]).round(1),
+                     use_container_width=True, hide_index=True)
+        st.download_button("📥 Métricas (formato Prometheus)", data=metricas.texto_prometheus().encode("utf-8"),
+                           file_name="metricas.prom", mime="text/plain")
 
 # --- NOVA FUNÇÃO: REGISTRAR LOG ---
 def registrar_log(usuario, acao):
     """Salva um registro de quem entrou e que horas."""
-    if not os.path.exists(arquivo_logs):
-        df = pd.DataFrame(columns=["Data_Hora", "Usuario", "Acao"])
-    else:
-        df = pd.read_csv(arquivo_logs)
-    
-    novo_log = pd.DataFrame([{
+    repo_logs.inserir({
         "Data_Hora": obter_data_hora_atual(),
         "Usuario": usuario,
         "Acao": acao
-    }])
-    df = pd.concat([df, novo_log], ignore_index=True)
-    df.to_csv(arquivo_logs, index=False)
+    })
 
 # --- MENU LATERAL ---
-if os.path.exists("brasao.png"):
-    st.sidebar.image("brasao.png", width=120)
+LINK_WHATSAPP = camara.whatsapp
+BOTAO_WHATSAPP = f"""<a href="{LINK_WHATSAPP}" target="_blank" style="text-decoration: none;"><div style="background-color: #128C7E; color: white; padding: 12px; border-radius: 8px; text-align: center; font-weight: bold; font-family: sans-serif; margin-bottom: 10px; box-shadow: 0px 2px 5px rgba(0,0,0,0.2);">💬 Falar no WhatsApp</div></a>"""
+
+@st.cache_resource
+def ler_brasao(caminho):
+    """Bytes do brasão, lidos do disco uma vez por processo (None se não houver)."""
+    if not caminho or not os.path.exists(caminho): return None
+    with open(caminho, "rb") as f:
+        return f.read()
+
+metricas.etapa("barra_lateral")
+brasao = ler_brasao(camara.brasao)
+if brasao:
+    st.sidebar.image(brasao, width=120)
 
 st.sidebar.title("Legislativo Digital")
-st.sidebar.markdown("**Câmara Municipal de Espumoso**")
-st.sidebar.markdown("Rio Grande do Sul")
-st.sidebar.markdown("[🌐 Site Oficial](https://www.camaraespumoso.rs.gov.br)")
+st.sidebar.markdown(f"**{camara.nome}**")
+if camara.estado: st.sidebar.markdown(camara.estado)
+if camara.site: st.sidebar.markdown(f"[🌐 Site Oficial]({camara.site})")
 st.sidebar.markdown("---")
 
 if "navegacao" not in st.session_state:
@@ -192,12 +903,13 @@ modo = st.sidebar.selectbox(
 )
 
 st.sidebar.markdown("---")
-link_whatsapp = "https://wa.me/555433834488" 
-st.sidebar.markdown(f"""<a href="{link_whatsapp}" target="_blank" style="text-decoration: none;"><div style="background-color: #128C7E; color: white; padding: 12px; border-radius: 8px; text-align: center; font-weight: bold; font-family: sans-serif; margin-bottom: 10px; box-shadow: 0px 2px 5px rgba(0,0,0,0.2);">💬 Falar no WhatsApp</div></a>""", unsafe_allow_html=True)
+if LINK_WHATSAPP: st.sidebar.markdown(BOTAO_WHATSAPP, unsafe_allow_html=True)
 st.sidebar.markdown("---")
 st.sidebar.caption("Desenvolvido por:")
 st.sidebar.markdown("[**Daniel de Oliveira Colvero**](mailto:daniel.colvero@gmail.com)")
-st.sidebar.caption("©2025 Câmara de Espumoso")
+st.sidebar.caption(f"©2025 {camara.nome}")
+
+metricas.etapa(f"modo:{modo}")
 
 # --- TELA: INÍCIO ---
 if modo == "🏠 Início":
@@ -207,7 +919,7 @@ if modo == "🏠 Início":
     st.warning("🚧 **SISTEMA EM FASE DE IMPLEMENTAÇÃO (BETA):** Esta ferramenta está em testes. O conteúdo gerado pela IA é uma sugestão e deve ser revisado antes do uso oficial. Reporte eventuais erros à Secretaria.")
     # --------------------------------------------
     
-    st.write("Bem-vindo ao ambiente digital do Poder Legislativo de Espumoso!")
+    st.write(f"Bem-vindo ao ambiente digital do Poder Legislativo de {camara.municipio}!")
     st.divider()
 
     def ir_para_assistente(): st.session_state.navegacao = "🔐 Área do Vereador"
@@ -240,12 +952,11 @@ if modo == "🏠 Início":
     st.markdown("### Acompanhe-nos nas Redes Sociais")
     
     estilo = "text-decoration:none;color:#FAFAFA;"
-    cf, ci, cy, cd, cs = st.columns(5)
-    with cf: st.markdown(f'<a href="https://facebook.com/camaraespumoso" style="{estilo}">📘 Facebook</a>', unsafe_allow_html=True)
-    with ci: st.markdown(f'<a href="https://instagram.com/camaraespumoso" style="{estilo}">📸 Instagram</a>', unsafe_allow_html=True)
-    with cy: st.markdown(f'<a href="https://youtube.com/camaraespumoso" style="{estilo}">▶️ YouTube</a>', unsafe_allow_html=True)
-    with cd: st.markdown(f'<a href="https://discord.gg/a7dGZJUx" style="{estilo}">💬 Discord</a>', unsafe_allow_html=True)
-    with cs: st.markdown(f'<a href="https://www.camaraespumoso.rs.gov.br" style="{estilo}">🌐 Site Oficial</a>', unsafe_allow_html=True)
+    rotulos = {"facebook": "📘 Facebook", "instagram": "📸 Instagram", "youtube": "▶️ YouTube", "discord": "💬 Discord"}
+    links = [(rotulos.get(rede, rede.capitalize()), url) for rede, url in camara.redes.items()]
+    if camara.site: links.append(("🌐 Site Oficial", camara.site))
+    for coluna, (rotulo, url) in zip(st.columns(max(len(links), 1)), links):
+        with coluna: st.markdown(f'<a href="{url}" style="{estilo}">{rotulo}</a>', unsafe_allow_html=True)
 
 # --- TELA: GABINETE VIRTUAL ---
 elif modo == "👤 Gabinete Virtual":
@@ -258,19 +969,20 @@ elif modo == "👤 Gabinete Virtual":
     if vereador_selecionado == "Selecione...":
         st.divider()
         st.subheader("📢 Feed de Recados")
-        if os.path.exists(arquivo_mural):
-            df_mural = pd.read_csv(arquivo_mural)
+        if repo_mural.existe():
+            df_mural, proximo = pagina_mural("feed_geral")
             if not df_mural.empty:
-                for index, row in df_mural.iloc[::-1].head(10).iterrows():
+                for index, row in df_mural.iterrows():
                     with st.container(border=True):
                         avatar = obter_avatar_simples(row['Vereador'])
                         c1, c2 = st.columns([1, 6])
                         with c1: st.markdown(f"### {avatar}")
                         with c2: 
                             st.markdown(f"**{row['Vereador']}**")
-                            st.caption(f"Publicado em: {row['Data']}")
+                            st.caption(f"Publicado em: {formatar_momento(row['Data'])}")
                         st.markdown(f"#### {row['Titulo']}")
                         st.write(row['Mensagem'])
+                navegar_mural("feed_geral", proximo)
             else: st.info("Sem publicações.")
         else: st.info("Sem publicações.")
     else:
@@ -280,20 +992,20 @@ elif modo == "👤 Gabinete Virtual":
         with c1: st.markdown(f"<div style='font-size:100px;text-align:center;'>{avatar}</div>", unsafe_allow_html=True)
         with c2:
             st.subheader(vereador_selecionado)
-            st.write("Câmara Municipal de Espumoso - RS")
-            st.link_button("💬 WhatsApp", "https://wa.me/555433834488", type="primary")
+            st.write(f"{camara.nome} - {camara.uf}")
+            if camara.whatsapp: st.link_button("💬 WhatsApp", camara.whatsapp, type="primary")
         
         st.divider()
         st.subheader("📰 Mural de Atividades")
-        if os.path.exists(arquivo_mural):
-            df_mural = pd.read_csv(arquivo_mural)
-            posts = df_mural[df_mural["Vereador"] == vereador_selecionado]
+        if repo_mural.existe():
+            posts, proximo = pagina_mural(f"feed_{vereador_selecionado}", vereador_selecionado)
             if not posts.empty:
-                for index, row in posts.iloc[::-1].iterrows():
+                for index, row in posts.iterrows():
                     with st.container(border=True):
-                        st.caption(f"🗓️ {row['Data']}")
+                        st.caption(f"🗓️ {formatar_momento(row['Data'])}")
                         st.markdown(f"### {row['Titulo']}")
                         st.write(row['Mensagem'])
+                navegar_mural(f"feed_{vereador_selecionado}", proximo)
             else: st.info("Sem publicações deste vereador.")
 
 # --- TELA: ÁREA DO VEREADOR (RESTRITA) ---
@@ -310,7 +1022,7 @@ elif modo == "🔐 Área do Vereador":
         senha_digitada = st.text_input("Senha:", type="password")
 
         if st.button("Entrar"):
-          if usuario_identificado != "Selecione..." and senha_digitada == "1955":
+          if usuario_identificado != "Selecione..." and senha_digitada == camara.senhas["vereador"]:
              st.session_state["acesso_vereador"] = True
              st.session_state["vereador_logado"] = usuario_identificado
 
@@ -326,132 +1038,55 @@ elif modo == "🔐 Área do Vereador":
             st.session_state["acesso_vereador"] = False; st.session_state["vereador_logado"] = None; st.rerun()
 
         st.success(f"Logado como: **{autor_sessao}**")
-        tab1, tab2 = st.tabs(["⚖️ Elaborar Proposições", "📢 Gerenciar Mural"])
+        abas = ["⚖️ Elaborar Proposições", "📢 Gerenciar Mural", "🔎 Buscar"]
+        if autor_sessao in LISTA_JURIDICO: abas.append("📦 Elaborar em Lote")
+        tab1, tab2, tab3, *tab_lote = st.tabs(abas)
         
         with tab1:
-            st.header("Elaboração de Documentos")
-            
-            if autor_sessao in LISTA_JURIDICO:
-                st.info("Modo Jurídico: Selecione o autor.")
-                autor_selecionado = st.selectbox("Autor:", LISTA_VEREADORES)
-            else:
-                autor_selecionado = st.selectbox("Autor:", [autor_sessao], disabled=True)
-
-            tipo_doc = st.selectbox("Tipo:", ["Pedido de Providência", "Pedido de Informação", "Indicação", "Projeto de Lei", "Moção"])
-            if tipo_doc == "Projeto de Lei": st.warning("⚠️ Cuidado com Vício de Iniciativa: O Assistente tentará elaborar evitando vícios, porém, a responsabilidade pela análise, correção, adequação formal e constitucionalidade final é integralmente do Vereador(a) autor e de sua assessoria.")
-            texto_input = st.text_area("Escreva aqui qual a sua ideia ou qual o problema e como imagina a solução, quanto mais detalhes, melhor:", height=150)
-            
-            if st.button("📝 Elaborar"):
-                if texto_input:
-                    with st.spinner('Redigindo...'):
-                        texto_final = gerar_documento_ia(autor_selecionado, tipo_doc, texto_input)
-                        st.session_state['minuta_pronta'] = texto_final
-                        prop_id = datetime.now().strftime("%Y%m%d%H%M%S")
-                        st.session_state['prop_id'] = prop_id
-                        st.session_state['prop_ver'] = 1
-                        st.session_state['tipo_atual'] = tipo_doc
-                        st.session_state['assunto_atual'] = texto_input
-                        salvar_historico(autor_selecionado, tipo_doc, texto_input, texto_final, prop_id, 1)
-                        st.rerun()
-            
+            metricas.etapa("aba:elaborar")
+            area_elaboracao(autor_sessao)
+            if 'tarefa_ia' in st.session_state: acompanhar_geracao()
+            exibir_erro_geracao()
             if 'minuta_pronta' in st.session_state:
-                st.error("🚨 AVISO LEGAL: Este texto é uma sugestão preliminar gerada por Inteligência Artificial (IA) e pode conter erros. Não possui validade jurídica. A responsabilidade pela análise, correção, adequação formal e constitucionalidade final é integralmente do Vereador(a) autor e de sua assessoria.")
-                st.subheader("Minuta Gerada:")
-                
-                st.text_area("Texto Final:", value=st.session_state['minuta_pronta'], height=800)
-                st.info("💡 Selecione todo o texto acima e copie manualmente.")
-                
-                st.link_button("🌐 Ir para Softcam", "https://www.camaraespumoso.rs.gov.br/softcam/", type="primary", use_container_width=True)
-                
-                # --- ÁREA DE REVISÃO E HISTÓRICO ---
-                
-                st.markdown("---")
-                st.subheader("🔄 Revisão e Histórico")
-                with st.form("revisao"):
-                    msg_rev = st.text_input("O que melhorar? Peça uma revisão ou melhoria. Ex: 'Aumente a justificativa', 'Mude a ementa', 'Melhore a linguagem' ")
-                    if st.form_submit_button("🔁 Revisar/Refazer"):
-                        nova_minuta = gerar_revisao_ia(st.session_state['minuta_pronta'], msg_rev, autor_selecionado, st.session_state['tipo_atual'])
-                        st.session_state['prop_ver'] += 1
-                        st.session_state['minuta_pronta'] = nova_minuta
-                        salvar_historico(autor_selecionado, st.session_state['tipo_atual'], st.session_state['assunto_atual'], nova_minuta, st.session_state['prop_id'], st.session_state['prop_ver'])
-                        st.rerun()
-            
-                if 'prop_id' in st.session_state:
-                    with st.expander("Histórico"):
-                         if os.path.exists(arquivo_historico):
-                            df_h = pd.read_csv(arquivo_historico)
-                            df_p = df_h[df_h["ID_PROPOSICAO"] == st.session_state['prop_id']].sort_values(by="VERSAO_NUM", ascending=False)
-                            for i, r in df_p.iterrows():
-                                if st.button(f"Carregar V{r['VERSAO_NUM']}", key=f"hist_{r['VERSAO_NUM']}"):
-                                    st.session_state['minuta_pronta'] = r['MINUTA_TEXTO']
-                                    st.rerun()
+                area_minuta(autor_sessao)
+                if 'prop_id' in st.session_state: historico_proposicao()
 
         with tab2:
-            st.header("📢 Gerenciar Mural")
-            with st.form("post"):
-                if autor_sessao in LISTA_JURIDICO:
-                    autor_post = st.selectbox("Autor:", LISTA_VEREADORES)
-                else:
-                    autor_post = st.selectbox("Autor:", [autor_sessao], disabled=True)
-                
-                titulo = st.text_input("Título")
-                msg = st.text_area("Mensagem")
-                if st.form_submit_button("Publicar no Mural"):
-                    salvar_post_mural({"Data": obter_data_hora_atual(), "Vereador": autor_post, "Titulo": titulo, "Mensagem": msg})
-                    st.success("Publicado!"); st.rerun()
-            
-            st.divider()
-            st.subheader("🗑️ Editar/Excluir")
-            
-            if os.path.exists(arquivo_mural):
-                df_full = pd.read_csv(arquivo_mural)
-                
-                # Filtro: Se for Jurídico vê tudo, se não, vê só o seu
-                if autor_sessao in LISTA_JURIDICO:
-                     df_filter = df_full
-                else:
-                     df_filter = df_full[df_full["Vereador"] == autor_sessao]
-                
-                # CORREÇÃO: Capturamos o resultado da edição na variável 'df_edit'
-                df_edit = st.data_editor(df_filter, num_rows="dynamic", key="editor_mural_key", use_container_width=True)
-                
-                if st.button("💾 Salvar Alterações Mural"):
-                    # CORREÇÃO: Usamos 'df_edit' (a tabela pronta) para salvar
-                    if autor_sessao in LISTA_JURIDICO:
-                        df_edit.to_csv(arquivo_mural, index=False)
-                    else:
-                        # Pega os posts dos outros (que não mexemos)
-                        df_others = df_full[df_full["Vereador"] != autor_sessao]
-                        # Junta com os nossos editados
-                        pd.concat([df_others, df_edit]).to_csv(arquivo_mural, index=False)
-                    
-                    st.success("Salvo com sucesso!")
-                    st.rerun()
-            else:
-                st.info("Mural vazio.")
+            metricas.etapa("aba:mural")
+            gerenciar_mural(autor_sessao)
+
+        with tab3:
+            metricas.etapa("aba:buscar")
+            buscar_documentos(autor_sessao)
+
+        if tab_lote:
+            with tab_lote[0]:
+                metricas.etapa("aba:lote")
+                tela_elaborar_lote()
+                if 'lote_ia' in st.session_state: acompanhar_lote()
 
 # --- TELA: BANCO DE IDEIAS ---
 elif modo == "💡 Banco de Ideias":
     def voltar_inicio(): st.session_state.navegacao = "🏠 Início"
     st.button("⬅️ Voltar", on_click=voltar_inicio)
-    st.title("Banco de Ideias - Espumoso/RS"); 
-    st.success("""
-    **Bem-vindo(a) ao Banco de Ideias da Câmara de Espumoso!**
+    st.title(f"Banco de Ideias - {camara.municipio}/{camara.uf}"); 
+    st.success(f"""
+    **Bem-vindo(a) ao Banco de Ideias da {camara.nome}!**
     Este é o seu canal direto para enviar PROPOSTAS e SUGESTÕES CONSTRUTIVAS focadas em melhorar a nossa cidade.
     Se tiver dúvidas, clique na interrogação (?) no canto de cada campo.           
     """)
     
     with st.expander("ℹ️ PARA QUE SERVE ESTE FORMULÁRIO (Clique aqui para ler as instruções)"):
-        st.markdown("""
+        st.markdown(f"""
         Use este espaço para enviar **IDEIAS de competência MUNICIPAL**, tais como:
         * **Sugestões** para novos Projetos de Lei municipais.
         * **Indicações** (Ex: "Pedir a instalação de um quebra-molas na frente da escola Y" ou "Pedir mais horários de ônibus para a localidade Z").
         * **Pedidos de Providência** (Ex: "Solicitar o conserto do buraco na Rua X", "Troca de Lâmpada na Rua Y, "Limpeza de Boca de Lobo"...).
         
-        **IMPORTANTE: FOCO EM ESPUMOSO**
+        **IMPORTANTE: FOCO EM {camara.municipio.upper()}**
         Este formulário **NÃO é o canal** para manifestações gerais sobre política, nem para Reclamações ou Denúncias (para estes, use o canal de Ouvidoria).
         
-        Se você tem uma **IDEIA** ou **SUGESTÃO** para Espumoso, você está no lugar certo!
+        Se você tem uma **IDEIA** ou **SUGESTÃO** para {camara.municipio}, você está no lugar certo!
         """)
 
     if 'sucesso_ideia' not in st.session_state: st.session_state['sucesso_ideia'] = False
@@ -474,9 +1109,9 @@ elif modo == "💡 Banco de Ideias":
         dest = st.selectbox("Enviar sugestão para qual vereador(a)?", ["Escolha um vereador..."] + LISTA_VEREADORES)
 
         st.markdown("### Termos de Uso")
-        st.caption("""
+        st.caption(f"""
         Ao enviar sua sugestão, você concorda que ela será, primeiramente, analisada.
-        Você confirma que sua proposta é uma sugestão construtiva ou ideia focada na melhoria de Espumoso (competência municipal), e não uma reclamação, denúncia ou manifestação sobre assuntos gerais.
+        Você confirma que sua proposta é uma sugestão construtiva ou ideia focada na melhoria de {camara.municipio} (competência municipal), e não uma reclamação, denúncia ou manifestação sobre assuntos gerais.
         No entanto, o envio não garante a implementação da ideia. As sugestões serão avaliadas de acordo com sua viabilidade, impacto e prioridades do município. Agradecemos sua participação!
         """)
         termos = st.checkbox("Li e concordo com os termos acima.")
@@ -511,7 +1146,7 @@ elif modo == "💡 Banco de Ideias":
         with st.form("login_admin_form"):
             senha = st.text_input("Senha ADM (Somente números):", type="password")
             if st.form_submit_button("Acessar"):
-                if senha == "280255":
+                if senha == camara.senhas["admin"]:
                     st.session_state["admin_logado"] = True
                     st.rerun()
                 else:
@@ -524,57 +1159,30 @@ elif modo == "💡 Banco de Ideias":
             st.rerun()
             
         # --- AQUI ESTÁ A MUDANÇA: CRIAÇÃO DE ABAS ---
-        aba_ideias, aba_logs = st.tabs(["📋 Gerenciar Ideias", "🕵️ Logs de Acesso"])
+        aba_ideias, aba_grupos, aba_logs, aba_exportar, aba_desempenho = st.tabs(["📋 Gerenciar Ideias", "🧩 Ideias Repetidas", "🕵️ Logs de Acesso", "📦 Exportar", "📈 Desempenho"])
         
         # --- ABA 1: IDEIAS (O código que você já tinha) ---
         with aba_ideias:
-            st.subheader("Ideias Recebidas")
-            st.caption("📝 Para apagar uma linha: Selecione-a e aperte DELETE no teclado. Depois clique em SALVAR.")
-            
-            if os.path.exists(arquivo_ideias):
-                df = pd.read_csv(arquivo_ideias)
-                
-                # Tabela Editável
-                df_editado = st.data_editor(
-                    df, 
-                    num_rows="dynamic", 
-                    key="editor_ideias_admin", 
-                    use_container_width=True
-                )
-                
-                c1, c2 = st.columns(2)
-                with c1:
-                    if st.button("💾 Salvar Alterações na Tabela", use_container_width=True):
-                        df_editado.to_csv(arquivo_ideias, index=False)
-                        st.success("Tabela atualizada com sucesso!")
-                        st.rerun()
-                with c2:
-                    st.download_button(
-                        "📥 Baixar CSV", 
-                        data=df.to_csv(index=False).encode('utf-8'), 
-                        file_name="ideias.csv", 
-                        mime="text/csv", 
-                        use_container_width=True
-                    )
-            else:
-                st.info("Nenhuma ideia registrada ainda.")
+            metricas.etapa("admin:ideias")
+            admin_ideias()
+
+        # --- ABA 2: IDEIAS PARECIDAS AGRUPADAS ---
+        with aba_grupos:
+            metricas.etapa("admin:ideias_repetidas")
+            admin_ideias_repetidas()
 
-        # --- ABA 2: LOGS DE ACESSO (O código novo) ---
+        # --- ABA 3: LOGS DE ACESSO (O código novo) ---
         with aba_logs:
-            st.subheader("Histórico de Acessos (Vereadores)")
-            st.caption("Registro de quem acessou a área restrita e quando.")
-            
-            if os.path.exists(arquivo_logs):
-                df_logs = pd.read_csv(arquivo_logs)
-                # Mostra o mais recente primeiro (inverte a ordem) e ocupa a largura toda
-                st.dataframe(df_logs.iloc[::-1], use_container_width=True)
-                
-                st.markdown("---")
-                st.download_button(
-                    "📥 Baixar Log de Acessos", 
-                    data=df_logs.to_csv(index=False).encode('utf-8'), 
-                    file_name="logs_acesso.csv", 
-                    mime="text/csv"
-                )
-            else:
-                st.info("Nenhum acesso registrado ainda.")
+            metricas.etapa("admin:logs")
+            admin_logs()
+
+        # --- ABA 4: EXPORTAÇÕES ---
+        with aba_exportar:
+            metricas.etapa("admin:exportar")
+            admin_exportar()
+
+        # --- ABA 5: DESEMPENHO (MÉTRICAS) ---
+        with aba_desempenho:
+            admin_desempenho()
+
+metricas.finalizar_execucao()
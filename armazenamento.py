@@ -0,0 +1,1371 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- ESCRITA CONCORRENTE NOS ARQUIVOS CSV ---
+# Cada CSV tem um arquivo ".lock" ao lado. Ele serve de trava entre processos
+# (sessões do Streamlit em workers diferentes) e também de diário: antes de
+# acrescentar uma linha gravamos nele o tamanho atual do CSV. Se o processo
+# morrer no meio da escrita, a próxima escrita encontra a marca e corta o
+# pedaço incompleto, deixando o arquivo como estava antes.
+
+_travas_locais = {}
+_travas_locais_guarda = threading.Lock()
+
+
+def _trava_local(caminho):
+    with _travas_locais_guarda:
+        if caminho not in _travas_locais:
+            _travas_locais[caminho] = threading.Lock()
+        return _travas_locais[caminho]
+
+
+@contextmanager
+def trava_arquivo(caminho):
+    """Trava exclusiva (entre threads e processos) para o arquivo informado.
+
+    Devolve o descritor do arquivo ".lock", usado também como diário.
+    """
+    caminho = os.path.abspath(caminho)
+    with _trava_local(caminho):
+        fd = os.open(caminho + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield fd
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+def _ler_marca(fd):
+    os.lseek(fd, 0, os.SEEK_SET)
+    conteudo = os.read(fd, 32).strip()
+    return int(conteudo) if conteudo.isdigit() else None
+
+
+def _gravar_marca(fd, tamanho):
+    os.ftruncate(fd, 0)
+    if tamanho is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, str(tamanho).encode("ascii"))
+
+
+def _recuperar_escrita_interrompida(fd, caminho):
+    """Desfaz um acréscimo que não chegou ao fim (queda do processo)."""
+    tamanho_antes = _ler_marca(fd)
+    if tamanho_antes is None:
+        return
+    if os.path.exists(caminho) and os.path.getsize(caminho) > tamanho_antes:
+        with open(caminho, "r+b") as f:
+            f.truncate(tamanho_antes)
+    _gravar_marca(fd, None)
+
+
+def _ler_cabecalho(caminho):
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        linha = f.readline()
+    return next(csv.reader([linha]), [])
+
+
+def _linha_csv(valores):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(valores)
+    return buffer.getvalue()
+
+
+def _valor(dados, coluna, tipos=None):
+    valor = para_guardar(dados.get(coluna), (tipos or {}).get(coluna))
+    return "" if valor is None else valor
+
+
+def acrescentar_linha(caminho, colunas, dados, ao_gravar=None, tipos=None):
+    """Acrescenta uma linha ao fim do CSV sem reler o arquivo inteiro.
+
+    O cabeçalho só é escrito quando o arquivo é criado. Se o arquivo já
+    existir, a ordem das colunas segue o cabeçalho gravado nele.
+    `ao_gravar(inicio, fim, registro)` roda ainda sob a trava, com a posição
+    em bytes da linha gravada (usado pelos índices). `tipos` converte os
+    valores para o formato guardado (ver TABELAS).
+    """
+    with trava_arquivo(caminho) as fd:
+        _recuperar_escrita_interrompida(fd, caminho)
+
+        tamanho = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+        if tamanho == 0:
+            cabecalho = list(colunas)
+            prefixo = _linha_csv(cabecalho)
+        else:
+            cabecalho = _ler_cabecalho(caminho) or list(colunas)
+            prefixo = ""
+        valores = [_valor(dados, c, tipos) for c in cabecalho]
+        linha = _linha_csv(valores)
+
+        _gravar_marca(fd, tamanho)
+        saida = os.open(caminho, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # Arquivo antigo sem quebra de linha no fim (ex.: editado à mão)
+            if tamanho > 0:
+                with open(caminho, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) not in (b"\n", b"\r"):
+                        prefixo = "\n" + prefixo
+            inicio = tamanho + len(prefixo.encode("utf-8"))
+            dados_brutos = (prefixo + linha).encode("utf-8")
+            while dados_brutos:
+                escritos = os.write(saida, dados_brutos)
+                dados_brutos = dados_brutos[escritos:]
+            os.fsync(saida)
+        finally:
+            os.close(saida)
+        _gravar_marca(fd, None)
+        if ao_gravar:
+            ao_gravar(inicio, inicio + len(linha.encode("utf-8")), dict(zip(cabecalho, map(str, valores))))
+
+
+def _regravar_sob_trava(caminho, df):
+    temporario = caminho + ".tmp"
+    df.to_csv(temporario, index=False)
+    os.replace(temporario, caminho)
+
+
+def regravar_csv(caminho, df, ao_gravar=None):
+    """Regrava o CSV inteiro (editores de tabela) de forma atômica e sob trava."""
+    with trava_arquivo(caminho) as fd:
+        _recuperar_escrita_interrompida(fd, caminho)
+        _regravar_sob_trava(caminho, df)
+        if ao_gravar:
+            ao_gravar()
+
+
+# --- EDIÇÃO LINHA A LINHA (CONCORRÊNCIA OTIMISTA) ---
+# Os editores de tabela carregam as linhas com uma coluna "_id" (posição no CSV
+# ou rowid no SQLite). Na hora de salvar, cada linha alterada ou apagada só é
+# aplicada se o conteúdo guardado ainda for igual ao que o editor carregou
+# (o carimbo da linha). Se outra sessão mexeu nela nesse meio tempo, nada é
+# gravado e as linhas em conflito voltam para serem mostradas ao usuário.
+
+def _normalizar(valor, tipo=None):
+    if _vazio(valor):  # None, NaN, NaT
+        return ""
+    if tipo == "momento":
+        valor = para_epoch(valor)
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor)
+
+
+def carimbo(registro, colunas, tipos=None):
+    """Versão de uma linha: hash do seu conteúdo (momentos comparados em epoch)."""
+    tipos = tipos or {}
+    conteudo = json.dumps([_normalizar(registro.get(c), tipos.get(c)) for c in colunas], ensure_ascii=False)
+    return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()
+
+
+# --- ÍNDICE DE POSIÇÕES (FEED DO MURAL) ---
+def _registros_com_posicao(caminho):
+    """Percorre o CSV devolvendo (inicio, fim, bytes) de cada registro, sem o cabeçalho.
+
+    Um registro termina na quebra de linha em que o número de aspas
+    acumulado é par (campos com quebra de linha ficam entre aspas).
+    """
+    with open(caminho, "rb") as f:
+        posicao = 0
+        inicio = None
+        aspas = 0
+        pedacos = []
+        primeiro = True
+        for linha in f:
+            if inicio is None:
+                inicio = posicao
+                pedacos = []
+                aspas = 0
+            pedacos.append(linha)
+            aspas += linha.count(b'"')
+            posicao += len(linha)
+            if aspas % 2 == 0:
+                if not primeiro and b"".join(pedacos).strip():
+                    yield inicio, posicao, b"".join(pedacos)
+                primeiro = False
+                inicio = None
+
+
+def _ler_registro(bruto):
+    return next(csv.reader(io.StringIO(bruto.decode("utf-8"), newline="")), [])
+
+
+class IndiceCSV:
+    """Índice de posições em bytes dos registros de um CSV, por ordem de chegada
+    e por valor de uma coluna (ex.: Vereador).
+
+    Fica no arquivo "<csv>.idx" (linhas "inicio,fim,valor") e é atualizado a cada
+    linha acrescentada. Cada processo lê do .idx só o que foi acrescentado desde a
+    última consulta. Se o CSV e o índice não baterem (edição manual, queda no
+    meio da escrita), o índice é refeito.
+    """
+
+    def __init__(self, caminho_csv, coluna):
+        self.caminho_csv = caminho_csv
+        self.coluna = coluna
+        self.caminho = caminho_csv + ".idx"
+        self._trava = threading.Lock()
+        self._limpar()
+
+    def _limpar(self):
+        self._lido_ate = 0
+        self._identidade = None
+        self._todas = []       # [(inicio, fim)]
+        self._por_valor = {}   # valor -> [posição em _todas]
+
+    def _adicionar(self, inicio, fim, valor):
+        self._por_valor.setdefault(valor, []).append(len(self._todas))
+        self._todas.append((inicio, fim))
+
+    # chamados sob a trava do CSV
+    def registrar(self, inicio, fim, registro):
+        if not os.path.exists(self.caminho):
+            self.reconstruir()  # CSV anterior ao índice: indexa tudo de uma vez
+            return
+        with open(self.caminho, "a", encoding="utf-8", newline="") as f:
+            f.write(_linha_csv([inicio, fim, registro.get(self.coluna, "")]))
+
+    def reconstruir(self):
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8", newline="") as saida:
+            if os.path.exists(self.caminho_csv):
+                cabecalho = _ler_cabecalho(self.caminho_csv)
+                pos_coluna = cabecalho.index(self.coluna) if self.coluna in cabecalho else None
+                for inicio, fim, bruto in _registros_com_posicao(self.caminho_csv):
+                    campos = _ler_registro(bruto)
+                    valor = campos[pos_coluna] if pos_coluna is not None and pos_coluna < len(campos) else ""
+                    saida.write(_linha_csv([inicio, fim, valor]))
+        os.replace(temporario, self.caminho)
+
+    def _ler_novas(self):
+        """Carrega as entradas acrescentadas ao .idx desde a última leitura."""
+        if not os.path.exists(self.caminho):
+            self._limpar()
+            return
+        estado = os.stat(self.caminho)
+        identidade = (estado.st_ino, estado.st_dev)
+        if identidade != self._identidade or estado.st_size < self._lido_ate:
+            self._limpar()  # o índice foi refeito por outro processo
+            self._identidade = identidade
+        with open(self.caminho, "rb") as f:
+            f.seek(self._lido_ate)
+            novas = f.read()
+        completas = novas[:novas.rfind(b"\n") + 1]
+        self._lido_ate += len(completas)
+        for inicio, fim, valor in csv.reader(io.StringIO(completas.decode("utf-8"), newline="")):
+            self._adicionar(int(inicio), int(fim), valor)
+
+    def _coerente(self):
+        tamanho_csv = os.path.getsize(self.caminho_csv) if os.path.exists(self.caminho_csv) else 0
+        if self._todas:
+            return self._todas[-1][1] == tamanho_csv
+        if tamanho_csv == 0:
+            return True
+        with open(self.caminho_csv, "rb") as f:
+            return len(f.readline()) == tamanho_csv  # só o cabeçalho
+
+    def _atualizar(self):
+        self._ler_novas()
+        if self._coerente():
+            return
+        with trava_arquivo(self.caminho_csv):
+            # Sob a trava ninguém está escrevendo: confere de novo antes de refazer
+            self._ler_novas()
+            if not self._coerente():
+                self.reconstruir()
+                self._limpar()
+                self._ler_novas()
+
+    def pagina(self, valor=None, cursor=None, tamanho=10):
+        """Posições (inicio, fim) da página mais recente primeiro e o próximo cursor.
+
+        O cursor é o número de registros que ainda faltam (None = fim do feed).
+        """
+        with self._trava:
+            self._atualizar()
+            if valor is None:
+                total = len(self._todas)
+                fim = total if cursor is None else min(cursor, total)
+                inicio = max(0, fim - tamanho)
+                posicoes = self._todas[inicio:fim]
+            else:
+                lista = self._por_valor.get(valor, [])
+                fim = len(lista) if cursor is None else min(cursor, len(lista))
+                inicio = max(0, fim - tamanho)
+                posicoes = [self._todas[i] for i in lista[inicio:fim]]
+        return list(reversed(posicoes)), (inicio if inicio > 0 else None)
+
+
+# --- TABELAS DO SISTEMA ---
+# Cada tabela declara os tipos das colunas em "tipos" (as que não aparecem
+# são texto): "inteiro", "categoria" (poucos valores que se repetem, como o
+# vereador e o tipo de documento) e "momento" (um instante, guardado como
+# segundos desde 1970 em UTC e carregado como datetime no fuso de São Paulo).
+# Os leitores passam esses tipos ao pandas, que não precisa adivinhar nada; a
+# formatação para exibir ("18/10/2026 14:30") fica para a tela.
+TABELAS = {
+    "historico": {
+        "arquivo": "historico_proposicoes.csv",
+        # MODELO: provedor e modelo da IA que escreveu a versão ("groq:llama-3.3-70b-versatile"; vazio = digitada)
+        "colunas": ["ID_PROPOSICAO", "VEREADOR", "TIPO_DOC", "ASSUNTO", "VERSAO_NUM", "DATA_HORA", "MINUTA_TEXTO", "MODELO"],
+        "tipos": {"VEREADOR": "categoria", "TIPO_DOC": "categoria", "VERSAO_NUM": "inteiro", "DATA_HORA": "momento",
+                  "MODELO": "categoria"},
+        "indices": [["ID_PROPOSICAO", "VERSAO_NUM"], ["VEREADOR"], ["DATA_HORA"]],
+    },
+    "ideias": {
+        "arquivo": "banco_de_ideias.csv",
+        "colunas": ["Data", "Nome", "Contato", "Idade", "Ideia", "Contribuição", "Localização", "Áreas", "Vereador Destino", "Concordou Termos"],
+        "tipos": {"Data": "momento", "Idade": "categoria", "Vereador Destino": "categoria", "Concordou Termos": "categoria"},
+        "indices": [["Vereador Destino"], ["Data"]],
+    },
+    "mural": {
+        "arquivo": "mural_posts.csv",
+        "colunas": ["Data", "Vereador", "Titulo", "Mensagem"],
+        "tipos": {"Data": "momento", "Vereador": "categoria"},
+        "indices": [["Vereador"], ["Data"]],
+        "feed": "Vereador",
+    },
+    "logs": {
+        "arquivo": "log_acessos.csv",
+        "colunas": ["Data_Hora", "Usuario", "Acao"],
+        "tipos": {"Data_Hora": "momento", "Usuario": "categoria", "Acao": "categoria"},
+        "indices": [["Usuario"], ["Data_Hora"]],
+        "pasta_particoes": "logs",
+    },
+}
+
+FUSO = "America/Sao_Paulo"
+# 1: datas em texto "dd/mm/aaaa HH:MM[:SS]"; 2: tipos declarados, momentos em epoch; 3: MODELO no histórico
+VERSAO_ESQUEMA = 3
+_DTYPES = {"inteiro": "Int64", "momento": "Int64", "categoria": "category"}
+_FORMATOS_ANTIGOS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+
+
+def _vazio(valor):
+    try:
+        return valor is None or bool(valor != valor) or valor == ""
+    except (TypeError, ValueError):  # pd.NA
+        return True
+
+
+def para_epoch(valor):
+    """Segundos desde 1970 (UTC) de um instante; None se vazio ou irreconhecível.
+
+    Aceita datetime/Timestamp (sem fuso = hora de São Paulo), número, texto ISO
+    e o formato antigo "dd/mm/aaaa HH:MM[:SS]".
+    """
+    import numbers
+    from datetime import datetime
+
+    import pytz
+
+    if _vazio(valor):
+        return None
+    if isinstance(valor, numbers.Real) and not isinstance(valor, bool):
+        return int(valor)
+    if isinstance(valor, datetime):
+        if valor.tzinfo is None:
+            valor = pytz.timezone(FUSO).localize(valor)
+        return int(valor.timestamp())
+    texto = str(valor).strip()
+    if texto.lstrip("-").isdigit():
+        return int(texto)
+    for formato in _FORMATOS_ANTIGOS:
+        try:
+            return para_epoch(datetime.strptime(texto, formato))
+        except ValueError:
+            pass
+    try:
+        return para_epoch(datetime.fromisoformat(texto))
+    except ValueError:
+        return None
+
+
+def momento(valor):
+    """datetime com o fuso de São Paulo (ou None)."""
+    from datetime import datetime
+
+    import pytz
+
+    epoch = para_epoch(valor)
+    return None if epoch is None else datetime.fromtimestamp(epoch, pytz.timezone(FUSO))
+
+
+def formatar_momento(valor, formato="%d/%m/%Y %H:%M"):
+    """Texto para exibir um instante ("" se vazio)."""
+    m = momento(valor)
+    return m.strftime(formato) if m else ""
+
+
+def formatar_momentos(df, formato="%d/%m/%Y %H:%M"):
+    """Cópia do DataFrame com as colunas de data em texto, para exibir."""
+    import pandas as pd
+
+    df = df.copy()
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = df[coluna].dt.strftime(formato).fillna("")
+    return df
+
+
+def dtypes_leitura(colunas, tipos):
+    """dtype de cada coluna para o pandas (momentos chegam em epoch e viram datetime em tipar())."""
+    return {c: _DTYPES.get(tipos.get(c), str) for c in colunas}
+
+
+def tipar(df, tipos):
+    """Converte um DataFrame lido (ou montado) para os tipos declarados."""
+    import pandas as pd
+
+    for coluna, tipo in tipos.items():
+        if coluna not in df.columns:
+            continue
+        if tipo in ("inteiro", "momento") and df[coluna].dtype != "Int64":
+            df[coluna] = pd.to_numeric(df[coluna].map(para_epoch) if tipo == "momento" else df[coluna],
+                                       errors="coerce").astype("Int64")
+        elif tipo == "categoria" and df[coluna].dtype != "category":
+            df[coluna] = df[coluna].astype("category")
+        if tipo == "momento":
+            df[coluna] = pd.to_datetime(df[coluna], unit="s", utc=True).dt.tz_convert(FUSO)
+    return df
+
+
+def para_guardar(valor, tipo):
+    """Valor como vai para o arquivo/banco: momentos em epoch, inteiros em int, o resto em texto."""
+    if _vazio(valor):
+        return None
+    if tipo == "momento":
+        return para_epoch(valor)
+    if tipo == "inteiro":
+        return int(float(valor)) if isinstance(valor, str) else int(valor)
+    return str(valor)
+
+
+def guardavel(df, tipos):
+    """Cópia do DataFrame com os valores no formato guardado (momentos em epoch)."""
+    import pandas as pd
+
+    df = df.copy()
+    for coluna, tipo in tipos.items():
+        if coluna in df.columns and tipo in ("inteiro", "momento"):
+            df[coluna] = pd.to_numeric(df[coluna].map(lambda v: para_guardar(v, tipo)), errors="coerce").astype("Int64")
+    return df
+
+
+def registro_guardavel(registro, tipos):
+    """Registro (dict, sem o _id) no formato guardado, com vazios em "" (para gravar em JSON)."""
+    dados = {}
+    for coluna, valor in registro.items():
+        if coluna != "_id":
+            valor = para_guardar(valor, tipos.get(coluna))
+            dados[coluna] = "" if valor is None else valor
+    return dados
+
+
+def para_edicao(df, tipos):
+    """Categorias viram texto livre no editor de tabela (uma categoria só aceita valores já existentes)."""
+    for coluna, tipo in tipos.items():
+        if coluna in df.columns and tipo == "categoria":
+            df[coluna] = df[coluna].astype(object)
+    return df
+
+
+def dias_locais(serie):
+    """"AAAA-MM-DD" (hora de São Paulo) de cada valor de uma coluna de momentos."""
+    import pandas as pd
+
+    if isinstance(serie.dtype, pd.DatetimeTZDtype):
+        return serie.dt.strftime("%Y-%m-%d")
+    return serie.map(dia_iso)
+
+
+LINHAS_POR_LOTE = 5000  # leituras em lotes (exportação): memória limitada a um lote por vez
+
+
+class RepositorioCSV:
+    """Tabela guardada num arquivo CSV (formato original do sistema)."""
+
+    def __init__(self, caminho, colunas, tipos=None, coluna_feed=None):
+        self.caminho = caminho
+        self.colunas = list(colunas)
+        self.tipos = dict(tipos or {})
+        self.inteiros = [c for c, t in self.tipos.items() if t == "inteiro"]
+        self.coluna_feed = coluna_feed
+        self.indice = IndiceCSV(caminho, coluna_feed) if coluna_feed else None
+
+    def _vazia(self):
+        import pandas as pd
+
+        return tipar(pd.DataFrame(columns=self.colunas), self.tipos)
+
+    def _ler(self, **opcoes):
+        import pandas as pd
+
+        return pd.read_csv(self.caminho, dtype=dtypes_leitura(self.colunas, self.tipos), **opcoes)
+
+    def existe(self):
+        return os.path.exists(self.caminho)
+
+    def versao(self):
+        """Muda a cada gravação no arquivo (serve de chave para leituras em cache)."""
+        try:
+            info = os.stat(self.caminho)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def inserir(self, dados):
+        acrescentar_linha(self.caminho, self.colunas, dados, self.indice.registrar if self.indice else None, self.tipos)
+
+    def pagina(self, valor=None, cursor=None, tamanho=10):
+        """Página do feed, do mais recente para o mais antigo.
+
+        `valor` filtra pela coluna do feed (ex.: um vereador). Devolve
+        (DataFrame, próximo cursor ou None). Lê do disco só as linhas da página.
+        """
+        import pandas as pd
+
+        if self.indice is None:
+            df = self.buscar({self.coluna_feed: valor} if valor else None)
+            fim = len(df) if cursor is None else cursor
+            inicio = max(0, fim - tamanho)
+            return df.iloc[inicio:fim].iloc[::-1], (inicio if inicio > 0 else None)
+        posicoes, proximo = self.indice.pagina(valor, cursor, tamanho)
+        if not posicoes:
+            return self._vazia(), None
+        cabecalho = _ler_cabecalho(self.caminho)
+        registros = []
+        with open(self.caminho, "rb") as f:
+            for inicio, fim in posicoes:
+                f.seek(inicio)
+                registros.append(dict(zip(cabecalho, _ler_registro(f.read(fim - inicio)))))
+        return tipar(pd.DataFrame(registros, columns=cabecalho), self.tipos), proximo
+
+    def buscar(self, filtros=None, ordenar_por=None, decrescente=False, limite=None):
+        """Lê o arquivo inteiro e filtra em memória.
+
+        Sem `ordenar_por`, a ordem é a de inserção (invertida se `decrescente`).
+        """
+        import pandas as pd
+
+        if not self.existe():
+            return self._vazia()
+        df = tipar(self._ler(), self.tipos)
+        for coluna, valor in (filtros or {}).items():
+            df = df[df[coluna] == (int(valor) if coluna in self.inteiros else str(valor))]
+        if ordenar_por:
+            df = df.sort_values(by=ordenar_por, ascending=not decrescente)
+        elif decrescente:
+            df = df.iloc[::-1]
+        if limite is not None:
+            df = df.head(limite)
+        return df
+
+    def carregar(self):
+        return self.buscar()
+
+    def lotes(self, tamanho=LINHAS_POR_LOTE):
+        """DataFrames de até `tamanho` linhas, na ordem do arquivo, sem carregá-lo inteiro."""
+        import pandas as pd
+
+        if not self.existe():
+            return
+        with self._ler(chunksize=tamanho) as leitor:
+            for df in leitor:
+                yield tipar(df, self.tipos)
+
+    def substituir(self, df):
+        regravar_csv(self.caminho, guardavel(df, self.tipos), self.indice.reconstruir if self.indice else None)
+
+    def carregar_para_edicao(self, filtros=None):
+        """Linhas para o editor, com a coluna "_id" (posição da linha no arquivo)."""
+        df = para_edicao(self.buscar(filtros), self.tipos)
+        df.insert(0, "_id", df.index)
+        return df.reset_index(drop=True)
+
+    def aplicar_alteracoes(self, alteracoes, incluidas=()):
+        """Grava só as linhas que mudaram.
+
+        `alteracoes` é uma lista de (original, novo), onde `original` veio de
+        carregar_para_edicao() e `novo` é None para apagar a linha. Devolve a
+        lista de originais em conflito; se houver algum, nada é gravado.
+        """
+        import pandas as pd
+
+        if alteracoes:
+            with trava_arquivo(self.caminho) as fd:
+                _recuperar_escrita_interrompida(fd, self.caminho)
+                # texto como está no arquivo: as linhas não alteradas são regravadas sem conversão
+                atual = pd.read_csv(self.caminho, dtype=str) if self.existe() else pd.DataFrame(columns=self.colunas)
+                colunas = [c for c in atual.columns]
+                registros = atual.to_dict("records")
+                carimbos = None
+                usadas, conflitos, acoes = set(), [], []
+                for original, novo in alteracoes:
+                    esperado = carimbo(original, colunas, self.tipos)
+                    pos = original.get("_id")
+                    pos = int(pos) if pos is not None and pos == pos else None
+                    if pos is None or pos >= len(registros) or pos in usadas or carimbo(registros[pos], colunas, self.tipos) != esperado:
+                        # A linha mudou de lugar (outra sessão apagou linhas acima dela)?
+                        if carimbos is None:
+                            carimbos = [carimbo(r, colunas, self.tipos) for r in registros]
+                        pos = next((i for i, c in enumerate(carimbos) if c == esperado and i not in usadas), None)
+                    if pos is None:
+                        conflitos.append(original)
+                    else:
+                        usadas.add(pos)
+                        acoes.append((pos, novo))
+                if conflitos:
+                    return conflitos
+                apagar = set()
+                for pos, novo in acoes:
+                    if novo is None:
+                        apagar.add(pos)
+                    else:
+                        registros[pos] = {c: _valor(novo, c, self.tipos) if c in novo else registros[pos].get(c) for c in colunas}
+                final = pd.DataFrame([r for i, r in enumerate(registros) if i not in apagar], columns=colunas)
+                _regravar_sob_trava(self.caminho, final)
+                if self.indice:
+                    self.indice.reconstruir()
+        for dados in incluidas:
+            self.inserir(dados)
+        return []
+
+
+class BancoSQLite:
+    """Arquivo SQLite compartilhado pelas tabelas, com uma conexão por thread."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+
+    def conexao(self):
+        import sqlite3
+
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def contar_gravacoes(self, tabela):
+        """Triggers que somam 1 na linha de `tabela` em "_versoes" a cada linha incluída, alterada ou apagada.
+
+        O contador fica no próprio banco: vale para todas as conexões, threads e
+        processos (PRAGMA data_version e total_changes são de cada conexão).
+        """
+        literal = "'" + tabela.replace("'", "''") + "'"
+        con = self.conexao()
+        with con:
+            con.execute("CREATE TABLE IF NOT EXISTS _versoes (tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL)")
+            con.execute("INSERT OR IGNORE INTO _versoes VALUES (?, 0)", (tabela,))
+            for evento in ("INSERT", "UPDATE", "DELETE"):
+                con.execute(f"""CREATE TRIGGER IF NOT EXISTS {_q(tabela + '_versao_' + evento.lower())}
+                    AFTER {evento} ON {_q(tabela)} BEGIN
+                    UPDATE _versoes SET versao = versao + 1 WHERE tabela = {literal}; END""")
+
+    def versao(self, tabela):
+        """Muda a cada gravação em `tabela`, feita por qualquer conexão (ver contar_gravacoes)."""
+        linha = self.conexao().execute("SELECT versao FROM _versoes WHERE tabela = ?", (tabela,)).fetchone()
+        return linha[0] if linha else None
+
+
+def _q(nome):
+    return '"' + nome.replace('"', '""') + '"'
+
+
+class RepositorioSQLite:
+    """Mesma interface do RepositorioCSV, com índices nas colunas de busca."""
+
+    def __init__(self, banco, tabela, colunas, tipos=None, indices=(), coluna_feed=None):
+        self.banco = banco
+        self.tabela = tabela
+        self.colunas = list(colunas)
+        self.tipos = dict(tipos or {})
+        self.inteiros = [c for c, t in self.tipos.items() if t == "inteiro"]
+        self.coluna_feed = coluna_feed
+        self._criar(indices)
+
+    def _criar(self, indices):
+        definicoes = ", ".join(
+            f"{_q(c)} {'INTEGER' if self.tipos.get(c) in ('inteiro', 'momento') else 'TEXT'}" for c in self.colunas
+        )
+        con = self.banco.conexao()
+        with con:
+            con.execute(f"CREATE TABLE IF NOT EXISTS {_q(self.tabela)} ({definicoes})")
+            for colunas_indice in indices:
+                nome = "idx_" + self.tabela + "_" + "_".join(colunas_indice)
+                nome = "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in nome)
+                lista = ", ".join(_q(c) for c in colunas_indice)
+                con.execute(f"CREATE INDEX IF NOT EXISTS {_q(nome)} ON {_q(self.tabela)} ({lista})")
+        self.banco.contar_gravacoes(self.tabela)
+
+    def existe(self):
+        cur = self.banco.conexao().execute(f"SELECT 1 FROM {_q(self.tabela)} LIMIT 1")
+        return cur.fetchone() is not None
+
+    def versao(self):
+        return self.banco.versao(self.tabela)
+
+    def _linha(self, dados):
+        return [para_guardar(dados.get(c), self.tipos.get(c)) for c in self.colunas]
+
+    def _ler(self, sql, parametros=(), **opcoes):
+        """read_sql_query com os tipos declarados (o texto fica como veio: None continua None)."""
+        import pandas as pd
+
+        dtypes = {c: t for c, t in dtypes_leitura(self.colunas, self.tipos).items() if t is not str}
+        resultado = pd.read_sql_query(sql, self.banco.conexao(), params=list(parametros), dtype=dtypes, **opcoes)
+        if "chunksize" in opcoes:
+            return (tipar(df, self.tipos) for df in resultado)
+        return tipar(resultado, self.tipos)
+
+    def _sql_inserir(self):
+        marcadores = ", ".join("?" for _ in self.colunas)
+        lista = ", ".join(_q(c) for c in self.colunas)
+        return f"INSERT INTO {_q(self.tabela)} ({lista}) VALUES ({marcadores})"
+
+    def inserir(self, dados):
+        con = self.banco.conexao()
+        with con:
+            con.execute(self._sql_inserir(), self._linha(dados))
+
+    def inserir_varios(self, registros):
+        con = self.banco.conexao()
+        with con:
+            con.executemany(self._sql_inserir(), (self._linha(d) for d in registros))
+
+    def buscar(self, filtros=None, ordenar_por=None, decrescente=False, limite=None):
+        sql = f"SELECT {', '.join(_q(c) for c in self.colunas)} FROM {_q(self.tabela)}"
+        parametros = []
+        if filtros:
+            sql += " WHERE " + " AND ".join(f"{_q(c)} = ?" for c in filtros)
+            parametros = [str(v) if c not in self.inteiros else int(v) for c, v in filtros.items()]
+        direcao = "DESC" if decrescente else "ASC"
+        sql += f" ORDER BY {_q(ordenar_por) if ordenar_por else 'rowid'} {direcao}"
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros.append(int(limite))
+        return self._ler(sql, parametros)
+
+    def carregar(self):
+        return self.buscar()
+
+    def lotes(self, tamanho=LINHAS_POR_LOTE):
+        sql = f"SELECT {', '.join(_q(c) for c in self.colunas)} FROM {_q(self.tabela)} ORDER BY rowid"
+        yield from self._ler(sql, chunksize=tamanho)
+
+    def pagina(self, valor=None, cursor=None, tamanho=10):
+        """Mesma interface do RepositorioCSV.pagina; o cursor é o rowid."""
+        condicoes, parametros = [], []
+        if valor is not None:
+            condicoes.append(f"{_q(self.coluna_feed)} = ?")
+            parametros.append(str(valor))
+        if cursor is not None:
+            condicoes.append("rowid < ?")
+            parametros.append(int(cursor))
+        sql = f"SELECT rowid AS _rowid, {', '.join(_q(c) for c in self.colunas)} FROM {_q(self.tabela)}"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY rowid DESC LIMIT ?"
+        parametros.append(int(tamanho) + 1)
+        df = self._ler(sql, parametros)
+        proximo = None
+        if len(df) > tamanho:
+            df = df.iloc[:tamanho]
+            proximo = int(df["_rowid"].iloc[-1])
+        return df.drop(columns="_rowid"), proximo
+
+    def carregar_para_edicao(self, filtros=None):
+        """Linhas para o editor, com a coluna "_id" (rowid)."""
+        sql = f"SELECT rowid AS _id, {', '.join(_q(c) for c in self.colunas)} FROM {_q(self.tabela)}"
+        parametros = []
+        if filtros:
+            sql += " WHERE " + " AND ".join(f"{_q(c)} = ?" for c in filtros)
+            parametros = [str(v) for v in filtros.values()]
+        return para_edicao(self._ler(sql + " ORDER BY rowid", parametros), self.tipos)
+
+    def aplicar_alteracoes(self, alteracoes, incluidas=()):
+        """Mesma interface do RepositorioCSV; cada linha é lida e gravada pelo rowid."""
+        con = self.banco.conexao()
+        selecionar = f"SELECT {', '.join(_q(c) for c in self.colunas)} FROM {_q(self.tabela)} WHERE rowid = ?"
+        atualizar = (f"UPDATE {_q(self.tabela)} SET {', '.join(f'{_q(c)} = ?' for c in self.colunas)} "
+                     f"WHERE rowid = ?")
+        apagar = f"DELETE FROM {_q(self.tabela)} WHERE rowid = ?"
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            conflitos, acoes = [], []
+            for original, novo in alteracoes:
+                atual = con.execute(selecionar, (int(original["_id"]),)).fetchone()
+                if atual is None or carimbo(dict(zip(self.colunas, atual)), self.colunas, self.tipos) != carimbo(original, self.colunas, self.tipos):
+                    conflitos.append(original)
+                else:
+                    acoes.append((int(original["_id"]), novo))
+            if conflitos:
+                con.rollback()
+                return conflitos
+            for rowid, novo in acoes:
+                if novo is None:
+                    con.execute(apagar, (rowid,))
+                else:
+                    con.execute(atualizar, self._linha(novo) + [rowid])
+            if incluidas:
+                con.executemany(self._sql_inserir(), (self._linha(d) for d in incluidas))
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        return []
+
+    def substituir(self, df):
+        registros = df.to_dict("records")
+        con = self.banco.conexao()
+        with con:
+            con.execute(f"DELETE FROM {_q(self.tabela)}")
+            con.executemany(self._sql_inserir(), (self._linha(d) for d in registros))
+
+
+# --- LOG DE ACESSOS: PARTIÇÕES MENSAIS E RESUMOS ---
+# O log cresce a cada login e quase nunca é lido inteiro. Cada mês vai para
+# um arquivo próprio (logs/log_acessos_AAAA-MM.csv); meses fechados são
+# comprimidos (.csv.gz; uma gravação com data de mês já comprimido é juntada
+# ao .gz na rotação seguinte) e os mais antigos que a retenção são apagados,
+# com o ".lock" de cada um. As contagens por usuário e por dia ficam em
+# logs/resumo.json, atualizadas a cada login, para o painel não precisar
+# varrer o histórico.
+
+MESES_RETENCAO_LOGS = 24
+
+
+def dia_iso(data_hora):
+    """Instante (datetime, epoch ou "18/10/2026 14:30") -> "2026-10-18" em São Paulo ("" se vazio)."""
+    return formatar_momento(data_hora, "%Y-%m-%d")
+
+
+def _mes_limite(mes_atual, meses):
+    ano, mes = int(mes_atual[:4]), int(mes_atual[5:7])
+    indice = ano * 12 + (mes - 1) - meses
+    return f"{indice // 12:04d}-{indice % 12 + 1:02d}"
+
+
+class RepositorioLogCSV:
+    """Log de acessos particionado por mês. Mesma interface básica do RepositorioCSV."""
+
+    def __init__(self, pasta, colunas, tipos=None, arquivo_legado=None, meses_retencao=MESES_RETENCAO_LOGS):
+        self.pasta = pasta
+        self.colunas = list(colunas)
+        self.tipos = dict(tipos or {})
+        self.arquivo_legado = arquivo_legado
+        self.meses_retencao = meses_retencao
+        self.caminho_resumo = os.path.join(pasta, "resumo.json")
+
+    # --- partições ---
+    def _caminho_mes(self, mes, comprimido=False):
+        return os.path.join(self.pasta, f"log_acessos_{mes}.csv" + (".gz" if comprimido else ""))
+
+    def particoes(self):
+        """{mes: [caminhos]} de todas as partições existentes.
+
+        Um mês fechado pode ter o .csv.gz e, ao lado, um .csv novo (gravação
+        atrasada ou com data passada) até a próxima rotação juntar os dois; o
+        .csv.gz vem primeiro.
+        """
+        if not os.path.isdir(self.pasta):
+            return {}
+        resultado = {}
+        for nome in sorted(os.listdir(self.pasta), key=lambda n: not n.endswith(".gz")):
+            if nome.startswith("log_acessos_") and (nome.endswith(".csv") or nome.endswith(".csv.gz")):
+                mes = nome[len("log_acessos_"):len("log_acessos_") + 7]
+                resultado.setdefault(mes, []).append(os.path.join(self.pasta, nome))
+        return dict(sorted(resultado.items()))
+
+    def existe(self):
+        self._migrar_legado()
+        return bool(self.particoes())
+
+    def _ler_particao(self, caminho, **opcoes):
+        import pandas as pd
+
+        dados = pd.read_csv(caminho, dtype=dtypes_leitura(self.colunas, self.tipos), **opcoes)
+        if "chunksize" in opcoes:
+            return dados
+        return tipar(dados, self.tipos)
+
+    # --- resumo ---
+    def _ler_resumo(self):
+        try:
+            with open(self.caminho_resumo, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _gravar_resumo(self, resumo):
+        temporario = self.caminho_resumo + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(resumo, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho_resumo)
+
+    def reconstruir_resumo(self):
+        """Recalcula o resumo lendo todas as partições (só quando ele falta)."""
+        por_dia = {}
+        for caminho in (c for caminhos in self.particoes().values() for c in caminhos):
+            df = self._ler_particao(caminho)
+            for dia, usuario in zip(dias_locais(df["Data_Hora"]).fillna(""), df["Usuario"].astype(str)):
+                contagem = por_dia.setdefault(dia, {})
+                contagem[usuario] = contagem.get(usuario, 0) + 1
+        resumo = {"por_dia": por_dia}
+        self._gravar_resumo(resumo)
+        return resumo
+
+    def resumo(self):
+        """DataFrame com colunas Dia, Usuario, Total (contagens de acessos)."""
+        import pandas as pd
+
+        self._migrar_legado()
+        with trava_arquivo(self.caminho_resumo):
+            resumo = self._ler_resumo() or self.reconstruir_resumo()
+        linhas = [
+            {"Dia": dia, "Usuario": usuario, "Total": total}
+            for dia, contagem in resumo["por_dia"].items()
+            for usuario, total in contagem.items()
+        ]
+        return pd.DataFrame(linhas, columns=["Dia", "Usuario", "Total"])
+
+    # --- escrita ---
+    def _migrar_legado(self):
+        """Divide o antigo log_acessos.csv (arquivo único) em partições, uma única vez."""
+        if not self.arquivo_legado or not os.path.exists(self.arquivo_legado):
+            return
+        os.makedirs(self.pasta, exist_ok=True)
+        with trava_arquivo(self.caminho_resumo):
+            if not os.path.exists(self.arquivo_legado):
+                return  # outro processo já migrou
+            import pandas as pd
+
+            # arquivo da versão 1 do esquema: datas em texto, convertidas aqui para epoch
+            df = guardavel(pd.read_csv(self.arquivo_legado, dtype=str), self.tipos)
+            df["_mes"] = df["Data_Hora"].map(lambda v: dia_iso(v)[:7] or "0000-00")
+            for mes, grupo in df.groupby("_mes"):
+                destino = self._caminho_mes(mes)
+                grupo.drop(columns="_mes").to_csv(destino, index=False, mode="a", header=not os.path.exists(destino))
+            os.replace(self.arquivo_legado, self.arquivo_legado + ".migrado")
+            self.reconstruir_resumo()
+        if self.particoes():
+            self._rotacionar(max(self.particoes()))
+
+    @staticmethod
+    def _apagar_particao(caminho):
+        """Apaga a partição e, se for um .csv, o ".lock" ao lado (trava e diário de acrescentar_linha)."""
+        os.remove(caminho)
+        if caminho.endswith(".csv"):
+            try:
+                os.remove(caminho + ".lock")
+            except OSError:
+                pass
+
+    @staticmethod
+    def _comprimir(caminho):
+        """Passa o .csv para o .csv.gz do mesmo mês, acrescentando ao .gz se ele já existir."""
+        import gzip
+        import shutil
+
+        comprimido = caminho + ".gz"
+        with trava_arquivo(caminho):
+            with open(comprimido + ".tmp", "wb") as destino:
+                existia = os.path.exists(comprimido)
+                if existia:  # gzip aceita vários membros seguidos: copiamos o antigo e acrescentamos um novo
+                    with open(comprimido, "rb") as antigo:
+                        shutil.copyfileobj(antigo, destino)
+                with open(caminho, "rb") as origem, gzip.GzipFile(fileobj=destino, mode="wb") as novo:
+                    if existia:
+                        origem.readline()  # o cabeçalho já está no .gz
+                    shutil.copyfileobj(origem, novo)
+            os.replace(comprimido + ".tmp", comprimido)
+            RepositorioLogCSV._apagar_particao(caminho)
+
+    def _rotacionar(self, mes_atual):
+        """Comprime os meses fechados e apaga os que passaram da retenção."""
+        if mes_atual == "0000-00":
+            return
+        limite = _mes_limite(mes_atual, self.meses_retencao)
+        apagados = False
+        with trava_arquivo(os.path.join(self.pasta, "rotacao")):
+            for mes, caminhos in self.particoes().items():
+                for caminho in caminhos:
+                    if mes < limite:
+                        self._apagar_particao(caminho)
+                        apagados = True
+                    elif mes < mes_atual and caminho.endswith(".csv"):
+                        self._comprimir(caminho)
+        if apagados:
+            with trava_arquivo(self.caminho_resumo):
+                resumo = self._ler_resumo() or self.reconstruir_resumo()
+                resumo["por_dia"] = {d: c for d, c in resumo["por_dia"].items() if d[:7] >= limite}
+                self._gravar_resumo(resumo)
+
+    def inserir(self, dados):
+        self._migrar_legado()
+        os.makedirs(self.pasta, exist_ok=True)
+        dia = dia_iso(dados.get("Data_Hora", ""))
+        mes = dia[:7] or "0000-00"
+        caminho = self._caminho_mes(mes)
+        mes_novo = not os.path.exists(caminho)
+        acrescentar_linha(caminho, self.colunas, dados, tipos=self.tipos)
+        with trava_arquivo(self.caminho_resumo):
+            resumo = self._ler_resumo()
+            if resumo is None:
+                self.reconstruir_resumo()
+            else:
+                contagem = resumo["por_dia"].setdefault(dia, {})
+                usuario = str(dados.get("Usuario", ""))
+                contagem[usuario] = contagem.get(usuario, 0) + 1
+                self._gravar_resumo(resumo)
+        if mes_novo:
+            # gravação com data passada cria um .csv num mês já fechado: a rotação o junta ao .csv.gz
+            self._rotacionar(max(mes, max(self.particoes())))
+
+    # --- leitura ---
+    def buscar_periodo(self, inicio, fim):
+        """Linhas entre as datas `inicio` e `fim` (datetime.date), mais recentes primeiro.
+
+        Só abre as partições dos meses do intervalo.
+        """
+        import pandas as pd
+
+        self._migrar_legado()
+        de, ate = inicio.isoformat(), fim.isoformat()
+        partes = []
+        for mes, caminhos in self.particoes().items():
+            if not de[:7] <= mes <= ate[:7]:
+                continue
+            for caminho in caminhos:
+                df = self._ler_particao(caminho)
+                dias = dias_locais(df["Data_Hora"])
+                partes.append(df[(dias >= de) & (dias <= ate)])
+        if not partes:
+            return tipar(pd.DataFrame(columns=self.colunas), self.tipos)
+        return tipar(pd.concat(partes, ignore_index=True), self.tipos).iloc[::-1]
+
+    def lotes(self, tamanho=LINHAS_POR_LOTE, inicio=None, fim=None):
+        """Lotes em ordem cronológica; com `inicio`/`fim` (datetime.date) só abre os meses do período."""
+        self._migrar_legado()
+        de = inicio.isoformat() if inicio else ""
+        ate = fim.isoformat() if fim else "9999-12-31"
+        for mes, caminhos in self.particoes().items():
+            if not de[:7] <= mes <= ate[:7]:
+                continue
+            for caminho in caminhos:
+                with self._ler_particao(caminho, chunksize=tamanho) as leitor:
+                    for df in leitor:
+                        df = tipar(df, self.tipos)
+                        if inicio or fim:
+                            dias = dias_locais(df["Data_Hora"])
+                            df = df[(dias >= de) & (dias <= ate)]
+                        yield df
+
+    def carregar(self):
+        import pandas as pd
+
+        self._migrar_legado()
+        partes = [self._ler_particao(c) for caminhos in self.particoes().values() for c in caminhos]
+        return tipar(pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=self.colunas), self.tipos)
+
+
+# Dia em São Paulo a partir do epoch. O SQLite não conhece fusos: usamos UTC-3
+# fixo (sem horário de verão desde 2019).
+_EXPR_DIA = "date(Data_Hora - 10800, 'unixepoch')"
+
+
+class RepositorioLogSQLite(RepositorioSQLite):
+    """Log de acessos no SQLite: índice pela data e resumo mantido por triggers."""
+
+    def __init__(self, banco, tabela, colunas, tipos=None, indices=(), meses_retencao=MESES_RETENCAO_LOGS):
+        super().__init__(banco, tabela, colunas, tipos, indices)
+        self.meses_retencao = meses_retencao
+        self._mes_verificado = None
+        t = _q(self.tabela)
+        resumo = _q(self.tabela + "_por_dia")
+        con = self.banco.conexao()
+        with con:
+            con.execute(f"CREATE INDEX IF NOT EXISTS {_q('idx_' + self.tabela + '_dia')} ON {t} ({_EXPR_DIA})")
+            existia = con.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (self.tabela + "_por_dia",)).fetchone()
+            con.execute(f"CREATE TABLE IF NOT EXISTS {resumo} (Dia TEXT, Usuario TEXT, Total INTEGER, PRIMARY KEY (Dia, Usuario))")
+            con.execute(f"""CREATE TRIGGER IF NOT EXISTS {_q(self.tabela + '_resumo_ins')} AFTER INSERT ON {t} BEGIN
+                INSERT INTO {resumo} VALUES ({_EXPR_DIA.replace('Data_Hora', 'NEW.Data_Hora')}, NEW.Usuario, 1)
+                ON CONFLICT (Dia, Usuario) DO UPDATE SET Total = Total + 1; END""")
+            con.execute(f"""CREATE TRIGGER IF NOT EXISTS {_q(self.tabela + '_resumo_del')} AFTER DELETE ON {t} BEGIN
+                UPDATE {resumo} SET Total = Total - 1
+                WHERE Dia = {_EXPR_DIA.replace('Data_Hora', 'OLD.Data_Hora')} AND Usuario IS OLD.Usuario; END""")
+            if not existia:
+                con.execute(f"INSERT INTO {resumo} SELECT {_EXPR_DIA}, Usuario, COUNT(*) FROM {t} GROUP BY 1, 2")
+
+    def inserir(self, dados):
+        super().inserir(dados)
+        mes = dia_iso(dados.get("Data_Hora", ""))[:7]
+        if mes and mes != self._mes_verificado:
+            self._mes_verificado = mes
+            limite = _mes_limite(mes, self.meses_retencao) + "-01"
+            con = self.banco.conexao()
+            with con:
+                con.execute(f"DELETE FROM {_q(self.tabela)} WHERE {_EXPR_DIA} < ?", (limite,))
+
+    def resumo(self):
+        import pandas as pd
+
+        return pd.read_sql_query(
+            f"SELECT Dia, Usuario, Total FROM {_q(self.tabela + '_por_dia')} WHERE Total > 0",
+            self.banco.conexao(),
+        )
+
+    def buscar_periodo(self, inicio, fim):
+        sql = (f"SELECT {', '.join(_q(c) for c in self.colunas)} FROM {_q(self.tabela)} "
+               f"WHERE {_EXPR_DIA} BETWEEN ? AND ? ORDER BY rowid DESC")
+        return self._ler(sql, [inicio.isoformat(), fim.isoformat()])
+
+    def lotes(self, tamanho=LINHAS_POR_LOTE, inicio=None, fim=None):
+        sql = f"SELECT {', '.join(_q(c) for c in self.colunas)} FROM {_q(self.tabela)}"
+        parametros = []
+        if inicio or fim:
+            sql += f" WHERE {_EXPR_DIA} BETWEEN ? AND ?"
+            parametros = [inicio.isoformat() if inicio else "", fim.isoformat() if fim else "9999-12-31"]
+        yield from self._ler(sql + " ORDER BY rowid", parametros, chunksize=tamanho)
+
+
+def abrir_repositorios(backend="csv", pasta=".", arquivo_banco="gabinete.db"):
+    """Devolve {nome_da_tabela: repositório} para o backend escolhido (migrando o esquema antes, se preciso)."""
+    migrar_esquema(backend, pasta, arquivo_banco)
+    repos = {}
+    if backend == "sqlite":
+        banco = BancoSQLite(os.path.join(pasta, arquivo_banco))
+        for nome, t in TABELAS.items():
+            if t.get("pasta_particoes"):
+                repos[nome] = RepositorioLogSQLite(banco, nome, t["colunas"], t["tipos"], t["indices"])
+            else:
+                repos[nome] = RepositorioSQLite(banco, nome, t["colunas"], t["tipos"], t["indices"], t.get("feed"))
+        return repos
+    for nome, t in TABELAS.items():
+        if t.get("pasta_particoes"):
+            repos[nome] = RepositorioLogCSV(os.path.join(pasta, t["pasta_particoes"]), t["colunas"], t["tipos"],
+                                            os.path.join(pasta, t["arquivo"]))
+        else:
+            repos[nome] = RepositorioCSV(os.path.join(pasta, t["arquivo"]), t["colunas"], t["tipos"], t.get("feed"))
+    return repos
+
+
+# --- IDS DAS PROPOSIÇÕES ---
+# O ID é o instante em UTC com milissegundos ("AAAAMMDDHHMMSSmmm"): ordena
+# como texto na ordem de criação, inclusive junto com os IDs antigos (só até
+# os segundos). O último instante entregue fica no arquivo "ids.lock" da
+# pasta dos dados, lido e regravado sob trava_arquivo: dois pedidos no mesmo
+# milissegundo, em threads ou processos diferentes, recebem instantes
+# seguidos, e um relógio que volta atrás não repete ID.
+ARQUIVO_IDS = "ids"
+
+
+def novos_ids(quantidade=1, pasta="."):
+    """Lista com `quantidade` IDs novos, crescentes e nunca repetidos na pasta."""
+    from datetime import datetime, timezone
+
+    with trava_arquivo(os.path.join(pasta, ARQUIVO_IDS)) as fd:
+        ultimo = _ler_marca(fd) or 0
+        primeiro = max(int(time.time() * 1000), ultimo + 1)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, f"{primeiro + quantidade - 1:020d}".encode("ascii"))  # largura fixa: nunca fica vazio no meio
+    return [datetime.fromtimestamp(ms // 1000, timezone.utc).strftime("%Y%m%d%H%M%S") + f"{ms % 1000:03d}"
+            for ms in range(primeiro, primeiro + quantidade)]
+
+
+def novo_id(pasta="."):
+    return novos_ids(1, pasta)[0]
+
+
+# --- MIGRAÇÃO DO ESQUEMA ---
+# Arquivos da versão 1 guardam as datas em texto ("18/10/2026 14:30", hora de
+# São Paulo); os anteriores à 3 não têm a coluna MODELO. migrar_esquema()
+# passa tudo para a versão atual uma única vez: nos CSVs, regrava os arquivos
+# com as colunas "momento" em epoch e as colunas novas (vazias), e anota a
+# versão no arquivo ".esquema" da pasta; no SQLite, recria as tabelas com os
+# tipos declarados (mantendo o rowid, que é o _id dos editores e o cursor do
+# feed), ou só acrescenta as colunas novas quando os tipos já batem, e anota a
+# versão em PRAGMA user_version. Depois disso, custa uma leitura por abertura.
+ARQUIVO_VERSAO_ESQUEMA = ".esquema"
+
+
+def _versao_esquema_csv(caminho):
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 1)
+    except (OSError, ValueError):
+        return 1
+
+
+def _migrar_arquivo_csv(caminho, tabela):
+    """Regrava um CSV (ou .csv.gz) antigo com os tipos e as colunas atuais. Retorna as linhas regravadas."""
+    import pandas as pd
+
+    with trava_arquivo(caminho) as fd:
+        _recuperar_escrita_interrompida(fd, caminho)
+        df = pd.read_csv(caminho, dtype=str)
+        colunas = tabela["colunas"] + [c for c in df.columns if c not in tabela["colunas"]]  # extras ficam no fim
+        momentos = [c for c, t in tabela["tipos"].items() if t == "momento" and c in df.columns]
+        if list(df.columns) == colunas and all(df[c].dropna().str.fullmatch(r"-?\d+").all() for c in momentos):
+            return 0  # já está no esquema atual
+        convertido = guardavel(df, tabela["tipos"]).reindex(columns=colunas)
+        temporario = caminho + ".tmp"
+        convertido.to_csv(temporario, index=False, compression="gzip" if caminho.endswith(".gz") else None)
+        os.replace(temporario, caminho)
+        if tabela.get("feed"):
+            IndiceCSV(caminho, tabela["feed"]).reconstruir()
+    return len(df)
+
+
+def _migrar_esquema_csv(pasta):
+    caminho_versao = os.path.join(pasta, ARQUIVO_VERSAO_ESQUEMA)
+    if _versao_esquema_csv(caminho_versao) >= VERSAO_ESQUEMA:
+        return {}
+    os.makedirs(pasta, exist_ok=True)
+    convertidas = {}
+    with trava_arquivo(caminho_versao):
+        if _versao_esquema_csv(caminho_versao) >= VERSAO_ESQUEMA:
+            return {}  # outro processo migrou enquanto esperávamos a trava
+        for nome, t in TABELAS.items():
+            if t.get("pasta_particoes"):
+                # o log_acessos.csv antigo (arquivo único) é convertido ao ser particionado
+                particoes = RepositorioLogCSV(os.path.join(pasta, t["pasta_particoes"]), t["colunas"]).particoes()
+                caminhos = [c for lista in particoes.values() for c in lista]
+            else:
+                caminhos = [os.path.join(pasta, t["arquivo"])]
+            linhas = sum(_migrar_arquivo_csv(c, t) for c in caminhos if os.path.exists(c))
+            if linhas:
+                convertidas[nome] = linhas
+                if t.get("pasta_particoes"):
+                    try:
+                        os.remove(os.path.join(pasta, t["pasta_particoes"], "resumo.json"))  # refeito na próxima consulta
+                    except OSError:
+                        pass
+        with open(caminho_versao, "w", encoding="utf-8") as f:
+            f.write(str(VERSAO_ESQUEMA))
+    return convertidas
+
+
+def _migrar_esquema_sqlite(caminho_banco):
+    con = BancoSQLite(caminho_banco).conexao()
+    if con.execute("PRAGMA user_version").fetchone()[0] >= VERSAO_ESQUEMA:
+        return {}
+    convertidas = {}
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        if con.execute("PRAGMA user_version").fetchone()[0] >= VERSAO_ESQUEMA:
+            con.rollback()
+            return {}
+        for nome, t in TABELAS.items():
+            if not con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (nome,)).fetchone():
+                continue
+            esperados = {c: "INTEGER" if t["tipos"].get(c) in ("inteiro", "momento") else "TEXT" for c in t["colunas"]}
+            declarados = {linha[1]: linha[2].upper() for linha in con.execute(f"PRAGMA table_info({_q(nome)})")}
+            existentes = [c for c in t["colunas"] if c in declarados]
+            if all(declarados[c] == esperados[c] for c in existentes):
+                for c in t["colunas"]:
+                    if c not in declarados:
+                        con.execute(f"ALTER TABLE {_q(nome)} ADD COLUMN {_q(c)} {esperados[c]}")
+                continue
+            antiga = _q(nome + "_v1")
+            lista = ", ".join(_q(c) for c in existentes)
+            # índices e triggers vão junto com a tabela antiga e são recriados ao abrir o repositório
+            con.execute(f"ALTER TABLE {_q(nome)} RENAME TO {antiga}")
+            con.execute(f"CREATE TABLE {_q(nome)} ({', '.join(f'{_q(c)} {tipo}' for c, tipo in esperados.items())})")
+            con.executemany(
+                f"INSERT INTO {_q(nome)} (rowid, {lista}) VALUES (?, {', '.join('?' for _ in existentes)})",
+                ([rowid] + [para_guardar(v, t["tipos"].get(c)) for c, v in zip(existentes, valores)]
+                 for rowid, *valores in con.execute(f"SELECT rowid, {lista} FROM {antiga}")),
+            )
+            con.execute(f"DROP TABLE {antiga}")
+            if t.get("pasta_particoes"):
+                con.execute(f"DROP TABLE IF EXISTS {_q(nome + '_por_dia')}")  # resumo refeito com o novo cálculo do dia
+            linhas = con.execute(f"SELECT COUNT(*) FROM {_q(nome)}").fetchone()[0]
+            if linhas:
+                convertidas[nome] = linhas
+        con.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    return convertidas
+
+
+def migrar_esquema(backend="csv", pasta=".", arquivo_banco="gabinete.db"):
+    """Converte os dados para a versão atual do esquema. Retorna {tabela: linhas convertidas} ({} se já estava)."""
+    if backend == "sqlite":
+        return _migrar_esquema_sqlite(os.path.join(pasta, arquivo_banco))
+    return _migrar_esquema_csv(pasta)
+
+
+# --- MIGRAÇÃO CSV -> SQLITE ---
+def migrar_csv_para_sqlite(pasta=".", arquivo_banco="gabinete.db", substituir=False):
+    """Importa os quatro CSVs existentes para o banco SQLite. Retorna {tabela: linhas}."""
+    origem = abrir_repositorios("csv", pasta)
+    destino = abrir_repositorios("sqlite", pasta, arquivo_banco)
+    resultado = {}
+    for nome, repo_csv in origem.items():
+        if not repo_csv.existe():
+            resultado[nome] = 0
+            continue
+        repo_sql = destino[nome]
+        if repo_sql.existe() and not substituir:
+            raise RuntimeError(f"Tabela '{nome}' já possui dados no banco. Use --substituir para recriar.")
+        df = repo_csv.carregar()
+        repo_sql.substituir(df)
+        resultado[nome] = len(df)
+    return resultado
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ferramentas de armazenamento do Legislativo Digital")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    cmd_migrar = sub.add_parser("migrar", help="Importa os CSVs existentes para o SQLite")
+    cmd_migrar.add_argument("--pasta", default=".")
+    cmd_migrar.add_argument("--banco", default="gabinete.db")
+    cmd_migrar.add_argument("--substituir", action="store_true", help="Apaga o que já estiver no banco")
+    cmd_esquema = sub.add_parser("esquema", help="Converte os dados antigos (datas em texto) para o esquema atual")
+    cmd_esquema.add_argument("--backend", default="csv", choices=["csv", "sqlite"])
+    cmd_esquema.add_argument("--pasta", default=".")
+    cmd_esquema.add_argument("--banco", default="gabinete.db")
+    args = parser.parse_args()
+
+    if args.comando == "migrar":
+        for tabela, linhas in migrar_csv_para_sqlite(args.pasta, args.banco, args.substituir).items():
+            print(f"{tabela}: {linhas} linha(s) importada(s)")
+    elif args.comando == "esquema":
+        convertidas = migrar_esquema(args.backend, args.pasta, args.banco)
+        for tabela, linhas in convertidas.items():
+            print(f"{tabela}: {linhas} linha(s) convertida(s)")
+        if not convertidas:
+            print(f"Nada a converter: os dados já estão no esquema {VERSAO_ESQUEMA}.")
@@ -0,0 +1,295 @@
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from armazenamento import ARQUIVO_VERSAO_ESQUEMA, TABELAS, VERSAO_ESQUEMA, abrir_repositorios, migrar_csv_para_sqlite
+from busca import IndiceBusca, reindexar
+from exportacao import apagar, arquivo_completo, exportar
+from fila_ia import FilaIA, LimitadorTaxa
+from gravacao import gravar_historico, gravar_ideia
+from ia import completar
+from provedores_ia import ProvedorFalso
+from semelhantes import AgrupadorIdeias, reagrupar
+from versoes import conteudo_para_guardar, remontar_versoes
+
+# --- BENCHMARK DO ARMAZENAMENTO ---
+# Gera dados sintéticos (ideias, mural, histórico e logs com N linhas cada),
+# mede as operações que o app.py faz em cada tela e grava o resultado em JSON.
+# Com --base, compara com um resultado anterior e termina com código 1 se
+# alguma operação ficou mais lenta que a tolerância, para rodar antes do deploy.
+#
+#   python benchmark.py --tamanhos 1000,10000 --saida atual.json --base base.json
+#
+# A IA é substituída por geradores locais determinísticos (minuta_falsa e,
+# na fila, o provedores_ia.ProvedorFalso pelo mesmo ia.completar() do app),
+# então nada aqui depende de rede nem de cota da Groq.
+
+TAMANHOS_PADRAO = [1000, 10000, 100000]
+VEREADORES = [f"Vereador Teste {n}" for n in range(1, 10)]
+TIPOS = ["Pedido de Providência", "Pedido de Informação", "Indicação", "Projeto de Lei", "Moção"]
+PALAVRAS = ("rua avenida praça escola posto buraco lâmpada calçada ponte estrada esgoto limpeza árvore poda "
+            "ônibus horário quadra ginásio creche iluminação asfalto sinalização faixa quebra-molas bairro "
+            "centro interior lixo coleta água saúde médico vagas transporte").split()
+LINHAS_MINUTA = 30
+
+
+def _frase(rnd, minimo=6, maximo=14):
+    return " ".join(rnd.choice(PALAVRAS) for _ in range(rnd.randint(minimo, maximo))).capitalize() + "."
+
+
+def minuta_falsa(autor, tipo_doc, assunto, versao=1):
+    """Minuta determinística: o mesmo pedido gera sempre o mesmo texto."""
+    rnd = random.Random(f"{autor}|{tipo_doc}|{assunto}|{versao}")
+    linhas = [f"EXCELENTÍSSIMO SENHOR PRESIDENTE", f"{autor} submete o seguinte {tipo_doc.upper()}:"]
+    linhas += [_frase(rnd) for _ in range(LINHAS_MINUTA)]
+    return "\n".join(linhas)
+
+
+# --- DADOS SINTÉTICOS ---
+def _data(rnd, agora):
+    """Instante (epoch) nos últimos ~2 anos, como o armazenamento guarda."""
+    return int(agora.timestamp()) - rnd.randint(0, 700 * 24 * 3600)
+
+
+def _escrever(caminho, colunas, linhas):
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(colunas)
+        escritor.writerows(linhas)
+
+
+def ideia_sintetica(rnd, agora):
+    return {
+        "Data": _data(rnd, agora), "Nome": f"Cidadão {rnd.randint(1, 5000)}",
+        "Contato": f"549{rnd.randint(10000000, 99999999)}", "Idade": rnd.choice(["18-30 anos", "31-45 anos", "60+"]),
+        "Ideia": _frase(rnd, 8, 30), "Contribuição": _frase(rnd), "Localização": f"Rua {rnd.choice(PALAVRAS)}, {rnd.randint(1, 999)}",
+        "Áreas": "Obras", "Vereador Destino": rnd.choice(VEREADORES), "Concordou Termos": "Sim",
+    }
+
+
+def post_sintetico(rnd, agora):
+    return {"Data": _data(rnd, agora), "Vereador": rnd.choice(VEREADORES),
+            "Titulo": _frase(rnd, 3, 6), "Mensagem": " ".join(_frase(rnd) for _ in range(4))}
+
+
+def log_sintetico(rnd, agora):
+    return {"Data_Hora": _data(rnd, agora), "Usuario": rnd.choice(VEREADORES), "Acao": "Login Realizado"}
+
+
+def _linhas_historico(rnd, agora, total):
+    """Proposições com 1 a 5 versões, guardadas como o app guarda (diferenças)."""
+    feitas = 0
+    numero = 0
+    while feitas < total:
+        numero += 1
+        prop_id = str(20240101000000 + numero)
+        autor, tipo = rnd.choice(VEREADORES), rnd.choice(TIPOS)
+        assunto = _frase(rnd, 8, 20)
+        texto = minuta_falsa(autor, tipo, assunto)
+        anterior = None
+        for versao in range(1, min(rnd.randint(1, 5), total - feitas) + 1):
+            if versao > 1:
+                linhas = texto.split("\n")
+                linhas[rnd.randrange(2, len(linhas))] = _frase(rnd)
+                texto = "\n".join(linhas)
+            yield [prop_id, autor, tipo, assunto, versao,
+                   _data(rnd, agora), conteudo_para_guardar(versao, texto, anterior), ""]
+            anterior = texto
+            feitas += 1
+
+
+def gerar_dados(pasta, linhas, semente=1955):
+    """Escreve os quatro arquivos com `linhas` linhas cada, no formato do backend CSV."""
+    rnd = random.Random(semente)
+    agora = datetime.now()
+    for nome, fabrica in (("ideias", ideia_sintetica), ("mural", post_sintetico), ("logs", log_sintetico)):
+        colunas = TABELAS[nome]["colunas"]
+        _escrever(os.path.join(pasta, TABELAS[nome]["arquivo"]), colunas,
+                  ([fabrica(rnd, agora)[c] for c in colunas] for _ in range(linhas)))
+    _escrever(os.path.join(pasta, TABELAS["historico"]["arquivo"]), TABELAS["historico"]["colunas"],
+              _linhas_historico(rnd, agora, linhas))
+    with open(os.path.join(pasta, ARQUIVO_VERSAO_ESQUEMA), "w", encoding="utf-8") as f:
+        f.write(str(VERSAO_ESQUEMA))  # já gerados no esquema atual: nada a migrar
+
+
+def preparar(pasta, linhas, backend):
+    gerar_dados(pasta, linhas)
+    if backend == "sqlite":
+        migrar_csv_para_sqlite(pasta)
+    repos = abrir_repositorios(backend, pasta)
+    repos["logs"].existe()  # divide o log legado em partições, como na primeira abertura do app
+    repos["mural"].pagina()  # índice do feed, que o app mantém pronto
+    # índice de busca e grupos de ideias já montados, como o app os encontra
+    indice = IndiceBusca(os.path.join(pasta, "busca.db"))
+    reindexar(indice, repos)
+    agrupador = AgrupadorIdeias(os.path.join(pasta, "semelhantes.db"))
+    reagrupar(agrupador, repos["ideias"])
+    return repos, indice, agrupador
+
+
+# --- OPERAÇÕES MEDIDAS (as mesmas funções do app.py, de gravacao.py) ---
+def salvar_historico(repos, indice, autor, tipo, assunto, texto, prop_id, versao, modelo=""):
+    gravar_historico(repos["historico"], indice, autor, tipo, assunto, texto, prop_id, versao,
+                     datetime.now(), modelo)
+
+
+def exportacao(gerar, *args, **kwargs):
+    """Gera o arquivo como o botão de download do app e apaga em seguida."""
+    apagar(gerar(*args, **kwargs))
+
+
+def casos(repos, indice, agrupador, rnd):
+    """{nome: função sem argumentos} de tudo que é medido."""
+    agora = datetime.now()
+    vereador = VEREADORES[0]
+    ultima = repos["historico"].buscar(ordenar_por=None, decrescente=True, limite=1).to_dict("records")[0]
+    prop_historico = ultima["ID_PROPOSICAO"]
+    _, cursor = repos["mural"].pagina(None, None, 10)
+    contador = {"prop": 0, "versao": 5}
+
+    def nova_proposicao():
+        contador["prop"] += 1
+        autor, tipo, assunto = vereador, TIPOS[0], f"Benchmark {contador['prop']}"
+        salvar_historico(repos, indice, autor, tipo, assunto, minuta_falsa(autor, tipo, assunto), f"bench-{contador['prop']}", 1)
+
+    def revisao():
+        # revisões seguidas da mesma proposição: cada uma lê o histórico e grava a diferença
+        contador["versao"] += 1
+        texto = minuta_falsa(vereador, TIPOS[0], "revisão", contador["versao"])
+        salvar_historico(repos, indice, vereador, TIPOS[0], "revisão", texto, prop_historico, int(ultima["VERSAO_NUM"]) + contador["versao"])
+
+    def geracao_fila():
+        # 20 gerações pela fila (3 trabalhadores), com a IA falsa e gravação no histórico
+        fila = FilaIA(3)
+        limitador = LimitadorTaxa(rpm=100000, tpm=10 ** 9)
+        provedor = ProvedorFalso(latencia=0.005)
+
+        def tarefa(n):
+            resultado = completar(provedor, f"{vereador} | {TIPOS[1]} | fila {n}", 0.2, limitador=limitador)
+            salvar_historico(repos, indice, vereador, TIPOS[1], f"fila {n}", resultado.texto, f"fila-{time.time_ns()}-{n}", 1,
+                             resultado.modelo)
+            return resultado
+        ids = [fila.enviar(lambda n=n: tarefa(n)) for n in range(20)]
+        while not all(fila.consultar(i).terminou for i in ids):
+            time.sleep(0.001)
+
+    hoje = agora.date()
+    return {
+        "salvar_ideia": lambda: gravar_ideia(repos["ideias"], indice, agrupador, ideia_sintetica(rnd, agora)),
+        "salvar_post_mural": lambda: repos["mural"].inserir(post_sintetico(rnd, agora)),
+        "registrar_log": lambda: repos["logs"].inserir(log_sintetico(rnd, agora)),
+        "salvar_historico_v1": nova_proposicao,
+        "salvar_historico_revisao": revisao,
+        "feed_mural": lambda: repos["mural"].pagina(None, None, 10),
+        "feed_mural_pagina_2": lambda: repos["mural"].pagina(None, cursor, 10),
+        "feed_mural_vereador": lambda: repos["mural"].pagina(vereador, None, 10),
+        "filtro_mural_vereador": lambda: repos["mural"].buscar({"Vereador": vereador}),
+        "filtro_ideias_vereador": lambda: repos["ideias"].buscar({"Vereador Destino": vereador}),
+        "historico_proposicao": lambda: remontar_versoes(
+            repos["historico"].buscar({"ID_PROPOSICAO": prop_historico}).to_dict("records")),
+        "exportar_ideias_csv": lambda: exportacao(exportar, repos["ideias"], "ideias", "CSV"),
+        "exportar_mural_csv": lambda: exportacao(exportar, repos["mural"], "mural", "CSV"),
+        "exportar_historico_csv": lambda: exportacao(exportar, repos["historico"], "historico", "CSV"),
+        "exportar_logs_30_dias": lambda: exportacao(exportar, repos["logs"], "logs", "CSV", hoje - timedelta(days=30), hoje),
+        "exportar_tudo_zip": lambda: exportacao(arquivo_completo, repos),
+        "resumo_logs": lambda: repos["logs"].resumo(),
+        "geracao_fila_ia_20": geracao_fila,
+    }
+
+
+def medir(funcao, repeticoes):
+    funcao()  # aquecimento: cache do sistema de arquivos, índices, conexões
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {"mediana_ms": round(statistics.median(tempos), 3), "min_ms": round(min(tempos), 3),
+            "max_ms": round(max(tempos), 3)}
+
+
+def rodar(tamanhos, backends, repeticoes, filtro=None, pasta_base=None):
+    resultados = {}
+    for backend in backends:
+        for linhas in tamanhos:
+            pasta = tempfile.mkdtemp(prefix=f"bench_{backend}_{linhas}_", dir=pasta_base)
+            try:
+                print(f"[{backend} / {linhas} linhas] gerando dados...", flush=True)
+                inicio = time.perf_counter()
+                repos, indice, agrupador = preparar(pasta, linhas, backend)
+                print(f"  dados prontos em {time.perf_counter() - inicio:.1f}s", flush=True)
+                medidas = {}
+                for nome, funcao in casos(repos, indice, agrupador, random.Random(linhas)).items():
+                    if filtro and filtro not in nome:
+                        continue
+                    medidas[nome] = medir(funcao, repeticoes)
+                    print(f"  {nome:28s} {medidas[nome]['mediana_ms']:10.2f} ms", flush=True)
+                resultados.setdefault(backend, {})[str(linhas)] = medidas
+            finally:
+                shutil.rmtree(pasta, ignore_errors=True)
+    return resultados
+
+
+def comparar_com_base(atual, base, tolerancia, folga_ms=1.0):
+    """Lista de (backend, linhas, caso, base_ms, atual_ms) que ficaram mais lentos.
+
+    `folga_ms` evita acusar variações de poucos milissegundos em operações rápidas.
+    """
+    regressoes = []
+    for backend, por_tamanho in atual["resultados"].items():
+        for linhas, medidas in por_tamanho.items():
+            anteriores = base.get("resultados", {}).get(backend, {}).get(linhas, {})
+            for caso, medida in medidas.items():
+                if caso not in anteriores:
+                    continue
+                antes, agora = anteriores[caso]["mediana_ms"], medida["mediana_ms"]
+                if agora > antes * (1 + tolerancia) and agora - antes > folga_ms:
+                    regressoes.append((backend, linhas, caso, antes, agora))
+    return regressoes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark do armazenamento do Legislativo Digital")
+    parser.add_argument("--tamanhos", default=",".join(map(str, TAMANHOS_PADRAO)),
+                        help="linhas por arquivo, separadas por vírgula (ex.: 1000,10000,100000,1000000)")
+    parser.add_argument("--backend", default="csv", choices=["csv", "sqlite", "ambos"])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--caso", help="mede só os casos que contêm este texto")
+    parser.add_argument("--pasta", help="onde criar os dados temporários (padrão: pasta temporária do sistema)")
+    parser.add_argument("--saida", default="benchmark_resultado.json")
+    parser.add_argument("--base", help="resultado anterior (JSON) para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="aumento aceito na mediana (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    backends = ["csv", "sqlite"] if args.backend == "ambos" else [args.backend]
+    tamanhos = [int(t) for t in args.tamanhos.split(",")]
+    resultado = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": args.repeticoes,
+        "resultados": rodar(tamanhos, backends, args.repeticoes, args.caso, args.pasta),
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultado gravado em {args.saida}")
+
+    if args.base:
+        with open(args.base, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        regressoes = comparar_com_base(resultado, base, args.tolerancia)
+        for backend, linhas, caso, antes, agora in regressoes:
+            print(f"MAIS LENTO: [{backend} / {linhas}] {caso}: {antes:.2f} ms -> {agora:.2f} ms ({agora / antes:.1f}x)")
+        if regressoes:
+            sys.exit(1)
+        print(f"Sem regressões acima de {args.tolerancia:.0%} em relação a {args.base}")
@@ -0,0 +1,271 @@
+import json
+import re
+import unicodedata
+
+# --- BUSCA TEXTUAL (HISTÓRICO DE PROPOSIÇÕES + BANCO DE IDEIAS) ---
+# Índice invertido em SQLite FTS5 (arquivo busca.db), com ranking BM25.
+# O texto é normalizado aqui antes de entrar no índice e antes de cada
+# consulta: minúsculas, sem acentos, sem palavras vazias e com um radical
+# simples para o português ("iluminação" e "iluminações" viram a mesma
+# palavra). O índice é atualizado pelas funções de salvamento; a reindexação
+# completa (python busca.py reindexar) só é necessária uma vez.
+
+PALAVRAS_VAZIAS = set("""
+a ao aos as com da das de do dos e em na nas no nos o os ou para pela pelas pelo pelos por que
+se sem sua suas seu seus um uma umas uns ja mais muito nao sim ser ter foi sao esta este isso
+""".split())
+
+_PALAVRA = re.compile(r"\w+", re.UNICODE)
+VERSAO_CHAVES = 2  # 2: ideias repetidas (mesmo conteúdo) têm chaves próprias; índices anteriores são refeitos
+
+# (sufixo, substituto) aplicados em ordem; só o primeiro que casar
+_PLURAIS = [("coes", "cao"), ("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"),
+            ("ois", "ol"), ("res", "r"), ("zes", "z"), ("ns", "m"), ("s", "")]
+_SUFIXOS = ["mente", "amento", "imento", "acao", "icao", "idade", "ismo", "ista", "avel", "ivel"]
+
+
+def sem_acentos(texto):
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def radical(palavra):
+    """Radical leve: tira plural, alguns sufixos comuns e a vogal final."""
+    if len(palavra) <= 3 or palavra.isdigit():
+        return palavra
+    for sufixo, troca in _PLURAIS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 3:
+            palavra = palavra[: -len(sufixo)] + troca
+            break
+    for sufixo in _SUFIXOS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 4:
+            palavra = palavra[: -len(sufixo)]
+            break
+    if len(palavra) > 4 and palavra[-1] in "aeo":
+        palavra = palavra[:-1]
+    return palavra
+
+
+def termos(texto):
+    """Lista de termos normalizados de um texto."""
+    if texto is None or texto != texto:
+        return []
+    palavras = _PALAVRA.findall(sem_acentos(str(texto)).lower())
+    return [radical(p) for p in palavras if p not in PALAVRAS_VAZIAS]
+
+
+class IndiceBusca:
+    def __init__(self, caminho="busca.db"):
+        from armazenamento import BancoSQLite
+
+        self.banco = BancoSQLite(caminho)
+        con = self.banco.conexao()
+        with con:
+            colunas = [linha[1] for linha in con.execute("PRAGMA table_info(documentos)")]
+            if colunas and "vereador" not in colunas:
+                # índice de antes da coluna vereador: fica vazio e é refeito (reindexar) na abertura
+                con.execute("DROP TABLE documentos")
+                con.execute("DROP TABLE IF EXISTS chaves")
+            # vereador: autor da proposição ou destinatário da ideia, filtrado antes do LIMIT
+            con.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS documentos USING fts5("
+                "chave UNINDEXED, tipo UNINDEXED, dados UNINDEXED, vereador UNINDEXED, titulo, conteudo, "
+                "tokenize='unicode61')"
+            )
+            # chave -> rowid do documento, para substituir sem varrer o índice
+            con.execute("CREATE TABLE IF NOT EXISTS chaves (chave TEXT PRIMARY KEY, documento INTEGER)")
+
+    def vazio(self):
+        return self.banco.conexao().execute("SELECT 1 FROM documentos LIMIT 1").fetchone() is None
+
+    def atualizado(self):
+        """Montado com o esquema atual dos dados (ver armazenamento.VERSAO_ESQUEMA)."""
+        from armazenamento import VERSAO_ESQUEMA
+
+        con = self.banco.conexao()
+        return (con.execute("PRAGMA user_version").fetchone()[0] >= VERSAO_ESQUEMA
+                and con.execute("PRAGMA application_id").fetchone()[0] >= VERSAO_CHAVES)
+
+    def _repeticoes(self, con, chave):
+        """{ocorrência: chave} de `chave` e das suas repetições ("chave:1", "chave:2"...) já no índice."""
+        usadas = {}
+        for (outra,) in con.execute("SELECT chave FROM chaves WHERE chave = ? OR (chave > ? AND chave < ?)",
+                                    (chave, chave + ":", chave + ";")):
+            usadas[0 if outra == chave else int(outra[len(chave) + 1:])] = outra
+        return usadas
+
+    def chave_em_uso(self, chave):
+        """A última repetição de `chave` no índice (a própria `chave` se não houver nenhuma)."""
+        usadas = self._repeticoes(self.banco.conexao(), chave)
+        return usadas[max(usadas)] if usadas else chave
+
+    def indexar(self, chave, tipo, titulo, conteudo, dados, vereador="", nova=False):
+        """Inclui ou substitui o documento `chave`. `dados` volta junto nos resultados.
+
+        Com `nova=True`, um documento que já tenha essa chave não é substituído:
+        o novo recebe a próxima ocorrência livre ("chave:1"...). Devolve a chave usada.
+        """
+        con = self.banco.conexao()
+        # IMMEDIATE: duas ideias iguais gravadas ao mesmo tempo não ficam com a mesma ocorrência
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if nova:
+                usadas = self._repeticoes(con, chave)
+                chave = com_ocorrencia(chave, next(n for n in range(len(usadas) + 1) if n not in usadas))
+            self._remover(con, chave)
+            cur = con.execute(
+                "INSERT INTO documentos (chave, tipo, dados, vereador, titulo, conteudo) VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, tipo, json.dumps(dados, ensure_ascii=False, default=str), str(vereador or ""),
+                 " ".join(termos(titulo)), " ".join(termos(conteudo))),
+            )
+            con.execute("INSERT INTO chaves (chave, documento) VALUES (?, ?)", (chave, cur.lastrowid))
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        return chave
+
+    def _remover(self, con, chave):
+        linha = con.execute("SELECT documento FROM chaves WHERE chave = ?", (chave,)).fetchone()
+        if linha:
+            con.execute("DELETE FROM documentos WHERE rowid = ?", (linha[0],))
+            con.execute("DELETE FROM chaves WHERE chave = ?", (chave,))
+
+    def remover(self, chave):
+        con = self.banco.conexao()
+        with con:
+            self._remover(con, chave)
+
+    def buscar(self, consulta, tipo=None, limite=20, vereador=None):
+        """Documentos mais relevantes (BM25; o título pesa o dobro do conteúdo).
+
+        Com `vereador`, só as proposições dele e as ideias enviadas a ele.
+        """
+        palavras = sorted(set(termos(consulta)))
+        if not palavras:
+            return []
+        expressao = " OR ".join('"' + p.replace('"', '""') + '"' for p in palavras)
+        sql = ("SELECT chave, tipo, dados, bm25(documentos, 0, 0, 0, 0, 2.0, 1.0) AS pontuacao "
+               "FROM documentos WHERE documentos MATCH ?")
+        parametros = [expressao]
+        if tipo:
+            sql += " AND tipo = ?"
+            parametros.append(tipo)
+        if vereador:
+            sql += " AND vereador = ?"
+            parametros.append(str(vereador))
+        sql += " ORDER BY pontuacao LIMIT ?"
+        parametros.append(int(limite))
+        return [
+            {"chave": chave, "tipo": t, "dados": json.loads(dados), "pontuacao": -pontuacao}
+            for chave, t, dados, pontuacao in self.banco.conexao().execute(sql, parametros)
+        ]
+
+
+# --- DOCUMENTOS DO SISTEMA ---
+def com_ocorrencia(chave, ocorrencia):
+    return chave if not ocorrencia else f"{chave}:{ocorrencia}"
+
+
+def chave_ideia(registro, ocorrencia=0):
+    """Chave da ideia no índice e nos grupos (semelhantes.py).
+
+    A ideia não tem ID: a chave é o carimbo do conteúdo. Linhas iguais (mesmo
+    texto, mesma hora, cidadão anônimo) são diferenciadas pela ocorrência: a
+    primeira fica sem sufixo, as repetições ganham ":1", ":2"...
+    """
+    from armazenamento import TABELAS, carimbo
+
+    chave = "ideia:" + carimbo(registro, TABELAS["ideias"]["colunas"], TABELAS["ideias"]["tipos"])
+    return com_ocorrencia(chave, ocorrencia)
+
+
+def chaves_ideias(registros):
+    """Chave de cada registro, na ordem do banco de ideias, numerando as repetições."""
+    vistas = {}
+    chaves = []
+    for registro in registros:
+        chave = chave_ideia(registro)
+        vistas[chave] = vistas.get(chave, -1) + 1
+        chaves.append(com_ocorrencia(chave, vistas[chave]))
+    return chaves
+
+
+def indexar_proposicao(indice, prop_id, autor, tipo_doc, assunto, texto, versao, data_hora=None):
+    from armazenamento import para_epoch
+
+    indice.indexar(
+        f"proposicao:{prop_id}", "proposicao", assunto, texto,
+        {"ID_PROPOSICAO": str(prop_id), "VEREADOR": str(autor), "TIPO_DOC": str(tipo_doc),
+         "ASSUNTO": assunto, "VERSAO_NUM": int(versao), "DATA_HORA": para_epoch(data_hora)},
+        autor,
+    )
+
+
+def indexar_ideia(indice, registro, chave=None, nova=False):
+    """Indexa a ideia com `chave` (padrão: chave_ideia). `nova=True` para uma linha recém-gravada:
+    se já houver ideia igual no índice, esta entra como repetição. Devolve a chave usada."""
+    from armazenamento import TABELAS, registro_guardavel
+
+    conteudo = " ".join(str(registro.get(c) or "") for c in ("Contribuição", "Localização"))
+    dados = registro_guardavel(registro, TABELAS["ideias"]["tipos"])
+    return indice.indexar(chave or chave_ideia(registro), "ideia", registro.get("Ideia") or "", conteudo, dados,
+                          registro.get("Vereador Destino"), nova)
+
+
+def reindexar(indice, repos):
+    """Refaz o índice a partir do histórico e do banco de ideias. Retorna {tipo: documentos}."""
+    from armazenamento import VERSAO_ESQUEMA
+    from versoes import remontar_versoes
+
+    con = indice.banco.conexao()
+    with con:
+        con.execute("DELETE FROM documentos")
+        con.execute("DELETE FROM chaves")
+        con.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        con.execute(f"PRAGMA application_id = {VERSAO_CHAVES}")
+    total = {"proposicao": 0, "ideia": 0}
+    if repos["historico"].existe():
+        historico = repos["historico"].carregar()
+        for prop_id, grupo in historico.groupby("ID_PROPOSICAO"):
+            linhas = grupo.to_dict("records")
+            versoes = remontar_versoes(linhas)
+            primeira = min(linhas, key=lambda l: int(l["VERSAO_NUM"]))
+            ultima = max(linhas, key=lambda l: int(l["VERSAO_NUM"]))
+            indexar_proposicao(indice, prop_id, primeira["VEREADOR"], primeira["TIPO_DOC"], primeira["ASSUNTO"],
+                               versoes[int(ultima["VERSAO_NUM"])], ultima["VERSAO_NUM"], ultima["DATA_HORA"])
+            total["proposicao"] += 1
+    if repos["ideias"].existe():
+        registros = repos["ideias"].carregar().to_dict("records")
+        for registro, chave in zip(registros, chaves_ideias(registros)):
+            indexar_ideia(indice, registro, chave)
+            total["ideia"] += 1
+    return total
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from armazenamento import abrir_repositorios
+
+    parser = argparse.ArgumentParser(description="Índice de busca do Legislativo Digital")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    cmd = sub.add_parser("reindexar", help="Refaz o índice a partir dos dados salvos")
+    cmd.add_argument("--backend", default="csv", choices=["csv", "sqlite"])
+    cmd.add_argument("--pasta", default=".", help="pasta dos dados da câmara (o índice fica nela)")
+    cmd.add_argument("--indice", default="busca.db")
+    cmd_buscar = sub.add_parser("buscar", help="Faz uma consulta no índice")
+    cmd_buscar.add_argument("consulta")
+    cmd_buscar.add_argument("--pasta", default=".")
+    cmd_buscar.add_argument("--indice", default="busca.db")
+    cmd_buscar.add_argument("--vereador", help="só as proposições do vereador e as ideias enviadas a ele")
+    args = parser.parse_args()
+
+    os.makedirs(args.pasta, exist_ok=True)
+    indice = IndiceBusca(os.path.join(args.pasta, args.indice))
+    if args.comando == "reindexar":
+        for tipo, n in reindexar(indice, abrir_repositorios(args.backend, args.pasta)).items():
+            print(f"{tipo}: {n} documento(s)")
+    else:
+        for r in indice.buscar(args.consulta, vereador=args.vereador):
+            print(f"{r['pontuacao']:.2f}  {r['chave']}  {r['dados'].get('ASSUNTO') or r['dados'].get('Ideia')}")
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- CACHE DAS RESPOSTAS DA IA ---
+# A chave é o hash do prompt já montado + provedor:modelo + temperatura,
+# então o mesmo pedido (mesmo autor, tipo e assunto, ou mesma revisão do
+# mesmo texto) não gasta cota da Groq de novo. Dois níveis: memória (LRU) e disco (limitado
+# em bytes, os arquivos mais antigos saem primeiro).
+
+
+def chave_cache(prompt, modelo, temperatura):
+    conteudo = json.dumps([prompt, modelo, float(temperatura)], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class CacheIA:
+    def __init__(self, pasta="cache_ia", max_itens_memoria=256, max_bytes_disco=50 * 1024 * 1024,
+                 ttl_segundos=7 * 24 * 3600):
+        self.pasta = pasta
+        self.max_itens_memoria = max_itens_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self.ttl_segundos = ttl_segundos
+        self._memoria = OrderedDict()  # chave -> (criado_em, texto)
+        self._trava = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self._bytes_disco = None
+
+    # --- memória ---
+    def _ler_memoria(self, chave, agora):
+        item = self._memoria.get(chave)
+        if item is None:
+            return None
+        if agora - item[0] > self.ttl_segundos:
+            del self._memoria[chave]
+            return None
+        self._memoria.move_to_end(chave)
+        return item
+
+    def _gravar_memoria(self, chave, item):
+        self._memoria[chave] = item
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_itens_memoria:
+            self._memoria.popitem(last=False)
+
+    # --- disco ---
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave[:2], chave + ".json")
+
+    def _ler_disco(self, chave, agora):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if agora - dados["criado_em"] > self.ttl_segundos:
+            self._remover_arquivo(caminho)
+            return None
+        return dados["criado_em"], dados["texto"]
+
+    def _arquivos_disco(self):
+        for raiz, _, nomes in os.walk(self.pasta):
+            for nome in nomes:
+                if nome.endswith(".json"):
+                    yield os.path.join(raiz, nome)
+
+    def _remover_arquivo(self, caminho):
+        try:
+            tamanho = os.path.getsize(caminho)
+            os.remove(caminho)
+            if self._bytes_disco is not None:
+                self._bytes_disco -= tamanho
+        except OSError:
+            pass
+
+    def _gravar_disco(self, chave, item):
+        if self._bytes_disco is None:
+            self._bytes_disco = sum(os.path.getsize(c) for c in self._arquivos_disco())
+        caminho = self._caminho(chave)
+        try:
+            anterior = os.path.getsize(caminho)  # regravação (ex.: "forçar nova"): o arquivo antigo sai da conta
+        except OSError:
+            anterior = 0
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        conteudo = json.dumps({"criado_em": item[0], "texto": item[1]}, ensure_ascii=False).encode("utf-8")
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+        self._bytes_disco += len(conteudo) - anterior
+        if self._bytes_disco > self.max_bytes_disco:
+            self._despejar_disco()
+
+    def _despejar_disco(self):
+        """Remove os arquivos mais antigos até voltar a 90% do limite."""
+        arquivos = sorted(self._arquivos_disco(), key=lambda c: os.path.getmtime(c))
+        alvo = self.max_bytes_disco * 0.9
+        for caminho in arquivos:
+            if self._bytes_disco <= alvo:
+                break
+            self._remover_arquivo(caminho)
+
+    # --- interface ---
+    def obter(self, chave):
+        """Texto guardado para a chave, ou None."""
+        achado = self.obter_primeira([chave])
+        return None if achado is None else achado[1]
+
+    def obter_primeira(self, chaves):
+        """(posição, texto) da primeira das chaves que estiver guardada, ou None.
+
+        Conta como uma consulta só (um acerto ou uma falha), por mais chaves que tenha.
+        """
+        agora = time.time()
+        with self._trava:
+            for posicao, chave in enumerate(chaves):
+                item = self._ler_memoria(chave, agora)
+                if item is not None:
+                    self.acertos_memoria += 1
+                    return posicao, item[1]
+                item = self._ler_disco(chave, agora)
+                if item is not None:
+                    self.acertos_disco += 1
+                    self._gravar_memoria(chave, item)
+                    return posicao, item[1]
+            self.falhas += 1
+            return None
+
+    def guardar(self, chave, texto):
+        item = (time.time(), texto)
+        with self._trava:
+            self._gravar_memoria(chave, item)
+            try:
+                self._gravar_disco(chave, item)
+            except OSError:
+                pass  # sem disco o cache segue só em memória
+
+    def limpar(self):
+        with self._trava:
+            self._memoria.clear()
+            for caminho in list(self._arquivos_disco()):
+                self._remover_arquivo(caminho)
+
+    def estatisticas(self):
+        with self._trava:
+            total = self.acertos_memoria + self.acertos_disco + self.falhas
+            return {
+                "acertos_memoria": self.acertos_memoria,
+                "acertos_disco": self.acertos_disco,
+                "falhas": self.falhas,
+                "taxa_acerto": (self.acertos_memoria + self.acertos_disco) / total if total else 0.0,
+                "itens_memoria": len(self._memoria),
+                "bytes_disco": self._bytes_disco,
+            }
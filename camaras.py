@@ -0,0 +1,140 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from string import Template
+
+# --- CÂMARAS ---
+# O mesmo servidor atende várias câmaras. Cada uma tem um arquivo
+# camaras/<id>.json com nome, município, plenário, vereadores, links e, se
+# quiser, textos próprios para os prompts da IA e para os modelos das minutas.
+# O arquivo é lido uma vez por processo (carregar_camara) e a câmara vem da URL
+# (?camara=<id>). Os dados de cada câmara ficam na sua pasta (padrão:
+# dados/<id>/): CSVs, banco, logs, travas e índices de uma nunca tocam os de
+# outra. Nada é aberto antes da primeira visita a uma câmara, então uma
+# câmara cadastrada e sem uso não gasta memória além destes poucos campos.
+
+PASTA_CAMARAS = "camaras"
+PASTA_DADOS = "dados"
+CAMARA_PADRAO = "espumoso"
+_ID_VALIDO = re.compile(r"^[a-z0-9_-]+$")
+SENHAS = ["vereador", "admin"]  # área do vereador e área administrativa
+
+# Textos dos prompts. Além dos campos de cada chamada, todos recebem
+# $camara, $municipio e $uf; a câmara pode trocar qualquer um em "prompts".
+PROMPTS = {
+    "documento": """
+    Atue como um Procurador Jurídico Sênior da $camara/$uf.
+    Redija minuta de $tipo_doc com alto rigor técnico e seja formal.
+    AUTOR: $autor. 
+    ASSUNTO: $assunto.
+    
+    ESCREVA SOMENTE ESTAS TRÊS SEÇÕES, cada uma entre as marcas indicadas:
+    [[ementa]] EMENTA: (Caixa alta, resumo em um único parágrafo. Revise a ortografia). [[/ementa]]
+    [[articulado]] TEXTO (AQUI ENTRAM OS ARTIGOS OU O PEDIDO): $regras [[/articulado]]
+    [[justificativa]] Texto dissertativo-argumentativo formal defendendo a proposta, sem título. Foque na relevância social, jurídica e no interesse público. [[/justificativa]]
+    
+    NÃO escreva cabeçalho, preâmbulo, data nem assinatura: eles são incluídos automaticamente.
+    IMPORTANTE: Deixe uma linha em branco entre parágrafos para facilitar leitura no celular.
+    PROIBIDO: Não gere NENHUMA tag HTML, CSS ou formatação de código. Apenas texto puro.
+    """,
+    "revisao": """
+    Você é um Procurador Jurídico Sênior do Poder Legislativo de $municipio/$uf. REVISE a minuta abaixo.
+    Vereador: $autor | Tipo: $tipo_doc | Pedido: $pedido
+    ---
+    TEXTO ATUAL:
+    $texto
+    ---
+    Gere a NOVA VERSÃO mantendo a estrutura formal. Correção gramatical impecável.
+    Adicione DUAS LINHAS EM BRANCO entre seções para leitura.
+    PROIBIDO USAR HTML.
+    """,
+    "revisao_parcial": """
+    Você é um Procurador Jurídico Sênior do Poder Legislativo de $municipio/$uf. REVISE SOMENTE as seções abaixo de uma minuta de $tipo_doc.
+    Vereador: $autor | Pedido: $pedido
+    $contexto
+    SEÇÕES A REVISAR:
+$blocos
+
+    Devolva SOMENTE as seções revisadas, cada uma entre as mesmas marcas [[nome]] e [[/nome]], sem comentários.
+    Mantenha o estilo formal. Correção gramatical impecável.
+    PROIBIDO USAR HTML.
+    """,
+}
+
+
+@dataclass(frozen=True, eq=False)  # eq=False: uma câmara carregada é única e serve de chave de cache
+class Camara:
+    id: str
+    nome: str  # "Câmara Municipal de Espumoso"
+    municipio: str
+    uf: str
+    vereadores: tuple  # "Vereador Fulano (PARTIDO)": o partido sai dos parênteses
+    plenario: str = "Plenário"
+    estado: str = ""
+    juridico: tuple = ("Assessoria Jurídica",)
+    site: str = ""
+    whatsapp: str = ""
+    protocolo: dict = field(default_factory=dict)  # sistema onde a minuta é protocolada: {"nome", "url"}
+    redes: dict = field(default_factory=dict)  # {"facebook": url, "instagram": url, ...}
+    brasao: str = ""
+    pasta: str = ""  # onde ficam os dados; vazio = dados/<id>
+    senhas: dict = field(default_factory=dict)  # {"vereador": ..., "admin": ...}, obrigatórias no arquivo
+    prompts: dict = field(default_factory=dict)
+    modelos: dict = field(default_factory=dict)  # por tipo de documento, por cima de modelos.MODELOS
+
+    @property
+    def login(self):
+        return list(self.vereadores) + list(self.juridico)
+
+    def prompt(self, nome, **valores):
+        """Texto do prompt `nome` com os dados da câmara e os da chamada."""
+        texto = self.prompts.get(nome) or PROMPTS[nome]
+        return Template(texto).safe_substitute(camara=self.nome, municipio=self.municipio, uf=self.uf, **valores)
+
+    def valores_modelo(self):
+        """Dados da câmara usados nos modelos fixos das minutas (cabeçalho e fechamento)."""
+        return {"camara": self.nome.upper(), "municipio": self.municipio.upper(), "uf": self.uf,
+                "plenario": self.plenario}
+
+
+def ids_camaras(pasta=PASTA_CAMARAS):
+    """IDs das câmaras cadastradas (um arquivo <id>.json em camaras/)."""
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(nome[:-5] for nome in os.listdir(pasta) if nome.endswith(".json") and _ID_VALIDO.match(nome[:-5]))
+
+
+@lru_cache(maxsize=None)
+def carregar_camara(id_camara, pasta=PASTA_CAMARAS):
+    """Câmara `id_camara`, lida do disco só na primeira vez. KeyError se não existir."""
+    if not _ID_VALIDO.match(id_camara or ""):
+        raise KeyError(id_camara)
+    caminho = os.path.join(pasta, f"{id_camara}.json")
+    if not os.path.exists(caminho):
+        raise KeyError(id_camara)
+    with open(caminho, encoding="utf-8") as f:
+        dados = json.load(f)
+    for campo in ("vereadores", "juridico"):
+        if campo in dados:
+            dados[campo] = tuple(dados[campo])
+    faltando = [senha for senha in SENHAS if not (dados.get("senhas") or {}).get(senha)]
+    if faltando:  # nunca vale a senha de outra câmara
+        raise ValueError(f"{caminho}: faltam as senhas de acesso em \"senhas\": {', '.join(faltando)}")
+    desconhecidos = set(dados.get("prompts", {})) - set(PROMPTS)
+    if desconhecidos:
+        raise ValueError(f"{caminho}: prompt(s) desconhecido(s): {', '.join(sorted(desconhecidos))}")
+    dados["pasta"] = dados.get("pasta") or os.path.join(PASTA_DADOS, id_camara)
+    return Camara(id=id_camara, **dados)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Câmaras atendidas pelo Legislativo Digital")
+    parser.add_argument("--pasta", default=PASTA_CAMARAS)
+    args = parser.parse_args()
+    for id_camara in ids_camaras(args.pasta):
+        camara = carregar_camara(id_camara, args.pasta)
+        print(f"{id_camara}: {camara.nome}/{camara.uf} · {len(camara.vereadores)} vereador(es) · dados em {camara.pasta}")
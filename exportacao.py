@@ -0,0 +1,253 @@
+import gzip
+import importlib.util
+import os
+import tempfile
+import time
+import zipfile
+from collections import OrderedDict
+
+from armazenamento import FUSO, LINHAS_POR_LOTE, dias_locais
+from versoes import aplicar_delta, decodificar_delta, eh_delta, remontar_versao
+
+# --- EXPORTAÇÕES ---
+# Os arquivos para download são montados só quando alguém pede, lendo o
+# repositório em lotes (repo.lotes) e gravando cada lote direto num arquivo
+# temporário: a memória usada é a de um lote, não a da tabela inteira. O
+# período e o vereador são filtrados lote a lote; o log de acessos já pula
+# os meses fora do período. As datas saem em ISO 8601 com fuso no CSV, como
+# timestamp com fuso no Parquet e na hora de São Paulo no XLSX. Parquet e
+# XLSX dependem de pacotes opcionais (pyarrow; xlsxwriter ou openpyxl) e só
+# aparecem quando estão instalados. No histórico, cada versão sai com o texto
+# inteiro da minuta, nunca com a diferença guardada (ver versoes.py).
+
+EXPORTAVEIS = {
+    "ideias": {"arquivo": "banco_de_ideias", "data": "Data", "vereador": "Vereador Destino"},
+    "mural": {"arquivo": "mural_posts", "data": "Data", "vereador": "Vereador"},
+    "historico": {"arquivo": "historico_proposicoes", "data": "DATA_HORA", "vereador": "VEREADOR"},
+    "logs": {"arquivo": "log_acessos", "data": "Data_Hora", "vereador": "Usuario", "periodo_no_repositorio": True},
+}
+
+FORMATOS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV comprimido (.gz)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Excel (XLSX)": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+MAX_LINHAS_XLSX = 1048575  # limite de linhas de uma planilha, fora o cabeçalho
+PASTA_TEMPORARIA = os.path.join(tempfile.gettempdir(), "legislativo_exportacoes")
+IDADE_MAXIMA = 3600  # segundos até um arquivo gerado ser apagado
+PROPOSICOES_RECENTES = 1000  # últimos textos guardados para remontar as revisões do histórico
+
+
+def _tem_pacote(nome):
+    return importlib.util.find_spec(nome) is not None
+
+
+def _motor_excel():
+    if _tem_pacote("xlsxwriter"):
+        return "xlsxwriter"
+    if _tem_pacote("openpyxl"):
+        return "openpyxl"
+    return None
+
+
+def formatos_disponiveis():
+    """Nomes dos formatos que podem ser gerados com os pacotes instalados."""
+    formatos = ["CSV", "CSV comprimido (.gz)"]
+    if _tem_pacote("pyarrow"):
+        formatos.append("Parquet")
+    if _motor_excel():
+        formatos.append("Excel (XLSX)")
+    return formatos
+
+
+def _preenchido(valor):
+    return isinstance(valor, str) and valor != ""
+
+
+def _com_textos_completos(repo, lotes):
+    """Troca as diferenças da coluna MINUTA_TEXTO pelo texto inteiro de cada versão.
+
+    Também preenche o ASSUNTO das revisões gravadas sem ele (só a versão 1 o
+    guardava). As revisões costumam vir logo depois da versão anterior, então
+    guardamos o último texto das PROPOSICOES_RECENTES proposições vistas;
+    quando a versão anterior não está entre elas, a proposição é relida do
+    repositório.
+    """
+    recentes = OrderedDict()  # ID_PROPOSICAO -> (versão, texto, assunto)
+    for df in lotes:
+        textos, assuntos = [], []
+        for prop_id, versao, valor, assunto in zip(df["ID_PROPOSICAO"], df["VERSAO_NUM"], df["MINUTA_TEXTO"],
+                                                   df["ASSUNTO"]):
+            versao = int(versao)
+            anterior = recentes.get(prop_id)
+            if anterior and anterior[0] != versao - 1:
+                anterior = None
+            if anterior is None and versao > 1 and (eh_delta(valor) or not _preenchido(assunto)):
+                linhas = sorted(repo.buscar({"ID_PROPOSICAO": prop_id}).to_dict("records"),
+                                key=lambda l: int(l["VERSAO_NUM"]))
+                assunto_original = next((l["ASSUNTO"] for l in linhas if _preenchido(l["ASSUNTO"])), "")
+                anterior = (versao - 1, remontar_versao(linhas, versao - 1) or "", assunto_original)
+            if eh_delta(valor):
+                texto = aplicar_delta(anterior[1] if anterior else "", decodificar_delta(valor))
+                textos.append(texto)
+            else:
+                texto = valor if isinstance(valor, str) else ""
+                textos.append(valor)
+            if not _preenchido(assunto) and anterior:
+                assunto = anterior[2]
+            assuntos.append(assunto)
+            recentes[prop_id] = (versao, texto, assunto if _preenchido(assunto) else "")
+            recentes.move_to_end(prop_id)
+            if len(recentes) > PROPOSICOES_RECENTES:
+                recentes.popitem(last=False)
+        df = df.copy()
+        df["MINUTA_TEXTO"] = textos
+        df["ASSUNTO"] = assuntos
+        yield df
+
+
+def lotes_filtrados(repo, tabela, inicio=None, fim=None, vereador=None, tamanho=LINHAS_POR_LOTE):
+    """Lotes do repositório já filtrados por período (datetime.date) e vereador."""
+    spec = EXPORTAVEIS[tabela]
+    if spec.get("periodo_no_repositorio"):
+        lotes, filtrar_datas = repo.lotes(tamanho, inicio, fim), False
+    else:
+        lotes, filtrar_datas = repo.lotes(tamanho), bool(inicio or fim)
+    if tabela == "historico":  # antes dos filtros: a versão anterior pode estar fora do período
+        lotes = _com_textos_completos(repo, lotes)
+    de = inicio.isoformat() if inicio else ""
+    ate = fim.isoformat() if fim else "9999-12-31"
+    for df in lotes:
+        df = df.reindex(columns=repo.colunas)
+        if filtrar_datas:
+            dias = dias_locais(df[spec["data"]]).fillna("")
+            df = df[(dias >= de) & (dias <= ate)]
+        if vereador:
+            df = df[df[spec["vereador"]] == vereador]
+        if len(df):
+            yield df
+
+
+def _escrever_csv(lotes, destino, colunas):
+    linhas = 0
+    for df in lotes:
+        destino.write(df.to_csv(index=False, header=linhas == 0).encode("utf-8"))
+        linhas += len(df)
+    if linhas == 0:
+        destino.write((",".join(colunas) + "\n").encode("utf-8"))
+    return linhas
+
+
+def _escrever_parquet(lotes, destino, colunas, tipos):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tipos_arrow = {"inteiro": pa.int64(), "momento": pa.timestamp("s", tz=FUSO)}
+    esquema = pa.schema([(c, tipos_arrow.get(tipos.get(c), pa.string())) for c in colunas])
+    linhas = 0
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for df in lotes:
+            df = df.copy()
+            for c in colunas:
+                if tipos.get(c) not in tipos_arrow:
+                    df[c] = df[c].astype("string")  # categorias também: o dicionário muda de um lote para outro
+            escritor.write_table(pa.Table.from_pandas(df, schema=esquema, preserve_index=False))
+            linhas += len(df)
+        if linhas == 0:
+            escritor.write_table(esquema.empty_table())
+    return linhas
+
+
+def _escrever_xlsx(lotes, destino, colunas):
+    import pandas as pd
+
+    motor = _motor_excel()
+    opcoes = {"options": {"constant_memory": True}} if motor == "xlsxwriter" else {}
+    linhas = 0
+    with pd.ExcelWriter(destino, engine=motor, engine_kwargs=opcoes) as planilha:
+        for df in lotes:
+            df = df.copy()
+            for c in df.columns:
+                if isinstance(df[c].dtype, pd.DatetimeTZDtype):
+                    df[c] = df[c].dt.tz_localize(None)  # o Excel não guarda fuso: vai a hora de São Paulo
+            if linhas + len(df) > MAX_LINHAS_XLSX:
+                raise ValueError(f"O Excel aceita até {MAX_LINHAS_XLSX} linhas. Use CSV ou Parquet, ou diminua o período.")
+            df.to_excel(planilha, index=False, header=linhas == 0, startrow=0 if linhas == 0 else linhas + 1)
+            linhas += len(df)
+        if linhas == 0:
+            pd.DataFrame(columns=colunas).to_excel(planilha, index=False)
+    return linhas
+
+
+def escrever(lotes, formato, destino, colunas, tipos=None):
+    """Grava os lotes em `destino` (arquivo binário aberto). Retorna o número de linhas."""
+    tipos = tipos or {}
+    if formato == "CSV":
+        return _escrever_csv(lotes, destino, colunas)
+    if formato == "CSV comprimido (.gz)":
+        with gzip.GzipFile(fileobj=destino, mode="wb") as comprimido:
+            return _escrever_csv(lotes, comprimido, colunas)
+    if formato == "Parquet":
+        return _escrever_parquet(lotes, destino, colunas, tipos)
+    if formato == "Excel (XLSX)":
+        return _escrever_xlsx(lotes, destino, colunas)
+    raise ValueError(f"Formato desconhecido: {formato}")
+
+
+def _arquivo_temporario(sufixo):
+    """Caminho novo na pasta temporária, apagando antes os arquivos gerados há mais de IDADE_MAXIMA."""
+    os.makedirs(PASTA_TEMPORARIA, exist_ok=True)
+    limite = time.time() - IDADE_MAXIMA
+    for nome in os.listdir(PASTA_TEMPORARIA):
+        caminho = os.path.join(PASTA_TEMPORARIA, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass  # outro processo apagou antes
+    fd, caminho = tempfile.mkstemp(suffix=sufixo, dir=PASTA_TEMPORARIA)
+    os.close(fd)
+    return caminho
+
+
+def apagar(exportacao):
+    try:
+        os.remove(exportacao["caminho"])
+    except (OSError, KeyError, TypeError):
+        pass
+
+
+def exportar(repo, tabela, formato, inicio=None, fim=None, vereador=None):
+    """Gera o arquivo de uma tabela. Retorna {"caminho", "nome", "mime", "linhas"}."""
+    sufixo, mime = FORMATOS[formato]
+    caminho = _arquivo_temporario(sufixo)
+    try:
+        with open(caminho, "wb") as destino:
+            linhas = escrever(lotes_filtrados(repo, tabela, inicio, fim, vereador), formato, destino,
+                              repo.colunas, repo.tipos)
+    except Exception:
+        os.remove(caminho)
+        raise
+    nome = EXPORTAVEIS[tabela]["arquivo"]
+    if inicio or fim:
+        nome += f"_{inicio or ''}_a_{fim or ''}"
+    return {"caminho": caminho, "nome": nome + sufixo, "mime": mime, "linhas": linhas}
+
+
+def arquivo_completo(repos):
+    """Zip com as quatro tabelas em CSV, cada uma gravada em lotes direto dentro do zip."""
+    caminho = _arquivo_temporario(".zip")
+    linhas = 0
+    try:
+        with zipfile.ZipFile(caminho, "w", compression=zipfile.ZIP_DEFLATED) as arquivo:
+            for tabela, spec in EXPORTAVEIS.items():
+                repo = repos[tabela]
+                with arquivo.open(spec["arquivo"] + ".csv", "w", force_zip64=True) as destino:
+                    linhas += _escrever_csv(lotes_filtrados(repo, tabela), destino, repo.colunas)
+    except Exception:
+        os.remove(caminho)
+        raise
+    return {"caminho": caminho, "nome": f"legislativo_{time.strftime('%Y-%m-%d')}.zip", "mime": "application/zip",
+            "linhas": linhas}
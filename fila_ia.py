@@ -0,0 +1,152 @@
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from ia import GeracaoInterrompida, ResultadoIA
+
+# --- FILA DE GERAÇÃO DA IA ---
+# As gerações não rodam mais dentro do script do Streamlit: viram tarefas numa
+# fila única do processo, atendidas por poucos trabalhadores. A sessão guarda
+# só o ID da tarefa e consulta o andamento a cada rerun, então a ordem da fila
+# não muda se a página for recarregada. O limitador de taxa é compartilhado
+# por todas as chamadas à IA (requisições e tokens por minuto). Um envio com
+# a mesma `chave` de uma tarefa ainda guardada (duplo clique, formulário
+# reenviado) devolve a tarefa existente em vez de gastar outra geração.
+
+
+class LimitadorTaxa:
+    """Dois baldes de fichas: requisições por minuto e tokens por minuto."""
+
+    def __init__(self, rpm=30, tpm=30000):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requisicoes = float(rpm)
+        self._tokens = float(tpm)
+        self._ultima = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        decorrido = agora - self._ultima
+        self._ultima = agora
+        self._requisicoes = min(self.rpm, self._requisicoes + decorrido * self.rpm / 60.0)
+        self._tokens = min(self.tpm, self._tokens + decorrido * self.tpm / 60.0)
+
+    def aguardar(self, tokens):
+        """Bloqueia até haver cota para uma requisição com `tokens` tokens."""
+        tokens = min(tokens, self.tpm)  # um pedido maior que a cota inteira esperaria para sempre
+        with self._cond:
+            while True:
+                self._reabastecer()
+                if self._requisicoes >= 1 and self._tokens >= tokens:
+                    self._requisicoes -= 1
+                    self._tokens -= tokens
+                    return
+                falta_req = max(0.0, 1 - self._requisicoes) * 60.0 / self.rpm
+                falta_tok = max(0.0, tokens - self._tokens) * 60.0 / self.tpm
+                self._cond.wait(max(falta_req, falta_tok, 0.01))
+
+
+@dataclass
+class Tarefa:
+    id: str
+    funcao: object = field(repr=False)
+    chave: str = None
+    estado: str = "na_fila"  # na_fila, executando, concluida
+    parcial: str = ""
+    resultado: ResultadoIA = None
+    criada_em: float = field(default_factory=time.time)
+    concluida_em: float = None
+
+    @property
+    def terminou(self):
+        return self.estado == "concluida"
+
+
+class FilaIA:
+    def __init__(self, max_trabalhadores=3, guardar_concluidas_segundos=3600):
+        self.max_trabalhadores = max_trabalhadores
+        self.guardar_concluidas_segundos = guardar_concluidas_segundos
+        self._fila = queue.Queue()
+        self._tarefas = {}
+        self._por_chave = {}  # chave de idempotência -> ID da tarefa
+        self._pendentes = []  # IDs na ordem de chegada, ainda não iniciados
+        self._trava = threading.Lock()
+        self._contador = itertools.count(1)
+        self._trabalhadores = [
+            threading.Thread(target=self._trabalhar, name=f"fila-ia-{i}", daemon=True)
+            for i in range(max_trabalhadores)
+        ]
+        for t in self._trabalhadores:
+            t.start()
+
+    def enviar(self, funcao, chave=None, reaproveitar_concluida=True):
+        """Coloca na fila uma geração e devolve o ID da tarefa.
+
+        `funcao()` deve devolver um ResultadoIA ou um iterável de pedaços de texto
+        (streaming, normalmente uma ia.Transmissao), como gerar_documento_ia /
+        gerar_revisao_ia. Com `chave`, devolve a tarefa anterior da mesma chave
+        se ela ainda estiver na fila ou rodando, ou se já terminou sem erro
+        (esta só com `reaproveitar_concluida`).
+        """
+        with self._trava:
+            self._limpar_antigas()
+            anterior = self._tarefas.get(self._por_chave.get(chave)) if chave is not None else None
+            if anterior is not None and (not anterior.terminou or (reaproveitar_concluida and anterior.resultado.ok)):
+                return anterior.id
+            tarefa = Tarefa(id=f"ia-{next(self._contador)}-{int(time.time() * 1000)}", funcao=funcao, chave=chave)
+            self._tarefas[tarefa.id] = tarefa
+            if chave is not None:
+                self._por_chave[chave] = tarefa.id
+            self._pendentes.append(tarefa.id)
+        self._fila.put(tarefa.id)
+        return tarefa.id
+
+    def consultar(self, id_tarefa):
+        with self._trava:
+            return self._tarefas.get(id_tarefa)
+
+    def posicao(self, id_tarefa):
+        """1 = próxima a ser atendida; 0 = já saiu da fila."""
+        with self._trava:
+            try:
+                return self._pendentes.index(id_tarefa) + 1
+            except ValueError:
+                return 0
+
+    def _limpar_antigas(self):
+        limite = time.time() - self.guardar_concluidas_segundos
+        for id_tarefa in [i for i, t in self._tarefas.items() if t.terminou and t.concluida_em < limite]:
+            tarefa = self._tarefas.pop(id_tarefa)
+            if tarefa.chave is not None and self._por_chave.get(tarefa.chave) == id_tarefa:
+                del self._por_chave[tarefa.chave]
+
+    def _trabalhar(self):
+        while True:
+            id_tarefa = self._fila.get()
+            with self._trava:
+                tarefa = self._tarefas.get(id_tarefa)
+                self._pendentes.remove(id_tarefa)
+                tarefa.estado = "executando"
+            try:
+                tarefa.resultado = self._executar(tarefa)
+            except Exception as e:
+                tarefa.resultado = ResultadoIA(erro=f"Erro IA: {e}")
+            finally:
+                tarefa.concluida_em = time.time()
+                tarefa.estado = "concluida"
+                self._fila.task_done()
+
+    def _executar(self, tarefa):
+        saida = tarefa.funcao()
+        if isinstance(saida, ResultadoIA):
+            return saida
+        try:
+            for pedaco in saida:
+                tarefa.parcial += pedaco
+        except GeracaoInterrompida as e:
+            tarefa.parcial = e.parcial
+            return ResultadoIA(erro=str(e), modelo=getattr(saida, "modelo", ""))
+        return ResultadoIA(texto=tarefa.parcial, modelo=getattr(saida, "modelo", ""))  # ia.Transmissao
@@ -0,0 +1,52 @@
+from busca import chave_ideia, indexar_ideia, indexar_proposicao
+from versoes import conteudo_para_guardar, guarda_completo, remontar_versao
+
+# --- GRAVAÇÕES ---
+# Os passos de cada gravação do app (repositório + índice de busca + grupos de
+# ideias), num só lugar. O app.py chama estas funções com os objetos da câmara
+# aberta; o benchmark.py chama as mesmas, então o que ele mede é o que o app faz.
+
+
+def gravar_historico(repo_historico, indice, autor, tipo, assunto, texto_minuta, versao_id, revisao_num,
+                     agora, modelo=""):
+    """Grava uma versão da proposição e atualiza o índice de busca."""
+    # Revisões são guardadas como diferença para a versão anterior (ver versoes.py)
+    texto_anterior = None
+    if not guarda_completo(revisao_num):
+        linhas = repo_historico.buscar({"ID_PROPOSICAO": versao_id}).to_dict("records")
+        texto_anterior = remontar_versao(linhas, revisao_num - 1)
+    repo_historico.inserir({
+        "ID_PROPOSICAO": versao_id,
+        "VEREADOR": autor,
+        "TIPO_DOC": tipo,
+        "ASSUNTO": assunto,
+        "VERSAO_NUM": revisao_num,
+        "DATA_HORA": agora,
+        "MINUTA_TEXTO": conteudo_para_guardar(revisao_num, texto_minuta, texto_anterior),
+        "MODELO": modelo,
+    })
+    indexar_proposicao(indice, versao_id, autor, tipo, assunto, texto_minuta, revisao_num, agora)
+
+
+def gravar_ideia(repo_ideias, indice, agrupador, dados):
+    """Grava uma ideia nova, indexa para a busca e coloca no grupo de parecidas."""
+    repo_ideias.inserir(dados)
+    _indexar_ideia_nova(indice, agrupador, dados)
+
+
+def _indexar_ideia_nova(indice, agrupador, dados):
+    chave = indexar_ideia(indice, dados, nova=True)  # ideia igual a outra já gravada entra como repetição
+    agrupador.inserir(dados, chave)
+
+
+def regravar_ideias(indice, agrupador, alteracoes, incluidas):
+    """Atualiza o índice e os grupos depois de uma gravação do editor de ideias (aplicar_alteracoes)."""
+    for original, novo in alteracoes:
+        # linhas repetidas são iguais: tanto faz qual das chaves sai
+        chave = indice.chave_em_uso(chave_ideia(original))
+        indice.remover(chave)
+        agrupador.remover(chave)
+        if novo is not None:
+            _indexar_ideia_nova(indice, agrupador, novo)
+    for linha in incluidas:
+        _indexar_ideia_nova(indice, agrupador, linha)
@@ -0,0 +1,253 @@
+import random
+import time
+from dataclasses import dataclass
+
+from cache_ia import chave_cache
+
+# --- CHAMADAS À IA ---
+# completar() e transmitir() recebem um provedor ou uma cadeia de provedores
+# em ordem de preferência (ver provedores_ia.py). Erros passageiros (429,
+# 5xx, timeout, queda de conexão) são repetidos no mesmo provedor com espera
+# exponencial e jitter; com sobrecarga (429, 503, timeout) e outro provedor
+# na cadeia, passa direto para o próximo (ex.: o 8B quando o 70B está
+# saturado). O resultado volta tipado, com o rótulo do modelo que respondeu,
+# para que um erro nunca seja salvo como se fosse uma minuta.
+
+
+@dataclass(frozen=True)
+class ConfigIA:
+    timeout_conexao: float = 10.0
+    timeout_leitura: float = 120.0
+    tentativas: int = 4  # por provedor
+    espera_base: float = 1.0
+    espera_max: float = 20.0
+    max_conexoes: int = 20
+    keepalive_segundos: float = 60.0
+    tokens_resposta_previstos: int = 2048  # reserva de cota por chamada (limitador de taxa)
+
+
+@dataclass
+class ResultadoIA:
+    """Resposta de uma chamada à IA. Se `erro` estiver preenchido, `texto` não é minuta."""
+    texto: str = ""
+    erro: str = ""
+    tentativas: int = 1
+    do_cache: bool = False
+    secoes: tuple = ()  # revisão parcial: seções reescritas (vazio = documento inteiro)
+    tokens_economizados: int = 0
+    modelo: str = ""  # rótulo do provedor que respondeu ("groq:llama-3.3-70b-versatile")
+
+    @property
+    def ok(self):
+        return not self.erro
+
+
+class GeracaoInterrompida(Exception):
+    """A resposta da IA não chegou ao fim. `parcial` guarda o texto recebido até a falha."""
+    def __init__(self, motivo, parcial=""):
+        super().__init__(motivo)
+        self.parcial = parcial
+
+
+class ErroIA(Exception):
+    """Erro de um provedor, já classificado.
+
+    `passageiro`: vale repetir; `sobrecarga`: o modelo está saturado (429, 503,
+    timeout) e vale passar para o próximo da cadeia; `espera`: segundos pedidos
+    pelo servidor (Retry-After).
+    """
+    def __init__(self, mensagem, passageiro=False, sobrecarga=False, espera=None):
+        super().__init__(mensagem)
+        self.passageiro = passageiro
+        self.sobrecarga = sobrecarga
+        self.espera = espera
+
+
+class Transmissao:
+    """Pedaços de uma resposta em streaming. `modelo` é preenchido quando um provedor começa a responder.
+
+    transformar() mantém o `modelo` da transmissão original (ex.: montar_minuta).
+    """
+    def __init__(self, pedacos, origem=None):
+        self._pedacos = pedacos
+        self._origem = origem
+        self._modelo = ""
+
+    @property
+    def modelo(self):
+        return self._origem.modelo if self._origem is not None else self._modelo
+
+    @modelo.setter
+    def modelo(self, valor):
+        self._modelo = valor
+
+    def __iter__(self):
+        return iter(self._pedacos)
+
+    def transformar(self, funcao):
+        return Transmissao(funcao(self), origem=self)
+
+
+ERRO_SEM_CHAVE = "⚠️ ERRO: Chave API não encontrada!"
+
+
+def _cadeia(provedores):
+    return list(provedores) if isinstance(provedores, (list, tuple)) else [provedores]
+
+
+def _como_erro(e):
+    return e if isinstance(e, ErroIA) else ErroIA(f"Erro IA: {e}")
+
+
+def _trocar_ou_repetir(erro, tentativa, ultimo, config):
+    """True = repetir no mesmo provedor; False = passar ao próximo (ou desistir, se for o último)."""
+    if not erro.passageiro or tentativa >= config.tentativas:
+        return False
+    return ultimo or not erro.sobrecarga
+
+
+def _espera(tentativa, erro, config):
+    """Espera exponencial com jitter total; respeita o Retry-After do servidor."""
+    if erro.espera is not None:
+        return min(config.espera_max, erro.espera)
+    teto = min(config.espera_max, config.espera_base * (2 ** (tentativa - 1)))
+    return random.uniform(0, teto)
+
+
+def _tokens_previstos(prompt, config):
+    """Tokens do prompt (≈ 3 caracteres por token) + a resposta esperada."""
+    return len(prompt) // 3 + config.tokens_resposta_previstos
+
+
+def _do_cache(cadeia, prompt, temperatura, cache):
+    """(rótulo, texto) da primeira resposta guardada para algum provedor da cadeia, ou None.
+
+    Uma consulta só ao cache por pedido, para as falhas não contarem uma vez por provedor.
+    """
+    achado = cache.obter_primeira([chave_cache(prompt, provedor.rotulo, temperatura) for provedor in cadeia])
+    if achado is None:
+        return None
+    posicao, texto = achado
+    return cadeia[posicao].rotulo, texto
+
+
+def completar(provedores, prompt, temperatura, config=ConfigIA(), cache=None, forcar=False, limitador=None, metricas=None):
+    """Chamada sem streaming, com repetição e troca de provedor. Retorna ResultadoIA.
+
+    Com `cache`, um pedido idêntico já respondido (por qualquer provedor da
+    cadeia) volta sem chamar a IA; `forcar=True` ignora o que estiver guardado
+    e gera de novo. Com `limitador` (fila_ia.LimitadorTaxa), cada tentativa
+    espera a cota de requisições/tokens. Com `metricas` (metricas.Metricas),
+    registra a duração e os tokens da chamada.
+    """
+    cadeia = _cadeia(provedores)
+    inicio = time.perf_counter()
+
+    def fim(resultado, uso=(None, None), rotulo=""):
+        if metricas is not None:
+            metricas.registrar_ia(resultado.modelo or rotulo, time.perf_counter() - inicio, None, *uso,
+                                  resultado.tentativas, resultado.erro, resultado.do_cache)
+        return resultado
+
+    if cache is not None and not forcar:
+        guardado = _do_cache(cadeia, prompt, temperatura, cache)
+        if guardado is not None:
+            return fim(ResultadoIA(texto=guardado[1], tentativas=0, do_cache=True, modelo=guardado[0]))
+    tentativas = 0
+    erro = None
+    for posicao, provedor in enumerate(cadeia):
+        tentativa = 0
+        while True:
+            tentativa += 1
+            tentativas += 1
+            if limitador is not None:
+                limitador.aguardar(_tokens_previstos(prompt, config))
+            try:
+                texto, uso = provedor.responder(prompt, temperatura)
+            except Exception as e:
+                erro = _como_erro(e)
+                if not _trocar_ou_repetir(erro, tentativa, posicao == len(cadeia) - 1, config):
+                    break
+                time.sleep(_espera(tentativa, erro, config))
+                continue
+            if cache is not None:
+                cache.guardar(chave_cache(prompt, provedor.rotulo, temperatura), texto)
+            return fim(ResultadoIA(texto=texto, tentativas=tentativas, modelo=provedor.rotulo), uso)
+    return fim(ResultadoIA(erro=str(erro), tentativas=tentativas), rotulo=cadeia[-1].rotulo)
+
+
+def transmitir(provedores, prompt, temperatura, config=ConfigIA(), cache=None, forcar=False, limitador=None, metricas=None):
+    """Gera a resposta em pedaços (streaming), à medida que o modelo escreve. Retorna uma Transmissao.
+
+    Só repete a chamada (ou troca de provedor) se nada tiver chegado ainda. Se
+    a conexão cair no meio ou o modelo parar antes do fim, levanta
+    GeracaoInterrompida depois de entregar o que já chegou. Usa o cache, o
+    limitador e as métricas como completar(); as métricas incluem o tempo até
+    o primeiro pedaço.
+    """
+    transmissao = Transmissao(None)
+    transmissao._pedacos = _transmitir(_cadeia(provedores), prompt, temperatura, config, cache, forcar, limitador,
+                                       metricas, transmissao)
+    return transmissao
+
+
+def _transmitir(cadeia, prompt, temperatura, config, cache, forcar, limitador, metricas, transmissao):
+    inicio = time.perf_counter()
+    primeiro = None
+    uso = (None, None)
+    tentativas = 0
+
+    def registrar(erro="", do_cache=False):
+        if metricas is not None:
+            metricas.registrar_ia(transmissao.modelo or cadeia[0].rotulo, time.perf_counter() - inicio, primeiro, *uso,
+                                  tentativas, erro, do_cache)
+
+    if cache is not None and not forcar:
+        guardado = _do_cache(cadeia, prompt, temperatura, cache)
+        if guardado is not None:
+            transmissao.modelo = guardado[0]
+            primeiro = time.perf_counter() - inicio
+            registrar(do_cache=True)
+            yield guardado[1]
+            return
+    partes = []
+    motivo_fim = None
+    for posicao, provedor in enumerate(cadeia):
+        transmissao.modelo = provedor.rotulo
+        tentativa = 0
+        while True:
+            tentativa += 1
+            tentativas += 1
+            if limitador is not None:
+                limitador.aguardar(_tokens_previstos(prompt, config))
+            try:
+                for pedaco, motivo, uso_pedaco in provedor.pedacos(prompt, temperatura):
+                    if uso_pedaco[0] is not None:  # a contagem de tokens vem no último pedaço
+                        uso = uso_pedaco
+                    if pedaco:
+                        if primeiro is None:
+                            primeiro = time.perf_counter() - inicio
+                        partes.append(pedaco)
+                        yield pedaco
+                    if motivo:
+                        motivo_fim = motivo
+            except Exception as e:
+                erro = _como_erro(e)
+                if partes:
+                    registrar(str(erro))
+                    raise GeracaoInterrompida(str(erro), "".join(partes))
+                if not _trocar_ou_repetir(erro, tentativa, posicao == len(cadeia) - 1, config):
+                    if posicao == len(cadeia) - 1:
+                        registrar(str(erro))
+                        raise GeracaoInterrompida(str(erro))
+                    break
+                time.sleep(_espera(tentativa, erro, config))
+                continue
+            if motivo_fim != "stop":
+                motivo = f"Resposta incompleta (motivo: {motivo_fim or 'desconhecido'})"
+                registrar(motivo)
+                raise GeracaoInterrompida(motivo, "".join(partes))
+            registrar()
+            if cache is not None:
+                cache.guardar(chave_cache(prompt, provedor.rotulo, temperatura), "".join(partes))
+            return
@@ -0,0 +1,259 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# --- MÉTRICAS DE DESEMPENHO ---
+# Cada rerun do Streamlit vira uma "execução", dividida em etapas marcadas no
+# app.py (barra lateral, cada modo, cada aba). Como o script é linear, cada
+# etapa() fecha a anterior; chamadas ao armazenamento e à IA entram como
+# detalhes da execução em andamento (ou só no total do processo, quando vêm
+# dos trabalhadores da fila). Guardamos as últimas amostras de cada série
+# para calcular percentis, exportamos em texto do Prometheus (arquivo lido
+# pelo textfile collector) e em JSON por linha num arquivo rotativo.
+# Desligado (padrão), todos os métodos retornam na primeira linha.
+
+AMOSTRAS_POR_SERIE = 1000
+EXECUCOES_RECENTES = 500
+INTERVALO_PROMETHEUS = 15  # segundos entre regravações do arquivo .prom
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+class Serie:
+    """Contagem, soma e as últimas amostras (em segundos) de uma medida."""
+
+    def __init__(self):
+        self.contagem = 0
+        self.soma = 0.0
+        self.amostras = deque(maxlen=AMOSTRAS_POR_SERIE)
+
+    def registrar(self, valor):
+        self.contagem += 1
+        self.soma += valor
+        self.amostras.append(valor)
+
+
+class Metricas:
+    def __init__(self, ativo=False, pasta="metricas", max_bytes_arquivo=5 * 1024 * 1024, arquivos_guardados=3):
+        self.ativo = ativo
+        self.pasta = pasta
+        self._trava = threading.Lock()
+        self._local = threading.local()
+        self._series = {}  # (tipo, nome) -> Serie
+        self._sessoes = {}  # id da sessão -> deque com a duração total das execuções
+        self._execucoes = deque(maxlen=EXECUCOES_RECENTES)
+        self._tokens = {"prompt": 0, "resposta": 0, "economizados": 0}
+        self._ultima_exportacao = 0.0
+        self._arquivo = None
+        if ativo:
+            os.makedirs(pasta, exist_ok=True)
+            self._arquivo = logging.getLogger(f"metricas.{os.path.abspath(pasta)}")
+            self._arquivo.propagate = False
+            self._arquivo.setLevel(logging.INFO)
+            if not self._arquivo.handlers:
+                manipulador = RotatingFileHandler(os.path.join(pasta, "execucoes.jsonl"), maxBytes=max_bytes_arquivo,
+                                                  backupCount=arquivos_guardados, encoding="utf-8")
+                self._arquivo.addHandler(manipulador)
+
+    # --- registro ---
+    def _serie(self, tipo, nome, valor):
+        with self._trava:
+            serie = self._series.get((tipo, nome))
+            if serie is None:
+                serie = self._series[(tipo, nome)] = Serie()
+            serie.registrar(valor)
+
+    def _gravar_linha(self, dados):
+        try:
+            self._arquivo.info(json.dumps(dados, ensure_ascii=False))
+        except Exception:
+            pass  # métricas nunca derrubam a página
+
+    def iniciar_execucao(self, sessao):
+        """Início de um rerun."""
+        if not self.ativo:
+            return
+        # o rerun anterior pode ter parado no meio (st.rerun / st.stop)
+        self.finalizar_execucao(interrompida=True)
+        agora = time.perf_counter()
+        self._local.execucao = {"sessao": sessao, "inicio": agora, "ultimo": agora, "etapa": None,
+                                "etapas": [], "armazenamento": 0.0, "chamadas": 0}
+
+    def etapa(self, nome):
+        """Fecha a etapa atual e abre `nome`."""
+        if not self.ativo:
+            return
+        execucao = getattr(self._local, "execucao", None)
+        if execucao is None:
+            return
+        agora = time.perf_counter()
+        self._fechar_etapa(execucao, agora)
+        execucao["etapa"] = (nome, agora)
+
+    def _fechar_etapa(self, execucao, agora):
+        if execucao["etapa"]:
+            nome, inicio = execucao["etapa"]
+            execucao["etapas"].append((nome, agora - inicio))
+            self._serie("etapa", nome, agora - inicio)
+        execucao["etapa"] = None
+        execucao["ultimo"] = agora
+
+    def finalizar_execucao(self, interrompida=False):
+        """Fim do rerun. Interrompida, vale o último momento registrado, não o tempo parado até o próximo rerun."""
+        if not self.ativo:
+            return
+        execucao = getattr(self._local, "execucao", None)
+        if execucao is None:
+            return
+        self._local.execucao = None
+        fim = execucao["ultimo"] if interrompida else time.perf_counter()
+        self._fechar_etapa(execucao, fim)
+        total = fim - execucao["inicio"]
+        registro = {
+            "tipo": "execucao", "quando": time.time(), "sessao": execucao["sessao"], "total_ms": round(total * 1000, 2),
+            "armazenamento_ms": round(execucao["armazenamento"] * 1000, 2), "chamadas_armazenamento": execucao["chamadas"],
+            "etapas": {nome: round(d * 1000, 2) for nome, d in execucao["etapas"]}, "interrompida": interrompida,
+        }
+        self._serie("execucao", "total", total)
+        with self._trava:
+            self._sessoes.setdefault(execucao["sessao"], deque(maxlen=AMOSTRAS_POR_SERIE)).append(total)
+            if len(self._sessoes) > EXECUCOES_RECENTES:
+                del self._sessoes[next(iter(self._sessoes))]  # sessão mais antiga
+            self._execucoes.append(registro)
+        self._gravar_linha(registro)
+        self._exportar_se_preciso()
+
+    def registrar_armazenamento(self, nome, duracao):
+        if not self.ativo:
+            return
+        self._serie("armazenamento", nome, duracao)
+        execucao = getattr(self._local, "execucao", None)
+        if execucao is not None:
+            execucao["armazenamento"] += duracao
+            execucao["chamadas"] += 1
+            execucao["ultimo"] = time.perf_counter()
+
+    def registrar_ia(self, modelo, duracao, primeiro_token=None, tokens_prompt=None, tokens_resposta=None,
+                     tentativas=1, erro="", do_cache=False):
+        """Uma chamada à IA. `primeiro_token` (segundos) só existe com streaming."""
+        if not self.ativo:
+            return
+        self._serie("ia", "duracao", duracao)
+        if primeiro_token is not None:
+            self._serie("ia", "primeiro_token", primeiro_token)
+        with self._trava:
+            self._tokens["prompt"] += tokens_prompt or 0
+            self._tokens["resposta"] += tokens_resposta or 0
+        self._gravar_linha({
+            "tipo": "ia", "quando": time.time(), "modelo": modelo, "duracao_ms": round(duracao * 1000, 2),
+            "primeiro_token_ms": None if primeiro_token is None else round(primeiro_token * 1000, 2),
+            "tokens_prompt": tokens_prompt, "tokens_resposta": tokens_resposta, "tentativas": tentativas,
+            "erro": erro, "do_cache": do_cache,
+        })
+        self._exportar_se_preciso()
+
+    def registrar_economia(self, secoes, tokens):
+        """Revisão parcial: `tokens` estimados que a reescrita completa teria gasto a mais."""
+        if not self.ativo:
+            return
+        with self._trava:
+            self._tokens["economizados"] += tokens
+        self._gravar_linha({"tipo": "revisao_parcial", "quando": time.time(), "secoes": list(secoes), "tokens_economizados": tokens})
+
+    # --- consulta ---
+    def percentis(self, tipo=None):
+        """{(tipo, nome): {"contagem", "p50", "p95", "p99"}} em milissegundos."""
+        with self._trava:
+            copias = {chave: (s.contagem, list(s.amostras)) for chave, s in self._series.items()
+                      if tipo is None or chave[0] == tipo}
+        return {
+            chave: {"contagem": contagem, **{f"p{int(p * 100)}": percentil(amostras, p) * 1000 for p in (0.5, 0.95, 0.99)}}
+            for chave, (contagem, amostras) in copias.items()
+        }
+
+    def percentis_sessao(self, sessao):
+        with self._trava:
+            amostras = list(self._sessoes.get(sessao, ()))
+        return {"execucoes": len(amostras), **{f"p{int(p * 100)}": percentil(amostras, p) * 1000 for p in (0.5, 0.95, 0.99)}}
+
+    def mais_lentas(self, quantidade=20):
+        with self._trava:
+            execucoes = list(self._execucoes)
+        return sorted(execucoes, key=lambda e: e["total_ms"], reverse=True)[:quantidade]
+
+    def tokens(self):
+        with self._trava:
+            return dict(self._tokens)
+
+    # --- exportação ---
+    def texto_prometheus(self):
+        linhas = []
+        nomes = {"etapa": "legislativo_etapa_segundos", "execucao": "legislativo_execucao_segundos",
+                 "armazenamento": "legislativo_armazenamento_segundos", "ia": "legislativo_ia_segundos"}
+        rotulos = {"etapa": "etapa", "execucao": "medida", "armazenamento": "operacao", "ia": "medida"}
+        with self._trava:
+            series = {chave: (s.contagem, s.soma, list(s.amostras)) for chave, s in self._series.items()}
+            tokens = dict(self._tokens)
+        for tipo, metrica in nomes.items():
+            linhas.append(f"# TYPE {metrica} summary")
+            for (t, nome), (contagem, soma, amostras) in sorted(series.items()):
+                if t != tipo:
+                    continue
+                rotulo = f'{rotulos[tipo]}="{_escapar(nome)}"'
+                for p in (0.5, 0.95, 0.99):
+                    linhas.append(f'{metrica}{{{rotulo},quantile="{p}"}} {percentil(amostras, p):.6f}')
+                linhas.append(f"{metrica}_sum{{{rotulo}}} {soma:.6f}")
+                linhas.append(f"{metrica}_count{{{rotulo}}} {contagem}")
+        linhas.append("# TYPE legislativo_ia_tokens_total counter")
+        for tipo, total in tokens.items():
+            linhas.append(f'legislativo_ia_tokens_total{{tipo="{tipo}"}} {total}')
+        return "\n".join(linhas) + "\n"
+
+    def _exportar_se_preciso(self):
+        agora = time.monotonic()
+        if agora - self._ultima_exportacao < INTERVALO_PROMETHEUS:
+            return
+        self._ultima_exportacao = agora
+        caminho = os.path.join(self.pasta, "metricas.prom")
+        try:
+            with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+                f.write(self.texto_prometheus())
+            os.replace(caminho + ".tmp", caminho)
+        except OSError:
+            pass
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RepositorioMedido:
+    """Envolve um repositório e mede cada método chamado (só usado com as métricas ligadas)."""
+
+    def __init__(self, repo, nome, metricas):
+        self._repo = repo
+        self._nome = nome
+        self._metricas = metricas
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._repo, atributo)
+        if not callable(valor):
+            return valor
+        nome = f"{self._nome}.{atributo}"
+
+        def medido(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return valor(*args, **kwargs)
+            finally:
+                self._metricas.registrar_armazenamento(nome, time.perf_counter() - inicio)
+        return medido
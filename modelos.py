@@ -0,0 +1,170 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from string import Template
+
+import pytz
+
+from ia import GeracaoInterrompida
+
+# --- MODELOS FIXOS DAS MINUTAS ---
+# Cabeçalho, preâmbulo (autor e bancada) e fechamento ("[plenário], [data]"
+# + assinatura) são sempre iguais: saem daqui, montados com os dados da
+# câmara (camaras.py), do vereador e a data de hoje. A IA escreve só a
+# ementa, o texto (artigos ou pedido) e a justificativa, entre as marcas
+# [[ementa]], [[articulado]] e [[justificativa]], e montar_minuta() junta
+# tudo à medida que os pedaços chegam.
+
+SEPARADOR = "\n\n\n"  # "duas linhas em branco entre seções"
+SECOES_GERADAS = ["ementa", "articulado", "justificativa"]
+LIMITE_SEM_MARCAS = 400  # caracteres segurados antes da primeira marca (costuma ser "Claro, segue:")
+
+MODELOS = {
+    "padrao": {
+        "cabecalho": "EXCELENTÍSSIMO SENHOR PRESIDENTE DA $camara/$uf",
+        "preambulo": "$nome, integrante da Bancada $partido, no uso de suas atribuições legais e regimentais, "
+                     "submete à apreciação do Plenário o seguinte $tipo:",
+        "fechamento": "$plenario, $data." + SEPARADOR + "$nome\nBancada $partido",
+    },
+    "Indicação": {
+        "preambulo": "$nome, integrante da Bancada $partido, no uso de suas atribuições legais e regimentais, "
+                     "submete à apreciação do Plenário a seguinte $tipo:",
+    },
+}
+MODELOS["Moção"] = MODELOS["Indicação"]
+
+MESES = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho", "agosto", "setembro",
+         "outubro", "novembro", "dezembro"]
+
+
+@lru_cache(maxsize=None)
+def modelo(tipo_doc, camara):
+    """Templates compilados do tipo de documento (os tipos sem modelo próprio usam o padrão).
+
+    Os modelos da câmara (camara.modelos) valem por cima dos daqui.
+    """
+    partes = {**MODELOS["padrao"], **MODELOS.get(tipo_doc, {}),
+              **camara.modelos.get("padrao", {}), **camara.modelos.get(tipo_doc, {})}
+    return {nome: Template(texto) for nome, texto in partes.items()}
+
+
+@lru_cache(maxsize=None)
+def dados_autor(autor):
+    """"Vereador Fulano (PDT)" -> ("Vereador Fulano", "PDT")."""
+    m = re.match(r"^(.*?)\s*\(([^)]*)\)\s*$", autor)
+    return (m.group(1), m.group(2)) if m else (autor, "")
+
+
+def data_por_extenso(quando=None):
+    quando = quando or datetime.now(pytz.timezone('America/Sao_Paulo'))
+    return f"{quando.day} de {MESES[quando.month - 1]} de {quando.year}"
+
+
+def secoes_fixas(autor, tipo_doc, camara, quando=None):
+    """{cabecalho, preambulo, fechamento} prontos para o autor, a câmara e a data."""
+    nome, partido = dados_autor(autor)
+    valores = {**camara.valores_modelo(), "nome": nome, "partido": partido, "tipo": tipo_doc.upper(),
+               "data": data_por_extenso(quando)}
+    return {secao: t.substitute(valores) for secao, t in modelo(tipo_doc, camara).items()}
+
+
+def montar_minuta(pedacos, fixas):
+    """Minuta completa, em pedaços, a partir dos pedaços gerados pela IA.
+
+    Tira as marcas [[seção]] e os espaços em volta, põe o título da
+    justificativa e as seções fixas. Se a IA não usar as marcas, o texto dela
+    entra inteiro entre o preâmbulo e o fechamento.
+    """
+    emitidos = []
+    estado = {"buffer": "", "espacos": "", "pular": True, "secao": None, "marcas": False, "fechou": False,
+              "previo": "", "sem_marcas": False}
+
+    def texto(trecho):
+        if estado["marcas"] and estado["secao"] is None:
+            return ""  # comentários da IA fora das seções
+        if not estado["marcas"] and not estado["sem_marcas"]:
+            # antes da primeira marca: segura, pode ser só um comentário da IA
+            estado["previo"] += trecho
+            if len(estado["previo"]) <= LIMITE_SEM_MARCAS:
+                return ""
+            estado["sem_marcas"] = True
+            trecho, estado["previo"] = estado["previo"], ""
+        if estado["pular"]:
+            trecho = trecho.lstrip()
+            if not trecho:
+                return ""
+            estado["pular"] = False
+        junto = estado["espacos"] + trecho
+        sem_final = junto.rstrip()
+        estado["espacos"] = junto[len(sem_final):]
+        return sem_final
+
+    def marca(nome):
+        fechamento = nome.startswith("/")
+        secao = nome.lstrip("/")
+        if secao not in SECOES_GERADAS:
+            return texto(f"[[{nome}]]")
+        estado["marcas"] = True
+        estado["previo"] = ""
+        estado["espacos"] = ""
+        if fechamento:
+            estado["secao"] = None
+            if secao == "justificativa":
+                estado["fechou"] = True
+                return SEPARADOR + fixas["fechamento"]
+            return SEPARADOR
+        estado["secao"] = secao
+        estado["pular"] = True
+        return "JUSTIFICATIVA" + SEPARADOR if secao == "justificativa" else ""
+
+    def consumir(final):
+        saida = []
+        buffer = estado["buffer"]
+        while buffer:
+            i = buffer.find("[[")
+            if i < 0:
+                # um "[" no fim pode ser o começo de uma marca
+                corte = len(buffer) - 1 if buffer.endswith("[") and not final else len(buffer)
+                saida.append(texto(buffer[:corte]))
+                buffer = buffer[corte:]
+                break
+            j = buffer.find("]]", i)
+            if j < 0:
+                if final:
+                    saida.append(texto(buffer))
+                    buffer = ""
+                else:
+                    saida.append(texto(buffer[:i]))
+                    buffer = buffer[i:]
+                break
+            saida.append(texto(buffer[:i]))
+            saida.append(marca(buffer[i + 2:j]))
+            buffer = buffer[j + 2:]
+        estado["buffer"] = buffer
+        return "".join(saida)
+
+    inicio = fixas["cabecalho"] + SEPARADOR + fixas["preambulo"] + SEPARADOR
+    emitidos.append(inicio)
+    yield inicio
+    try:
+        for pedaco in pedacos:
+            estado["buffer"] += pedaco
+            saida = consumir(final=False)
+            if saida:
+                emitidos.append(saida)
+                yield saida
+    except GeracaoInterrompida as e:
+        raise GeracaoInterrompida(str(e), "".join(emitidos)) from e
+    saida = consumir(final=True)
+    if estado["previo"]:
+        # a IA não usou as marcas: o texto dela entra inteiro
+        estado["sem_marcas"] = True
+        saida += texto(estado["previo"])
+    if not estado["fechou"]:
+        saida += SEPARADOR + fixas["fechamento"]
+    yield saida
+
+
+def minuta_completa(texto_ia, fixas):
+    """montar_minuta() para uma resposta que chegou inteira."""
+    return "".join(montar_minuta([texto_ia], fixas))
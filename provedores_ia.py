@@ -0,0 +1,289 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+from ia import ERRO_SEM_CHAVE, ConfigIA, ErroIA
+
+# --- PROVEDORES DA IA ---
+# completar() e transmitir() (ia.py) falam com a IA só através destes
+# objetos, todos com a mesma interface:
+#   rotulo                                  "tipo:modelo", guardado no histórico
+#   responder(prompt, temperatura)          -> (texto, (tokens_prompt, tokens_resposta))
+#   pedacos(prompt, temperatura)            -> iterador de (pedaço, motivo_fim, uso)
+# Erros saem sempre como ia.ErroIA, já classificados (passageiro, sobrecarga,
+# espera pedida pelo servidor). A cadeia de provedores vem dos secrets
+# (IA_PROVEDORES), na ordem de preferência: "groq:modelo", "local:modelo"
+# (servidor compatível com a API da OpenAI: llama.cpp, vLLM, Ollama...) e
+# "falso", gerador determinístico para testes de carga e benchmarks.
+
+MODELO_PADRAO = "llama-3.3-70b-versatile"
+MODELO_RESERVA = "llama-3.1-8b-instant"  # menor e mais rápido: assume quando o 70B está saturado
+CADEIA_PADRAO = [f"groq:{MODELO_PADRAO}", f"groq:{MODELO_RESERVA}"]
+URL_LOCAL_PADRAO = "http://localhost:8000/v1"
+
+_clientes = {}
+_clientes_trava = threading.Lock()
+
+
+def _cliente_http(config, **opcoes):
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=config.max_conexoes,
+            max_keepalive_connections=config.max_conexoes,
+            keepalive_expiry=config.keepalive_segundos,
+        ),
+        timeout=httpx.Timeout(config.timeout_leitura, connect=config.timeout_conexao),
+        **opcoes,
+    )
+
+
+def _compartilhado(chave, criar):
+    """Um cliente por processo para cada chave: as sessões reaproveitam o pool de conexões (keep-alive + TLS)."""
+    with _clientes_trava:
+        cliente = _clientes.get(chave)
+        if cliente is None:
+            cliente = _clientes[chave] = criar()
+        return cliente
+
+
+def _erro_http(codigo, retry_after=None):
+    """ErroIA para uma resposta HTTP de erro. 429 e 503 (modelo saturado) pedem troca de modelo."""
+    try:
+        espera = float(retry_after)
+    except (TypeError, ValueError):
+        espera = None
+    if codigo == 429:
+        return ErroIA("Limite de uso da IA atingido. Aguarde um instante e tente novamente.",
+                      passageiro=True, sobrecarga=True, espera=espera)
+    return ErroIA(f"Serviço de IA respondeu com erro {codigo}.", passageiro=codigo in (408, 409) or codigo >= 500,
+                  sobrecarga=codigo == 503, espera=espera)
+
+
+# --- GROQ ---
+class ProvedorGroq:
+    def __init__(self, api_key, modelo=MODELO_PADRAO, config=ConfigIA()):
+        self.api_key = api_key
+        self.modelo = modelo
+        self.config = config
+        self.rotulo = f"groq:{modelo}"
+
+    def _cliente(self):
+        if not self.api_key:
+            raise ErroIA(ERRO_SEM_CHAVE)
+        c = self.config
+        chave = ("groq", self.api_key, c.timeout_conexao, c.timeout_leitura, c.max_conexoes, c.keepalive_segundos)
+
+        def criar():
+            import httpx
+            from groq import Groq
+
+            return Groq(api_key=self.api_key, max_retries=0,  # as repetições são feitas em ia.py, com jitter
+                        http_client=_cliente_http(c),
+                        timeout=httpx.Timeout(c.timeout_leitura, connect=c.timeout_conexao))
+        return _compartilhado(chave, criar)
+
+    @staticmethod
+    def _erro(e):
+        import groq
+
+        if isinstance(e, groq.APITimeoutError):
+            return ErroIA("Tempo esgotado aguardando a IA.", passageiro=True, sobrecarga=True)
+        if isinstance(e, groq.APIConnectionError):
+            return ErroIA("Não foi possível conectar ao serviço de IA.", passageiro=True)
+        if isinstance(e, groq.APIStatusError):
+            return _erro_http(e.status_code, e.response.headers.get("retry-after") if e.response is not None else None)
+        return ErroIA(f"Erro IA: {e}")
+
+    @staticmethod
+    def _uso(resposta):
+        uso = getattr(resposta, "usage", None) or getattr(getattr(resposta, "x_groq", None), "usage", None)
+        return getattr(uso, "prompt_tokens", None), getattr(uso, "completion_tokens", None)
+
+    def responder(self, prompt, temperatura):
+        cliente = self._cliente()
+        try:
+            chat = cliente.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}], model=self.modelo, temperature=temperatura,
+            )
+        except Exception as e:
+            raise self._erro(e) from e
+        return chat.choices[0].message.content or "", self._uso(chat)
+
+    def pedacos(self, prompt, temperatura):
+        cliente = self._cliente()
+        try:
+            stream = cliente.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}], model=self.modelo, temperature=temperatura, stream=True,
+            )
+            for chunk in stream:
+                uso = self._uso(chunk)  # a contagem de tokens vem no último pedaço
+                if not chunk.choices:
+                    yield "", None, uso
+                    continue
+                escolha = chunk.choices[0]
+                yield escolha.delta.content or "", escolha.finish_reason, uso
+        except Exception as e:
+            raise self._erro(e) from e
+
+
+# --- SERVIDOR LOCAL (API COMPATÍVEL COM A OPENAI) ---
+class ProvedorLocal:
+    def __init__(self, url_base=URL_LOCAL_PADRAO, modelo="local", api_key="", config=ConfigIA()):
+        self.url_base = url_base.rstrip("/")
+        self.modelo = modelo
+        self.api_key = api_key
+        self.config = config
+        self.rotulo = f"local:{modelo}"
+
+    def _cliente(self):
+        c = self.config
+        chave = ("local", self.url_base, self.api_key, c.timeout_conexao, c.timeout_leitura, c.max_conexoes,
+                 c.keepalive_segundos)
+        cabecalhos = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        return _compartilhado(chave, lambda: _cliente_http(c, base_url=self.url_base, headers=cabecalhos))
+
+    @staticmethod
+    def _erro(e):
+        import httpx
+
+        if isinstance(e, httpx.TimeoutException):
+            return ErroIA("Tempo esgotado aguardando a IA.", passageiro=True, sobrecarga=True)
+        if isinstance(e, httpx.TransportError):
+            return ErroIA("Não foi possível conectar ao serviço de IA.", passageiro=True)
+        return ErroIA(f"Erro IA: {e}")
+
+    @staticmethod
+    def _verificar(resposta):
+        if resposta.status_code >= 400:
+            raise _erro_http(resposta.status_code, resposta.headers.get("retry-after"))
+
+    @staticmethod
+    def _uso(dados):
+        uso = dados.get("usage") or {}
+        return uso.get("prompt_tokens"), uso.get("completion_tokens")
+
+    def _corpo(self, prompt, temperatura, stream=False):
+        return {"model": self.modelo, "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperatura, "stream": stream}
+
+    def responder(self, prompt, temperatura):
+        try:
+            resposta = self._cliente().post("/chat/completions", json=self._corpo(prompt, temperatura))
+        except Exception as e:
+            raise self._erro(e) from e
+        self._verificar(resposta)
+        dados = resposta.json()
+        return dados["choices"][0]["message"].get("content") or "", self._uso(dados)
+
+    def pedacos(self, prompt, temperatura):
+        try:
+            with self._cliente().stream("POST", "/chat/completions", json=self._corpo(prompt, temperatura, True)) as resposta:
+                if resposta.status_code >= 400:
+                    resposta.read()
+                    self._verificar(resposta)
+                for linha in resposta.iter_lines():  # server-sent events: "data: {...}" ... "data: [DONE]"
+                    if not linha.startswith("data:"):
+                        continue
+                    conteudo = linha[5:].strip()
+                    if conteudo == "[DONE]":
+                        break
+                    dados = json.loads(conteudo)
+                    if not dados.get("choices"):
+                        yield "", None, self._uso(dados)
+                        continue
+                    escolha = dados["choices"][0]
+                    yield (escolha.get("delta") or {}).get("content") or "", escolha.get("finish_reason"), self._uso(dados)
+        except ErroIA:
+            raise
+        except Exception as e:
+            raise self._erro(e) from e
+
+
+# --- PROVEDOR FALSO (TESTES E BENCHMARKS) ---
+_PALAVRAS_FALSAS = ("município câmara vereador pedido comunidade rua bairro melhoria serviço público "
+                    "segurança iluminação via acesso população moradores execução obra atendimento").split()
+
+
+class ProvedorFalso:
+    """Resposta determinística (o mesmo prompt gera sempre o mesmo texto), sem rede.
+
+    `latencia` é a espera antes da resposta (ou do primeiro pedaço) e
+    `latencia_pedaco` a espera entre pedaços. `falhas` faz as primeiras
+    chamadas falharem com `erro` (ex.: ErroIA(..., sobrecarga=True), para
+    testar a troca de modelo).
+    """
+
+    def __init__(self, modelo="falso", latencia=0.0, latencia_pedaco=0.0, tamanho_pedaco=24, falhas=0, erro=None):
+        self.modelo = modelo
+        self.latencia = latencia
+        self.latencia_pedaco = latencia_pedaco
+        self.tamanho_pedaco = tamanho_pedaco
+        self.erro = erro or ErroIA("Limite de uso da IA atingido. Aguarde um instante e tente novamente.",
+                                   passageiro=True, sobrecarga=True)
+        self.rotulo = f"falso:{modelo}"
+        self._falhas = falhas
+        self._trava = threading.Lock()
+        self.chamadas = 0
+
+    def _chamar(self):
+        with self._trava:
+            self.chamadas += 1
+            falhar = self.chamadas <= self._falhas
+        if self.latencia:
+            time.sleep(self.latencia)
+        if falhar:
+            raise self.erro
+
+    def texto(self, prompt):
+        """Se o prompt pede seções entre marcas [[nome]] (minuta nova, revisão parcial), responde com elas."""
+        rnd = random.Random(hashlib.sha256(f"{self.modelo}|{prompt}".encode("utf-8")).hexdigest())
+
+        def frase(minimo=8, maximo=16):
+            palavras = [rnd.choice(_PALAVRAS_FALSAS) for _ in range(rnd.randint(minimo, maximo))]
+            return " ".join(palavras).capitalize() + "."
+
+        secoes = list(dict.fromkeys(re.findall(r"\[\[(\w+)\]\]", prompt)))
+        if not secoes:
+            return "\n\n".join(frase() for _ in range(6))
+        return "\n\n".join(f"[[{nome}]]\n{' '.join(frase() for _ in range(3))}\n[[/{nome}]]" for nome in secoes)
+
+    def responder(self, prompt, temperatura):
+        self._chamar()
+        texto = self.texto(prompt)
+        return texto, (len(prompt) // 3, len(texto) // 3)
+
+    def pedacos(self, prompt, temperatura):
+        self._chamar()
+        texto = self.texto(prompt)
+        for inicio in range(0, len(texto), self.tamanho_pedaco):
+            if inicio and self.latencia_pedaco:
+                time.sleep(self.latencia_pedaco)
+            yield texto[inicio:inicio + self.tamanho_pedaco], None, (None, None)
+        yield "", "stop", (len(prompt) // 3, len(texto) // 3)
+
+
+# --- CADEIA ---
+def montar_cadeia(especificacoes=None, api_key="", config=ConfigIA(), url_local=URL_LOCAL_PADRAO, chave_local="",
+                  latencia_falso=0.0):
+    """Provedores na ordem de preferência a partir de ["groq:modelo", "local:modelo", "falso", ...]."""
+    if isinstance(especificacoes, str):
+        especificacoes = especificacoes.split(",")
+    cadeia = []
+    for especificacao in especificacoes or CADEIA_PADRAO:
+        tipo, _, modelo = especificacao.strip().partition(":")
+        if tipo == "groq":
+            cadeia.append(ProvedorGroq(api_key, modelo or MODELO_PADRAO, config))
+        elif tipo == "local":
+            cadeia.append(ProvedorLocal(url_local, modelo or "local", chave_local, config))
+        elif tipo == "falso":
+            cadeia.append(ProvedorFalso(modelo or "falso", latencia=latencia_falso))
+        elif tipo:
+            raise ValueError(f"Provedor de IA desconhecido: {especificacao}")
+    if not cadeia:
+        raise ValueError("Nenhum provedor de IA configurado.")
+    return cadeia
@@ -0,0 +1,138 @@
+import re
+from functools import lru_cache
+
+from busca import sem_acentos
+
+# --- SEÇÕES DA MINUTA (REVISÃO PARCIAL) ---
+# As minutas seguem sempre a mesma estrutura: cabeçalho, preâmbulo, ementa,
+# articulado (artigos ou o pedido), justificativa e fechamento. Quando o
+# pedido de revisão fala só de algumas seções ("Mude a ementa", "Aumente a
+# justificativa"), mandamos à IA só essas seções e a ementa como contexto, e
+# encaixamos a resposta de volta no texto aqui. Pedidos gerais, ou minutas em
+# que a estrutura não é reconhecida, continuam com a reescrita completa. O
+# título "JUSTIFICATIVA" fica de fora do que vai à IA, e o fechamento (data e
+# assinatura) não vai à IA: é montado de novo por modelos.secoes_fixas().
+
+SECOES = ["cabecalho", "preambulo", "ementa", "articulado", "justificativa", "fechamento"]
+NOMES_SECOES = {"cabecalho": "cabeçalho", "preambulo": "preâmbulo", "ementa": "ementa",
+                "articulado": "articulado", "justificativa": "justificativa", "fechamento": "fechamento"}
+SECOES_LOCAIS = ["fechamento"]  # refeitas a partir dos modelos locais, sem a IA
+MAX_SECOES_PARCIAL = 3  # acima disso a reescrita completa sai quase pelo mesmo preço
+
+_PREAMBULO = re.compile(r"(?im)^.*(no uso de suas atribui|submete [aà] aprecia)")
+_PARAGRAFO = re.compile(r"\n[ \t]*\n\s*")
+_JUSTIFICATIVA = re.compile(r"(?im)^[^\w\n]*justificativa[^\w\n]*$")
+_TITULO = {"justificativa": re.compile(r"(?i)\A\s*[^\w\n]*justificativa[^\w\n]*\n\s*")}
+
+# palavras do pedido (já sem acentos) que nomeiam cada seção
+_PALAVRAS_SECAO = {
+    "cabecalho": [r"cabecalho", r"vocativo"],
+    "preambulo": [r"preambulo"],
+    "ementa": [r"ementa"],
+    "articulado": [r"articulado", r"artigos?", r"art\.", r"§", r"incisos?", r"clausulas?", r"texto da lei",
+                   r"(texto|corpo|teor) d[oa] (pedido|solicitacao|projeto|requerimento|indicacao|lei)"],
+    "justificativa": [r"justificativa", r"justificar", r"fundamentacao", r"argumentacao"],
+    "fechamento": [r"fechamento", r"assinatura", r"local e data",
+                   r"data d[oa] (documento|minuta|fechamento|assinatura|proposicao)"],
+}
+# palavras comuns que também indicam a seção, mas com menos certeza: em
+# "reforce o pedido na justificativa", "pedido" não é o articulado. Se elas
+# apontam para uma seção que o pedido não nomeia, a revisão é completa.
+_PALAVRAS_INDIRETAS = {
+    "preambulo": [r"bancada", r"partido"],
+    "articulado": [r"pedido", r"solicitacao", r"corpo", r"dispositivos?", r"paragrafos?"],
+    "justificativa": [r"argumentos?"],
+}
+_PALAVRAS_GERAIS = [r"tudo", r"todo o", r"toda a", r"inteir[oa]", r"geral", r"todas as secoes", r"documento todo"]
+
+
+def _busca_palavras(padroes, texto):
+    return any(re.search(r"(?<!\w)" + p + r"(?!\w)", texto) for p in padroes)
+
+
+@lru_cache(maxsize=None)
+def _fechamento(plenario):
+    """Regex da linha do fechamento ("Plenário ..., data"), com ou sem acentos."""
+    letras = [f"[{re.escape(c)}{re.escape(sem_acentos(c))}]" if sem_acentos(c) != c else re.escape(c) for c in plenario]
+    return re.compile(r"(?im)^[^\w\n]*" + "".join(letras))
+
+
+def dividir(texto, plenario):
+    """Lista [(seção, trecho)] cuja concatenação é exatamente `texto`; None se a estrutura não for reconhecida.
+
+    `plenario` é o início do fechamento da câmara (camara.plenario).
+    """
+    preambulo = _PREAMBULO.search(texto)
+    if not preambulo:
+        return None
+    fim_preambulo = _PARAGRAFO.search(texto, preambulo.end())
+    if not fim_preambulo:
+        return None
+    fim_ementa = _PARAGRAFO.search(texto, fim_preambulo.end())
+    if not fim_ementa:
+        return None
+    justificativa = _JUSTIFICATIVA.search(texto, fim_ementa.end())
+    if not justificativa:
+        return None
+    fechamento = _fechamento(plenario).search(texto, justificativa.end())
+    if not fechamento:
+        return None
+    cortes = [0, preambulo.start(), fim_preambulo.end(), fim_ementa.end(), justificativa.start(), fechamento.start(), len(texto)]
+    partes = [(nome, texto[cortes[i]:cortes[i + 1]]) for i, nome in enumerate(SECOES)]
+    if not all(trecho.strip() for nome, trecho in partes if nome != "cabecalho"):
+        return None
+    return partes
+
+
+def secoes_afetadas(pedido):
+    """Seções que o pedido de revisão menciona, ou None se ele vale para o documento todo."""
+    texto = sem_acentos(pedido or "").lower()
+    if _busca_palavras(_PALAVRAS_GERAIS, texto):
+        return None
+    nomeadas = [nome for nome in SECOES if _busca_palavras(_PALAVRAS_SECAO[nome], texto)]
+    indiretas = [nome for nome in SECOES if _busca_palavras(_PALAVRAS_INDIRETAS.get(nome, []), texto)]
+    if nomeadas and set(indiretas) - set(nomeadas):
+        return None  # não dá para saber se a palavra comum é outra seção ou só parte do pedido
+    alvo = nomeadas or indiretas
+    if not alvo or len(alvo) > MAX_SECOES_PARCIAL:
+        return None
+    return alvo
+
+
+def _sem_titulo(nome, trecho):
+    """(título, resto) do trecho; o título só existe na justificativa."""
+    titulo = _TITULO[nome].match(trecho) if nome in _TITULO else None
+    return (titulo.group(), trecho[titulo.end():]) if titulo else ("", trecho)
+
+
+def prompt_parcial(partes, alvo, pedido, autor, tipo_doc, camara):
+    trechos = dict(partes)
+    contexto = "" if "ementa" in alvo else f"CONTEXTO (não reescreva): {trechos['ementa'].strip()}\n"
+    blocos = "\n".join(f"[[{nome}]]\n{_sem_titulo(nome, trechos[nome])[1].strip()}\n[[/{nome}]]" for nome in alvo)
+    return camara.prompt("revisao_parcial", tipo_doc=tipo_doc, autor=autor, pedido=pedido, contexto=contexto, blocos=blocos)
+
+
+def ler_resposta(resposta, alvo):
+    """{seção: texto novo} da resposta da IA; None se faltar alguma seção pedida."""
+    novas = {}
+    for nome, conteudo in re.findall(r"\[\[(\w+)\]\]\s*(.*?)\s*\[\[/\1\]\]", resposta or "", re.DOTALL):
+        if nome in alvo and conteudo.strip():
+            novas[nome] = conteudo.strip()
+    return novas if set(novas) == set(alvo) else None
+
+
+def juntar(partes, novas):
+    """Remonta a minuta trocando as seções de `novas` e mantendo o espaçamento original e o título da seção."""
+    saida = []
+    for nome, trecho in partes:
+        if nome in novas:
+            titulo = _sem_titulo(nome, trecho)[0]
+            final = trecho[len(trecho.rstrip()):]
+            trecho = titulo + _sem_titulo(nome, novas[nome])[1] + final  # a IA às vezes repete o título
+        saida.append(trecho)
+    return "".join(saida)
+
+
+def estimar_tokens(texto):
+    """≈ 3 caracteres por token (a mesma conta do limitador de taxa)."""
+    return len(texto or "") // 3
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import random
+
+from busca import VERSAO_CHAVES, chave_ideia, chaves_ideias, termos
+
+# --- IDEIAS PARECIDAS (MINHASH + LSH) ---
+# Cada ideia recebe, ao ser salva, uma assinatura MinHash do texto normalizado
+# (Ideia + Localização, com a mesma normalização da busca). A assinatura é
+# dividida em FAIXAS; ideias que coincidem em alguma faixa são candidatas, e
+# só essas são comparadas. Assim o grupo de uma ideia nova sai de poucas
+# consultas indexadas, sem comparar com o banco inteiro. Com 16 faixas de 4
+# valores, pares com ~50% de semelhança já costumam virar candidatos.
+
+NUM_PERMUTACOES = 64
+FAIXAS = 16
+LINHAS_POR_FAIXA = NUM_PERMUTACOES // FAIXAS
+LIMIAR = 0.5
+TAMANHO_TRECHO = 4
+MAX_CANDIDATOS_FAIXA = 50  # faixas muito populosas não viram varredura
+
+_PRIMO = (1 << 61) - 1
+_sorteio = random.Random(1955)  # fixo: assinaturas precisam ser iguais entre processos
+_PERMUTACOES = [(_sorteio.randrange(1, _PRIMO), _sorteio.randrange(0, _PRIMO)) for _ in range(NUM_PERMUTACOES)]
+
+
+def texto_da_ideia(registro):
+    return " ".join(str(registro.get(c) or "") for c in ("Ideia", "Localização"))
+
+
+def trechos(texto):
+    """Conjunto de trechos de TAMANHO_TRECHO letras do texto normalizado."""
+    normal = " ".join(termos(texto))
+    if len(normal) <= TAMANHO_TRECHO:
+        return {normal} if normal else set()
+    return {normal[i:i + TAMANHO_TRECHO] for i in range(len(normal) - TAMANHO_TRECHO + 1)}
+
+
+def assinatura(texto):
+    valores = [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "big") for t in trechos(texto)]
+    if not valores:
+        return None
+    return [min((a * v + b) % _PRIMO for v in valores) for a, b in _PERMUTACOES]
+
+
+def semelhanca(assinatura_a, assinatura_b):
+    """Estimativa da semelhança de Jaccard entre os dois textos."""
+    return sum(x == y for x, y in zip(assinatura_a, assinatura_b)) / NUM_PERMUTACOES
+
+
+def faixas(assin):
+    return [
+        hashlib.blake2b(json.dumps(assin[i * LINHAS_POR_FAIXA:(i + 1) * LINHAS_POR_FAIXA]).encode(), digest_size=8).hexdigest()
+        for i in range(FAIXAS)
+    ]
+
+
+class AgrupadorIdeias:
+    def __init__(self, caminho="semelhantes.db", limiar=LIMIAR):
+        from armazenamento import BancoSQLite
+
+        self.banco = BancoSQLite(caminho)
+        self.limiar = limiar
+        con = self.banco.conexao()
+        with con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS ideias (chave TEXT PRIMARY KEY, grupo TEXT NOT NULL, "
+                "assinatura TEXT NOT NULL, dados TEXT)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS ideias_grupo ON ideias (grupo)")
+            con.execute("CREATE TABLE IF NOT EXISTS faixas (faixa INTEGER, valor TEXT, chave TEXT)")
+            con.execute("CREATE INDEX IF NOT EXISTS faixas_valor ON faixas (faixa, valor)")
+            con.execute("CREATE INDEX IF NOT EXISTS faixas_chave ON faixas (chave)")
+        self.banco.contar_gravacoes("ideias")  # faixas só mudam junto com as ideias
+
+    def versao(self):
+        return self.banco.versao("ideias")
+
+    def atualizado(self):
+        """Montado com o esquema atual dos dados (ver armazenamento.VERSAO_ESQUEMA)."""
+        from armazenamento import VERSAO_ESQUEMA
+
+        con = self.banco.conexao()
+        return (con.execute("PRAGMA user_version").fetchone()[0] >= VERSAO_ESQUEMA
+                and con.execute("PRAGMA application_id").fetchone()[0] >= VERSAO_CHAVES)
+
+    def vazio(self):
+        return self.banco.conexao().execute("SELECT 1 FROM ideias LIMIT 1").fetchone() is None
+
+    def _remover(self, con, chave):
+        con.execute("DELETE FROM faixas WHERE chave = ?", (chave,))
+        con.execute("DELETE FROM ideias WHERE chave = ?", (chave,))
+
+    def remover(self, chave):
+        con = self.banco.conexao()
+        with con:
+            self._remover(con, chave)
+
+    def _candidatos(self, con, valores_faixas, chave):
+        candidatos = set()
+        for faixa, valor in enumerate(valores_faixas):
+            for (outra,) in con.execute(
+                "SELECT chave FROM faixas WHERE faixa = ? AND valor = ? ORDER BY rowid DESC LIMIT ?",
+                (faixa, valor, MAX_CANDIDATOS_FAIXA),
+            ):
+                if outra != chave:
+                    candidatos.add(outra)
+        return candidatos
+
+    def inserir(self, registro, chave=None):
+        """Guarda a assinatura da ideia e devolve o grupo em que ela entrou (None se sem texto).
+
+        `chave` é a mesma do índice de busca (ver busca.chave_ideia; repetições têm ":1", ":2"...).
+        """
+        from armazenamento import TABELAS, registro_guardavel
+
+        chave = chave or chave_ideia(registro)
+        assin = assinatura(texto_da_ideia(registro))
+        dados = registro_guardavel(registro, TABELAS["ideias"]["tipos"])
+        con = self.banco.conexao()
+        # IMMEDIATE: dois processos gravando ao mesmo tempo não escolhem grupos diferentes
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            self._remover(con, chave)
+            if assin is None:
+                con.commit()
+                return None
+            valores_faixas = faixas(assin)
+            grupo, melhor = chave, self.limiar
+            for outra in self._candidatos(con, valores_faixas, chave):
+                linha = con.execute("SELECT grupo, assinatura FROM ideias WHERE chave = ?", (outra,)).fetchone()
+                if linha is None:
+                    continue
+                valor = semelhanca(assin, json.loads(linha[1]))
+                if valor >= melhor:
+                    grupo, melhor = linha[0], valor
+            con.execute(
+                "INSERT INTO ideias (chave, grupo, assinatura, dados) VALUES (?, ?, ?, ?)",
+                (chave, grupo, json.dumps(assin), json.dumps(dados, ensure_ascii=False, default=str)),
+            )
+            con.executemany(
+                "INSERT INTO faixas (faixa, valor, chave) VALUES (?, ?, ?)",
+                [(i, v, chave) for i, v in enumerate(valores_faixas)],
+            )
+            con.commit()
+            return grupo
+        except Exception:
+            con.rollback()
+            raise
+
+    def grupos(self, minimo=2, vereador=None):
+        """Grupos com pelo menos `minimo` ideias, dos maiores para os menores.
+
+        Cada grupo é {"grupo", "total", "ideias": [dados...]}; com `vereador`,
+        só entram grupos com alguma ideia enviada a ele.
+        """
+        con = self.banco.conexao()
+        resultado = []
+        for grupo, total in con.execute(
+            "SELECT grupo, COUNT(*) AS total FROM ideias GROUP BY grupo HAVING total >= ? ORDER BY total DESC, grupo",
+            (minimo,),
+        ):
+            ideias = [json.loads(d) for (d,) in con.execute("SELECT dados FROM ideias WHERE grupo = ? ORDER BY rowid", (grupo,))]
+            if vereador and not any(i.get("Vereador Destino") == vereador for i in ideias):
+                continue
+            resultado.append({"grupo": grupo, "total": total, "ideias": ideias})
+        return resultado
+
+
+def reagrupar(agrupador, repo_ideias):
+    """Refaz as assinaturas a partir do banco de ideias. Retorna o número de ideias."""
+    from armazenamento import VERSAO_ESQUEMA
+
+    con = agrupador.banco.conexao()
+    with con:
+        con.execute("DELETE FROM faixas")
+        con.execute("DELETE FROM ideias")
+        con.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        con.execute(f"PRAGMA application_id = {VERSAO_CHAVES}")
+    if not repo_ideias.existe():
+        return 0
+    registros = repo_ideias.carregar().to_dict("records")
+    for registro, chave in zip(registros, chaves_ideias(registros)):
+        agrupador.inserir(registro, chave)
+    return len(registros)
+
+
+def assunto_do_grupo(grupo, max_exemplos=3):
+    """Texto para o campo de assunto de uma proposição feita a partir do grupo."""
+    ideias = grupo["ideias"]
+    exemplos = []
+    for ideia in ideias:
+        texto = str(ideia.get("Ideia") or "").strip()
+        if texto and texto not in exemplos:
+            exemplos.append(texto)
+    locais = sorted({str(i.get("Localização") or "").strip() for i in ideias} - {""})
+    partes = [f"Pedido recebido de {grupo['total']} cidadãos pelo Banco de Ideias."]
+    partes += [f"- {t}" for t in exemplos[:max_exemplos]]
+    if locais:
+        partes.append("Localização informada: " + "; ".join(locais))
+    return "\n".join(partes)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from armazenamento import abrir_repositorios
+
+    parser = argparse.ArgumentParser(description="Agrupamento de ideias parecidas")
+    parser.add_argument("comando", choices=["reagrupar", "grupos"])
+    parser.add_argument("--backend", default="csv", choices=["csv", "sqlite"])
+    parser.add_argument("--pasta", default=".", help="pasta dos dados da câmara (o banco fica nela)")
+    parser.add_argument("--banco", default="semelhantes.db")
+    args = parser.parse_args()
+
+    os.makedirs(args.pasta, exist_ok=True)
+    agrupador = AgrupadorIdeias(os.path.join(args.pasta, args.banco))
+    if args.comando == "reagrupar":
+        print(f"{reagrupar(agrupador, abrir_repositorios(args.backend, args.pasta)['ideias'])} ideia(s) agrupada(s)")
+    else:
+        for g in agrupador.grupos():
+            print(f"{g['total']:4d}  {g['ideias'][0].get('Ideia')}")
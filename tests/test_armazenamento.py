@@ -0,0 +1,115 @@
+import csv
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from armazenamento import _gravar_marca, abrir_repositorios, acrescentar_linha, trava_arquivo
+
+COLUNAS = ["Processo", "Numero", "Texto"]
+PROCESSOS = 4
+LINHAS_POR_PROCESSO = 50
+TAMANHO_TEXTO = 20000  # bem acima do que o sistema escreve de uma vez só
+
+
+def _texto(processo, numero):
+    return f"{processo}-{numero}-" + "x" * TAMANHO_TEXTO
+
+
+def _escritor(caminho, processo):
+    for numero in range(LINHAS_POR_PROCESSO):
+        acrescentar_linha(caminho, COLUNAS, {"Processo": processo, "Numero": numero, "Texto": _texto(processo, numero)})
+
+
+def _ler(caminho):
+    csv.field_size_limit(10 * TAMANHO_TEXTO)
+    with open(caminho, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+# --- ESCRITA CONCORRENTE ---
+def test_varios_processos_acrescentando_no_mesmo_csv(tmp_path):
+    caminho = str(tmp_path / "ideias.csv")
+    contexto = multiprocessing.get_context("spawn")
+    processos = [contexto.Process(target=_escritor, args=(caminho, p)) for p in range(PROCESSOS)]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(60)
+        assert processo.exitcode == 0
+
+    linhas = _ler(caminho)
+    assert linhas[0] == COLUNAS
+    corpo = linhas[1:]
+    assert len(corpo) == PROCESSOS * LINHAS_POR_PROCESSO
+    for linha in corpo:  # nenhuma linha cortada ou misturada com outra
+        assert len(linha) == len(COLUNAS)
+        assert linha[2] == _texto(int(linha[0]), int(linha[1]))
+    por_processo = {}
+    for processo, numero, _ in corpo:
+        por_processo.setdefault(int(processo), []).append(int(numero))
+    # cada processo grava na ordem em que chamou
+    assert por_processo == {p: list(range(LINHAS_POR_PROCESSO)) for p in range(PROCESSOS)}
+
+
+# --- RECUPERAÇÃO PELO DIÁRIO ---
+def test_escrita_interrompida_e_desfeita_na_proxima(tmp_path):
+    caminho = str(tmp_path / "mural.csv")
+    acrescentar_linha(caminho, COLUNAS, {"Processo": 0, "Numero": 0, "Texto": "inteira"})
+    antes = os.path.getsize(caminho)
+
+    # o que acrescentar_linha deixa para trás se o processo morre no meio do write
+    with trava_arquivo(caminho) as fd:
+        _gravar_marca(fd, antes)
+    with open(caminho, "ab") as f:
+        f.write(b'1,7,"metade de uma linha que nunca termin')
+
+    acrescentar_linha(caminho, COLUNAS, {"Processo": 0, "Numero": 1, "Texto": "depois da queda"})
+    assert _ler(caminho) == [COLUNAS, ["0", "0", "inteira"], ["0", "1", "depois da queda"]]
+    with open(caminho + ".lock", "rb") as f:
+        assert f.read() == b""  # marca apagada: a próxima escrita não corta nada
+
+
+
+# --- VERSÃO PARA AS LEITURAS EM CACHE ---
+def _em_outra_thread(funcao):
+    saida = []
+    thread = threading.Thread(target=lambda: saida.append(funcao()))
+    thread.start()
+    thread.join()
+    return saida[0]
+
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_versao_muda_com_gravacao_de_outra_thread(tmp_path, backend):
+    # o Streamlit roda cada rerun numa thread nova, com conexão nova ao SQLite
+    ideias = abrir_repositorios(backend, str(tmp_path))["ideias"]
+    _em_outra_thread(lambda: ideias.inserir({"Ideia": "Poda das árvores", "Vereador Destino": "Vereador Teste 1"}))
+    antes = _em_outra_thread(ideias.versao)
+    assert _em_outra_thread(ideias.versao) == antes  # sem gravação, a chave do cache se mantém
+
+    _em_outra_thread(lambda: ideias.inserir({"Ideia": "Iluminação da praça", "Vereador Destino": "Vereador Teste 2"}))
+    depois = _em_outra_thread(ideias.versao)
+    assert depois != antes
+    assert ideias.versao() == depois
+
+    editor = ideias.carregar_para_edicao()
+    original = editor.iloc[0].to_dict()
+    _em_outra_thread(lambda: ideias.aplicar_alteracoes([(original, {**original, "Ideia": "Poda e limpeza"})]))
+    assert _em_outra_thread(ideias.versao) != depois
+
+
+def test_versao_sqlite_vale_entre_processos(tmp_path):
+    ideias = abrir_repositorios("sqlite", str(tmp_path))["ideias"]
+    antes = ideias.versao()
+    contexto = multiprocessing.get_context("spawn")
+    processo = contexto.Process(target=_inserir_ideia, args=(str(tmp_path),))
+    processo.start()
+    processo.join(60)
+    assert processo.exitcode == 0
+    assert ideias.versao() != antes
+
+
+def _inserir_ideia(pasta):
+    abrir_repositorios("sqlite", pasta)["ideias"].inserir({"Ideia": "Creche no bairro"})
@@ -0,0 +1,41 @@
+import sqlite3
+
+from busca import IndiceBusca, indexar_ideia, indexar_proposicao
+
+
+def _ideia(texto, destino):
+    return {"Data": 1741600000, "Nome": "Cidadão 1", "Contato": "", "Idade": "31-45 anos", "Ideia": texto,
+            "Contribuição": "", "Localização": "Rua Central", "Áreas": "Obras", "Vereador Destino": destino,
+            "Concordou Termos": "Sim"}
+
+
+# --- VISIBILIDADE POR VEREADOR ---
+def test_filtro_do_vereador_vem_antes_do_limite(tmp_path):
+    indice = IndiceBusca(str(tmp_path / "busca.db"))
+    # muitos documentos de outros vereadores que pontuam mais alto que os do vereador da sessão
+    for n in range(60):
+        indexar_proposicao(indice, f"outro-{n}", "Vereador Outro", "Indicação", "Iluminação iluminação pública",
+                           "Iluminação da praça, iluminação da rua, iluminação do parque.", 1)
+    indexar_proposicao(indice, "meu-1", "Vereador Teste", "Pedido de Providência", "Reparos no bairro",
+                       "Troca de lâmpadas e iluminação da escola.", 1)
+    indexar_ideia(indice, _ideia("Mais iluminação perto da creche", "Vereador Teste"))
+
+    assert all(r["dados"]["VEREADOR"] == "Vereador Outro" for r in indice.buscar("iluminação", limite=20))
+    meus = indice.buscar("iluminação", limite=20, vereador="Vereador Teste")
+    assert sorted(r["tipo"] for r in meus) == ["ideia", "proposicao"]
+    assert [r["dados"]["ID_PROPOSICAO"] for r in indice.buscar("iluminação", "proposicao", vereador="Vereador Teste")] == ["meu-1"]
+
+
+def test_indice_sem_coluna_vereador_e_refeito(tmp_path):
+    caminho = str(tmp_path / "busca.db")
+    con = sqlite3.connect(caminho)
+    con.execute("CREATE VIRTUAL TABLE documentos USING fts5("
+                "chave UNINDEXED, tipo UNINDEXED, dados UNINDEXED, titulo, conteudo, tokenize='unicode61')")
+    con.execute("INSERT INTO documentos VALUES ('ideia:x', 'ideia', '{}', 'poda', 'poda')")
+    con.commit()
+    con.close()
+
+    indice = IndiceBusca(caminho)
+    assert indice.vazio()  # o app chama reindexar() quando o índice está vazio
+    indexar_proposicao(indice, "1", "Vereador Teste", "Indicação", "Poda de árvores", "Poda.", 1)
+    assert len(indice.buscar("poda", vereador="Vereador Teste")) == 1
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+import pytz
+
+from armazenamento import FUSO, abrir_repositorios
+
+POSTS = [
+    {"Vereador": "Vereador Teste 1", "Titulo": "Sessão ordinária", "Mensagem": "Pauta da semana."},
+    {"Vereador": "Vereador Teste 2", "Titulo": "Audiência pública", "Mensagem": "Saúde no interior."},
+    {"Vereador": "Vereador Teste 3", "Titulo": "Visita à escola", "Mensagem": "Reforma do telhado."},
+]
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def mural(request, tmp_path):
+    repo = abrir_repositorios(request.param, str(tmp_path))["mural"]
+    agora = pytz.timezone(FUSO).localize(datetime(2025, 3, 10, 9, 30))
+    for post in POSTS:
+        repo.inserir({"Data": agora, **post})
+    return repo
+
+
+def _linha(editor, titulo):
+    """A linha do editor como o app a envia (base.iloc[pos].to_dict())."""
+    return editor[editor["Titulo"] == titulo].iloc[0].to_dict()
+
+
+def _titulos(repo):
+    return sorted(repo.carregar()["Titulo"])
+
+
+# --- DOIS EDITORES COM A MESMA TABELA ABERTA ---
+def test_segunda_gravacao_da_mesma_linha_da_conflito(mural):
+    editor_a = mural.carregar_para_edicao()
+    editor_b = mural.carregar_para_edicao()
+
+    original_a = _linha(editor_a, "Audiência pública")
+    assert mural.aplicar_alteracoes([(original_a, {**original_a, "Titulo": "Audiência pública (adiada)"})]) == []
+
+    original_b = _linha(editor_b, "Audiência pública")
+    incluida = {"Data": original_b["Data"], "Vereador": "Vereador Teste 4", "Titulo": "Nova", "Mensagem": "."}
+    conflitos = mural.aplicar_alteracoes([(original_b, {**original_b, "Titulo": "Audiência cancelada"})], [incluida])
+    assert [c["Titulo"] for c in conflitos] == ["Audiência pública"]
+    # com conflito nada é gravado, nem as linhas incluídas
+    assert _titulos(mural) == ["Audiência pública (adiada)", "Sessão ordinária", "Visita à escola"]
+
+
+def test_apagar_linha_alterada_por_outro_da_conflito(mural):
+    editor_a = mural.carregar_para_edicao()
+    editor_b = mural.carregar_para_edicao()
+
+    original_a = _linha(editor_a, "Visita à escola")
+    assert mural.aplicar_alteracoes([(original_a, {**original_a, "Mensagem": "Telhado pronto."})]) == []
+    assert len(mural.aplicar_alteracoes([(_linha(editor_b, "Visita à escola"), None)])) == 1
+    assert mural.carregar()["Mensagem"].tolist()[-1] == "Telhado pronto."
+
+
+def test_linhas_diferentes_nao_dao_conflito(mural):
+    editor_a = mural.carregar_para_edicao()
+    editor_b = mural.carregar_para_edicao()
+
+    # A apaga a primeira linha: no CSV as de baixo mudam de posição
+    assert mural.aplicar_alteracoes([(_linha(editor_a, "Sessão ordinária"), None)]) == []
+    original_b = _linha(editor_b, "Visita à escola")
+    assert mural.aplicar_alteracoes([(original_b, {**original_b, "Titulo": "Visita à escola municipal"})]) == []
+    assert _titulos(mural) == ["Audiência pública", "Visita à escola municipal"]
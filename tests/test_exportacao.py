@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+import exportacao
+from armazenamento import abrir_repositorios
+from exportacao import apagar, exportar
+from gravacao import gravar_historico
+from versoes import conteudo_para_guardar
+
+
+class _IndiceNulo:
+    def indexar(self, *args, **kwargs):
+        pass
+
+
+def _ler(exportado):
+    try:
+        return pd.read_csv(exportado["caminho"], dtype=str, keep_default_na=False)
+    finally:
+        apagar(exportado)
+
+
+def _texto(versao):
+    return "\n".join(f"Art. {n}º Texto do artigo {n}, versão {versao if n == 2 else 1}." for n in range(1, 6))
+
+
+# --- HISTÓRICO EXPORTADO ---
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_historico_sai_com_texto_e_assunto_de_cada_versao(tmp_path, backend, monkeypatch):
+    repo = abrir_repositorios(backend, str(tmp_path))["historico"]
+    for versao in range(1, 5):
+        gravar_historico(repo, _IndiceNulo(), "Vereador Teste", "Indicação", "Poda de árvores", _texto(versao),
+                         "novo", versao, 0)
+    # gravadas antes: só a versão 1 guardava o assunto
+    anterior = None
+    for versao in range(1, 5):
+        repo.inserir({"ID_PROPOSICAO": "antigo", "VEREADOR": "Vereador Teste", "TIPO_DOC": "Indicação",
+                      "ASSUNTO": "Iluminação" if versao == 1 else "", "VERSAO_NUM": versao, "DATA_HORA": 0,
+                      "MINUTA_TEXTO": conteudo_para_guardar(versao, _texto(versao), anterior), "MODELO": ""})
+        anterior = _texto(versao)
+
+    for recentes in (exportacao.PROPOSICOES_RECENTES, 0):  # 0: toda revisão relê a proposição
+        monkeypatch.setattr(exportacao, "PROPOSICOES_RECENTES", recentes)
+        df = _ler(exportar(repo, "historico", "CSV"))
+        assert len(df) == 8
+        for linha in df.to_dict("records"):
+            assert linha["MINUTA_TEXTO"] == _texto(int(linha["VERSAO_NUM"]))
+            assert linha["ASSUNTO"] == {"novo": "Poda de árvores", "antigo": "Iluminação"}[linha["ID_PROPOSICAO"]]
@@ -0,0 +1,115 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ia import ConfigIA, GeracaoInterrompida, completar, transmitir
+from provedores_ia import ProvedorLocal
+
+RESPOSTA = "Solicita ao Poder Executivo a poda das árvores da Rua Central."
+CONFIG = ConfigIA(tentativas=3, espera_base=0.01, espera_max=0.05, timeout_conexao=2, timeout_leitura=5)
+
+
+# --- SERVIDOR LOCAL (API NO FORMATO DA OPENAI) ---
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, respostas):
+        super().__init__(("127.0.0.1", 0), _Atendente)
+        self.respostas = list(respostas)  # status de cada chamada, em ordem; depois da lista, 200
+        self.chamadas = 0
+        self.trava = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class _Atendente(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _enviar(self, status, corpo, tipo="application/json", cabecalhos=None):
+        bruto = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(bruto)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(bruto)
+
+    def do_POST(self):
+        pedido = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.trava:
+            self.server.chamadas += 1
+            status = self.server.respostas.pop(0) if self.server.respostas else 200
+        if status != 200:
+            self._enviar(status, json.dumps({"error": {"message": "rate limit"}}), cabecalhos={"Retry-After": "0"})
+        elif pedido.get("stream"):
+            eventos = [{"choices": [{"delta": {"content": RESPOSTA[i:i + 10]}, "finish_reason": None}]}
+                       for i in range(0, len(RESPOSTA), 10)]
+            eventos.append({"choices": [{"delta": {}, "finish_reason": "stop"}],
+                            "usage": {"prompt_tokens": 12, "completion_tokens": 20}})
+            corpo = "".join(f"data: {json.dumps(e)}\n\n" for e in eventos) + "data: [DONE]\n\n"
+            self._enviar(200, corpo, "text/event-stream")
+        else:
+            self._enviar(200, json.dumps({
+                "choices": [{"message": {"role": "assistant", "content": RESPOSTA}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 12, "completion_tokens": 20},
+            }))
+
+
+@pytest.fixture
+def servidor():
+    criados = []
+
+    def criar(respostas):
+        srv = _Servidor(respostas)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        criados.append(srv)
+        return srv
+
+    yield criar
+    for srv in criados:
+        srv.shutdown()
+        srv.server_close()
+
+
+# --- REPETIÇÃO DEPOIS DE 429 ---
+def test_completar_repete_depois_de_429(servidor):
+    srv = servidor([429, 429])
+    resultado = completar(ProvedorLocal(srv.url, config=CONFIG), "pedido", 0.2, CONFIG)
+    assert resultado.ok
+    assert resultado.texto == RESPOSTA
+    assert resultado.tentativas == 3
+    assert srv.chamadas == 3
+
+
+def test_transmitir_repete_depois_de_429(servidor):
+    srv = servidor([429, 429])
+    transmissao = transmitir(ProvedorLocal(srv.url, config=CONFIG), "pedido", 0.2, CONFIG)
+    assert "".join(transmissao) == RESPOSTA
+    assert srv.chamadas == 3
+
+
+def test_completar_desiste_quando_acabam_as_tentativas(servidor):
+    srv = servidor([429] * 10)
+    resultado = completar(ProvedorLocal(srv.url, config=CONFIG), "pedido", 0.2, CONFIG)
+    assert not resultado.ok
+    assert "Limite de uso da IA" in resultado.erro
+    assert resultado.tentativas == CONFIG.tentativas
+    assert srv.chamadas == CONFIG.tentativas
+
+
+def test_transmitir_desiste_quando_acabam_as_tentativas(servidor):
+    srv = servidor([429] * 10)
+    transmissao = transmitir(ProvedorLocal(srv.url, config=CONFIG), "pedido", 0.2, CONFIG)
+    with pytest.raises(GeracaoInterrompida) as erro:
+        list(transmissao)
+    assert "Limite de uso da IA" in str(erro.value)
+    assert erro.value.parcial == ""
+    assert srv.chamadas == CONFIG.tentativas
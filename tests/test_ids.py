@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import threading
+from datetime import datetime, timezone
+
+from armazenamento import ARQUIVO_IDS, novo_id, novos_ids
+
+PROCESSOS = 4
+THREADS = 6
+IDS_POR_THREAD = 150
+
+
+def _gerar_em_threads(pasta):
+    """IDs de cada thread, na ordem em que ela os recebeu (metade um a um, metade em lotes)."""
+    por_thread = [[] for _ in range(THREADS)]
+
+    def trabalhar(saida):
+        while len(saida) < IDS_POR_THREAD:
+            if len(saida) % 2:
+                saida.extend(novos_ids(3, pasta))
+            else:
+                saida.append(novo_id(pasta))
+
+    threads = [threading.Thread(target=trabalhar, args=(saida,)) for saida in por_thread]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return por_thread
+
+
+def _crescente(ids):
+    return all(a < b for a, b in zip(ids, ids[1:]))
+
+
+# --- IDS ÚNICOS ENTRE THREADS E PROCESSOS ---
+def test_ids_unicos_entre_threads(tmp_path):
+    por_thread = _gerar_em_threads(str(tmp_path))
+    todos = [i for ids in por_thread for i in ids]
+    assert len(set(todos)) == len(todos)
+    assert all(_crescente(ids) for ids in por_thread)
+
+
+def test_ids_unicos_entre_processos(tmp_path):
+    contexto = multiprocessing.get_context("spawn")
+    with contexto.Pool(PROCESSOS) as pool:
+        por_processo = pool.map(_gerar_em_threads, [str(tmp_path)] * PROCESSOS)
+    todos = [i for por_thread in por_processo for ids in por_thread for i in ids]
+    assert len(todos) >= PROCESSOS * THREADS * IDS_POR_THREAD
+    assert len(set(todos)) == len(todos)
+    for por_thread in por_processo:
+        assert all(_crescente(ids) for ids in por_thread)
+
+
+def test_ids_seguidos_no_mesmo_processo_sao_crescentes(tmp_path):
+    ids = [novo_id(str(tmp_path)) for _ in range(500)] + novos_ids(100, str(tmp_path))
+    assert _crescente(ids)
+    assert all(len(i) == 17 and i.isdigit() for i in ids)
+
+
+# --- FORMATO E RELÓGIO ---
+def test_id_e_o_instante_em_utc(tmp_path):
+    antes = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    id_novo = novo_id(str(tmp_path))
+    depois = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    assert antes <= id_novo[:14] <= depois
+
+
+def test_relogio_atrasado_nao_repete_id(tmp_path):
+    # último ID entregue "no futuro", como depois de um ajuste do relógio para trás
+    futuro = int(datetime(2100, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    with open(os.path.join(tmp_path, ARQUIVO_IDS + ".lock"), "w", encoding="ascii") as f:
+        f.write(f"{futuro:020d}")
+    assert novos_ids(2, str(tmp_path)) == ["21000101000000001", "21000101000000002"]
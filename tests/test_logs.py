@@ -0,0 +1,57 @@
+import os
+from datetime import date, datetime
+
+import pytz
+
+from armazenamento import FUSO, TABELAS, RepositorioLogCSV, acrescentar_linha
+
+
+def _logs(pasta, meses_retencao=24):
+    t = TABELAS["logs"]
+    return RepositorioLogCSV(str(pasta), t["colunas"], t["tipos"], meses_retencao=meses_retencao)
+
+
+def _acesso(dia, usuario="Vereador Teste"):
+    momento = pytz.timezone(FUSO).localize(datetime(dia.year, dia.month, dia.day, 10, 0))
+    return {"Data_Hora": momento, "Usuario": usuario, "Acao": "Login Realizado"}
+
+
+def _arquivos(pasta):
+    return sorted(n for n in os.listdir(pasta) if n.startswith("log_acessos_"))
+
+
+# --- PARTIÇÕES MENSAIS ---
+def test_gravacao_atrasada_em_mes_comprimido(tmp_path):
+    logs = _logs(tmp_path)
+    logs.inserir(_acesso(date(2025, 1, 10), "A"))
+    logs.inserir(_acesso(date(2025, 2, 3), "B"))  # fecha janeiro
+    assert _arquivos(tmp_path) == ["log_acessos_2025-01.csv.gz", "log_acessos_2025-02.csv", "log_acessos_2025-02.csv.lock"]
+
+    logs.inserir(_acesso(date(2025, 1, 28), "C"))  # com data passada
+    # janeiro continua um único .gz, agora com as duas linhas; sem .csv nem .lock sobrando
+    assert _arquivos(tmp_path) == ["log_acessos_2025-01.csv.gz", "log_acessos_2025-02.csv", "log_acessos_2025-02.csv.lock"]
+    assert sorted(logs.buscar_periodo(date(2025, 1, 1), date(2025, 1, 31))["Usuario"]) == ["A", "C"]
+    assert sorted(logs.carregar()["Usuario"]) == ["A", "B", "C"]
+    assert sorted(u for df in logs.lotes(2) for u in df["Usuario"]) == ["A", "B", "C"]
+    assert logs.resumo()["Total"].sum() == 3
+
+
+def test_particoes_lista_os_dois_arquivos_do_mes(tmp_path):
+    logs = _logs(tmp_path)
+    logs.inserir(_acesso(date(2025, 1, 10), "A"))
+    logs.inserir(_acesso(date(2025, 2, 3), "B"))
+    # .csv criado ao lado do .gz antes da rotação (outro processo no meio da gravação)
+    t = TABELAS["logs"]
+    acrescentar_linha(str(tmp_path / "log_acessos_2025-01.csv"), t["colunas"], _acesso(date(2025, 1, 20), "C"),
+                      tipos=t["tipos"])
+    assert [os.path.basename(c) for c in logs.particoes()["2025-01"]] == ["log_acessos_2025-01.csv.gz",
+                                                                           "log_acessos_2025-01.csv"]
+    assert sorted(logs.buscar_periodo(date(2025, 1, 1), date(2025, 1, 31))["Usuario"]) == ["A", "C"]
+
+
+def test_mes_apagado_pela_retencao_leva_a_trava(tmp_path):
+    logs = _logs(tmp_path, meses_retencao=2)
+    logs.inserir(_acesso(date(2025, 1, 10)))
+    logs.inserir(_acesso(date(2025, 2, 10)))
+    logs.inserir(_acesso(date(2025, 5, 10)))  # janeiro e fevereiro passam da retenção
+    assert _arquivos(tmp_path) == ["log_acessos_2025-05.csv", "log_acessos_2025-05.csv.lock"]
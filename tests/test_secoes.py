@@ -0,0 +1,40 @@
+import pytest
+
+from secoes import secoes_afetadas
+
+
+# --- SEÇÕES QUE O PEDIDO DE REVISÃO ATINGE ---
+@pytest.mark.parametrize("pedido, esperado", [
+    ("Mude a ementa", ["ementa"]),
+    ("Aumente a justificativa", ["justificativa"]),
+    ("Acrescente um parágrafo único ao Art. 2º", ["articulado"]),
+    ("Inclua um inciso sobre escolas", ["articulado"]),
+    ("Melhore a ementa e a justificativa", ["ementa", "justificativa"]),
+    ("Corrija a data do documento", ["fechamento"]),
+    ("Troque a assinatura", ["fechamento"]),
+    ("Reescreva o texto do pedido de forma mais direta", ["articulado"]),
+    ("Deixe o pedido mais claro", ["articulado"]),
+    ("Use argumentos mais fortes", ["justificativa"]),
+    ("Inclua o partido do vereador", ["preambulo"]),
+    ("Adicione mais argumentos na justificativa", ["justificativa"]),
+    ("Revise a JUSTIFICATIVA, por favor", ["justificativa"]),
+])
+def test_pedido_com_secoes(pedido, esperado):
+    assert secoes_afetadas(pedido) == esperado
+
+
+@pytest.mark.parametrize("pedido", [
+    "",
+    "Melhore o texto",
+    "Revise tudo",
+    "Reescreva o documento inteiro e a ementa",
+    # palavra comum que aponta para outra seção: reescrita completa
+    "Reforce o pedido na justificativa",
+    "Mude a ementa e deixe o pedido mais claro",
+    # "data" sozinha não é o fechamento (pode ser a vigência, no articulado)
+    "Altere a data de início da vigência para 2026",
+    # mais seções que MAX_SECOES_PARCIAL
+    "Ajuste cabeçalho, ementa, artigos e justificativa",
+])
+def test_pedido_para_reescrita_completa(pedido):
+    assert secoes_afetadas(pedido) is None
@@ -0,0 +1,70 @@
+import threading
+
+from armazenamento import abrir_repositorios
+from busca import IndiceBusca, reindexar
+from gravacao import gravar_ideia, regravar_ideias
+from semelhantes import AgrupadorIdeias, reagrupar
+
+
+def _em_outra_thread(funcao):
+    saida = []
+    thread = threading.Thread(target=lambda: saida.append(funcao()))
+    thread.start()
+    thread.join()
+    return saida[0]
+
+
+def _ideia(texto, nome="Cidadão 1", data=1741600000):
+    return {"Data": data, "Nome": nome, "Contato": "", "Idade": "31-45 anos", "Ideia": texto,
+            "Contribuição": "", "Localização": "Rua Central", "Áreas": "Obras",
+            "Vereador Destino": "Vereador Teste 1", "Concordou Termos": "Sim"}
+
+
+# --- VERSÃO PARA AS LEITURAS EM CACHE ---
+def test_versao_muda_com_gravacao_de_outra_thread(tmp_path):
+    agrupador = AgrupadorIdeias(str(tmp_path / "semelhantes.db"))
+    antes = _em_outra_thread(agrupador.versao)
+    _em_outra_thread(lambda: agrupador.inserir(_ideia("Conserto do buraco na Rua Central perto da escola")))
+    depois = _em_outra_thread(agrupador.versao)
+    assert depois != antes
+    assert agrupador.versao() == depois
+    assert _em_outra_thread(agrupador.versao) == depois
+
+
+# --- IDEIAS REPETIDAS ---
+def test_ideias_iguais_contam_cada_uma(tmp_path):
+    repos = abrir_repositorios("csv", str(tmp_path))
+    indice = IndiceBusca(str(tmp_path / "busca.db"))
+    agrupador = AgrupadorIdeias(str(tmp_path / "semelhantes.db"))
+    texto = "Conserto do buraco na Rua Central perto da escola"
+    for _ in range(3):  # o mesmo pedido, no mesmo segundo, sem nome
+        gravar_ideia(repos["ideias"], indice, agrupador, _ideia(texto, nome=""))
+    gravar_ideia(repos["ideias"], indice, agrupador, _ideia("Conserto do buraco na Rua Central perto da creche"))
+
+    assert [g["total"] for g in agrupador.grupos()] == [4]
+    assert len(indice.buscar("buraco", "ideia")) == 4
+
+    # apagar uma das repetições tira só uma do índice e do grupo
+    editor = repos["ideias"].carregar_para_edicao()
+    original = editor[editor["Nome"].isna() | (editor["Nome"] == "")].iloc[0].to_dict()
+    assert repos["ideias"].aplicar_alteracoes([(original, None)]) == []
+    regravar_ideias(indice, agrupador, [(original, None)], [])
+    assert [g["total"] for g in agrupador.grupos()] == [3]
+    assert len(indice.buscar("buraco", "ideia")) == 3
+
+    # montados de novo a partir do banco, com as mesmas chaves
+    chaves = sorted(r["chave"] for r in indice.buscar("buraco", "ideia"))
+    assert reindexar(indice, repos)["ideia"] == 3
+    assert reagrupar(agrupador, repos["ideias"]) == 3
+    assert sorted(r["chave"] for r in indice.buscar("buraco", "ideia")) == chaves
+    assert [g["total"] for g in agrupador.grupos()] == [3]
+
+
+def test_grupos_de_antes_das_chaves_repetidas_sao_refeitos(tmp_path):
+    from armazenamento import VERSAO_ESQUEMA
+
+    agrupador = AgrupadorIdeias(str(tmp_path / "semelhantes.db"))
+    agrupador.banco.conexao().execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+    assert not agrupador.atualizado()  # o app chama reagrupar()
+    reagrupar(agrupador, abrir_repositorios("csv", str(tmp_path))["ideias"])
+    assert agrupador.atualizado()
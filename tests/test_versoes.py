@@ -0,0 +1,72 @@
+import pytest
+
+from armazenamento import abrir_repositorios
+from versoes import (INTERVALO_COMPLETO, aplicar_delta, calcular_delta, codificar_delta, conteudo_para_guardar,
+                     decodificar_delta, eh_delta, remontar_versao, remontar_versoes)
+
+TEXTOS = {
+    "crlf": "EXCELENTÍSSIMO SENHOR PRESIDENTE\r\n\r\nArt. 1º Fica instituído...\r\nArt. 2º Revogam-se...\r\n",
+    "crlf_sem_fim": "Linha um\r\nLinha dois\r\nLinha três",
+    "sem_quebra_no_fim": "Art. 1º Primeiro.\nArt. 2º Segundo.",
+    "vazio": "",
+    "so_quebras": "\n\n\r\n",
+    "misturado": "Unix\nWindows\r\nMac antigo\rseparador fim",
+    "espacos": "  recuo\t\n\ttabulação  \n",
+}
+
+
+@pytest.mark.parametrize("base", list(TEXTOS))
+@pytest.mark.parametrize("novo", list(TEXTOS))
+def test_delta_volta_o_texto_exato(base, novo):
+    base, novo = TEXTOS[base], TEXTOS[novo]
+    operacoes = decodificar_delta(codificar_delta(calcular_delta(base, novo)))
+    assert aplicar_delta(base, operacoes) == novo
+
+
+def _cadeia(total):
+    """Textos de `total` versões, passando pelos casos de TEXTOS e por edições pequenas."""
+    textos = []
+    casos = list(TEXTOS.values())
+    for versao in range(1, total + 1):
+        if versao % 3 == 0:
+            texto = casos[versao % len(casos)]
+        else:
+            anterior = textos[-1] if textos else casos[0]
+            texto = anterior.replace("Art. 2º", f"Art. {versao}º") + f"Parágrafo da versão {versao}.\r\n"
+        textos.append(texto)
+    return textos
+
+
+def _linhas(textos):
+    linhas = []
+    anterior = None
+    for versao, texto in enumerate(textos, start=1):
+        linhas.append({"VERSAO_NUM": versao, "MINUTA_TEXTO": conteudo_para_guardar(versao, texto, anterior)})
+        anterior = texto
+    return linhas
+
+
+# --- CADEIA DE VERSÕES ---
+def test_cadeia_atravessa_textos_completos():
+    textos = _cadeia(3 * INTERVALO_COMPLETO + 2)
+    linhas = _linhas(textos)
+    assert any(eh_delta(l["MINUTA_TEXTO"]) for l in linhas)
+    for versao in (1, INTERVALO_COMPLETO + 1, 2 * INTERVALO_COMPLETO + 1):  # texto inteiro de tempos em tempos
+        assert not eh_delta(linhas[versao - 1]["MINUTA_TEXTO"])
+
+    assert remontar_versoes(linhas) == {v: t for v, t in enumerate(textos, start=1)}
+    for versao, texto in enumerate(textos, start=1):
+        assert remontar_versao(linhas, versao) == texto
+    # a ordem das linhas não importa
+    assert remontar_versoes(list(reversed(linhas))) == remontar_versoes(linhas)
+
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_cadeia_gravada_no_repositorio(tmp_path, backend):
+    repo = abrir_repositorios(backend, str(tmp_path))["historico"]
+    textos = _cadeia(INTERVALO_COMPLETO + 5)
+    for linha in _linhas(textos):
+        repo.inserir({"ID_PROPOSICAO": "20250101120000000", "VEREADOR": "Vereador Teste", "TIPO_DOC": "Indicação",
+                      "ASSUNTO": "", "DATA_HORA": 0, "MODELO": "", **linha})
+    lidas = repo.buscar({"ID_PROPOSICAO": "20250101120000000"}).to_dict("records")
+    assert remontar_versoes(lidas) == {v: t for v, t in enumerate(textos, start=1)}
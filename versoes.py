@@ -0,0 +1,161 @@
+import base64
+import difflib
+import html
+import json
+import zlib
+
+# --- VERSÕES DAS PROPOSIÇÕES (ARMAZENAMENTO POR DIFERENÇAS) ---
+# A versão 1 de cada proposição é guardada inteira na coluna MINUTA_TEXTO.
+# As revisões seguintes guardam só a diferença para a versão anterior
+# (operações por linha, comprimidas), com o prefixo PREFIXO_DELTA. A cada
+# INTERVALO_COMPLETO versões gravamos o texto inteiro de novo, para que
+# remontar qualquer versão aplique no máximo esse número de diferenças.
+
+PREFIXO_DELTA = "@delta1:"
+INTERVALO_COMPLETO = 10
+
+
+def calcular_delta(base, novo):
+    """Operações que transformam `base` em `novo`.
+
+    [0, i, j] copia as linhas base[i:j]; [1, [linhas]] insere linhas novas.
+    """
+    linhas_base = base.splitlines(keepends=True)
+    linhas_novo = novo.splitlines(keepends=True)
+    operacoes = []
+    matcher = difflib.SequenceMatcher(None, linhas_base, linhas_novo, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            operacoes.append([0, i1, i2])
+        elif j2 > j1:  # replace / insert
+            operacoes.append([1, linhas_novo[j1:j2]])
+    return operacoes
+
+
+def aplicar_delta(base, operacoes):
+    linhas_base = base.splitlines(keepends=True)
+    saida = []
+    for op in operacoes:
+        if op[0] == 0:
+            saida.extend(linhas_base[op[1]:op[2]])
+        else:
+            saida.extend(op[1])
+    return "".join(saida)
+
+
+def codificar_delta(operacoes):
+    bruto = json.dumps(operacoes, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return PREFIXO_DELTA + base64.b64encode(zlib.compress(bruto, 9)).decode("ascii")
+
+
+def decodificar_delta(texto):
+    bruto = zlib.decompress(base64.b64decode(texto[len(PREFIXO_DELTA):]))
+    return json.loads(bruto.decode("utf-8"))
+
+
+def eh_delta(texto):
+    return isinstance(texto, str) and texto.startswith(PREFIXO_DELTA)
+
+
+def guarda_completo(versao):
+    return versao == 1 or (versao - 1) % INTERVALO_COMPLETO == 0
+
+
+def conteudo_para_guardar(versao, texto, texto_anterior):
+    """Valor da coluna MINUTA_TEXTO para a versão `versao`."""
+    if guarda_completo(versao) or texto_anterior is None:
+        return texto
+    delta = codificar_delta(calcular_delta(texto_anterior, texto))
+    # Revisões que reescrevem quase tudo ficam melhor guardadas inteiras
+    return delta if len(delta) < len(texto) else texto
+
+
+def _texto(valor):
+    return "" if valor is None or valor != valor else str(valor)
+
+
+def remontar_versoes(linhas):
+    """Recebe as linhas do histórico de UMA proposição e devolve {versao: texto}.
+
+    `linhas` é um iterável de dicts com VERSAO_NUM e MINUTA_TEXTO.
+    """
+    textos = {}
+    anterior = None
+    for linha in sorted(linhas, key=lambda l: int(l["VERSAO_NUM"])):
+        valor = _texto(linha["MINUTA_TEXTO"])
+        if eh_delta(valor):
+            atual = aplicar_delta(anterior or "", decodificar_delta(valor))
+        else:
+            atual = valor
+        textos[int(linha["VERSAO_NUM"])] = atual
+        anterior = atual
+    return textos
+
+
+def remontar_versao(linhas, versao):
+    """Remonta só a versão pedida, partindo do texto completo mais próximo."""
+    ordenadas = sorted(
+        (l for l in linhas if int(l["VERSAO_NUM"]) <= versao),
+        key=lambda l: int(l["VERSAO_NUM"]),
+    )
+    inicio = 0
+    for i, linha in enumerate(ordenadas):
+        if not eh_delta(_texto(linha["MINUTA_TEXTO"])):
+            inicio = i
+    texto = None
+    for linha in ordenadas[inicio:]:
+        valor = _texto(linha["MINUTA_TEXTO"])
+        texto = aplicar_delta(texto or "", decodificar_delta(valor)) if eh_delta(valor) else valor
+    return texto
+
+
+# --- COMPARAÇÃO ENTRE VERSÕES ---
+def comparar(texto_a, texto_b):
+    """Linhas lado a lado: lista de (esquerda, direita, tipo).
+
+    Usa o mesmo cálculo de diferenças do armazenamento; tipo é "igual",
+    "removida" (só na esquerda) ou "incluida" (só na direita).
+    """
+    linhas_a = texto_a.splitlines()
+    linhas = []
+    incluidas = []
+    proxima = 0
+
+    def fechar_trecho(ate):
+        # linhas da base que nenhuma cópia aproveitou foram removidas
+        for removida in linhas_a[proxima:ate]:
+            linhas.append((removida, "", "removida"))
+        for incluida in incluidas:
+            linhas.append(("", incluida.rstrip("\r\n"), "incluida"))
+        incluidas.clear()
+
+    for op in calcular_delta(texto_a, texto_b):
+        if op[0] == 0:
+            fechar_trecho(op[1])
+            for igual in linhas_a[op[1]:op[2]]:
+                linhas.append((igual, igual, "igual"))
+            proxima = op[2]
+        else:
+            incluidas.extend(op[1])
+    fechar_trecho(len(linhas_a))
+    return linhas
+
+
+_CORES = {"igual": ("", ""), "removida": ("#5c1f1f", ""), "incluida": ("", "#1f4d2b")}
+
+
+def comparar_html(texto_a, texto_b, titulo_a, titulo_b):
+    """Tabela HTML com as duas versões lado a lado."""
+    celula = "padding:2px 8px;vertical-align:top;white-space:pre-wrap;width:50%;"
+    partes = [
+        "<table style='width:100%;border-collapse:collapse;font-size:14px;'>",
+        f"<tr><th style='{celula}'>{html.escape(titulo_a)}</th><th style='{celula}'>{html.escape(titulo_b)}</th></tr>",
+    ]
+    for esquerda, direita, tipo in comparar(texto_a, texto_b):
+        fundo_esq, fundo_dir = _CORES[tipo]
+        partes.append(
+            f"<tr><td style='{celula}background:{fundo_esq};'>{html.escape(esquerda)}</td>"
+            f"<td style='{celula}background:{fundo_dir};'>{html.escape(direita)}</td></tr>"
+        )
+    partes.append("</table>")
+    return "".join(partes)